@@ -0,0 +1,86 @@
+"""Async serving mode (``DB_MODE=async``).
+
+The route modules are written once against a sync ``Session``. ``async_router``
+re-registers a router's endpoints as coroutines that take an ``AsyncSession``
+and run the original handler through ``AsyncSession.run_sync``: the ORM code
+is unchanged, but its queries await the async driver instead of blocking a
+threadpool worker. ``offload`` moves CPU-bound genetics off the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar, get_type_hints
+
+from fastapi import APIRouter, Depends
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+
+from .database import get_async_db
+
+GENETICS_WORKERS = int(os.getenv("GENETICS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor = ThreadPoolExecutor(max_workers=GENETICS_WORKERS, thread_name_prefix="genetics")
+
+T = TypeVar("T")
+
+
+def offload(func: Callable[..., T], *args) -> T:
+    """``func(*args)``, run on the genetics executor when called from an async route.
+
+    Sync-mode handlers already run in the threadpool, so there it is a plain call.
+    """
+    if not in_greenlet():
+        return func(*args)
+    return await_only(asyncio.get_running_loop().run_in_executor(_executor, func, *args))
+
+
+def _parameters(endpoint: Callable) -> dict[str, inspect.Parameter]:
+    return dict(inspect.signature(endpoint).parameters)
+
+
+def _async_endpoint(endpoint: Callable) -> Callable:
+    hints = get_type_hints(endpoint)
+    parameters = []
+    for parameter in _parameters(endpoint).values():
+        if parameter.name == "db":
+            parameter = parameter.replace(annotation=AsyncSession, default=Depends(get_async_db))
+        else:
+            annotation = hints.get(parameter.name, parameter.annotation)
+            parameter = parameter.replace(annotation=annotation)
+        parameters.append(parameter)
+
+    async def run(db: AsyncSession, **kwargs):
+        return await db.run_sync(lambda session: endpoint(db=session, **kwargs))
+
+    run.__signature__ = inspect.Signature(parameters)
+    run.__name__ = endpoint.__name__
+    run.__doc__ = endpoint.__doc__
+    return run
+
+
+def async_router(router: APIRouter) -> APIRouter:
+    """Copy of ``router`` whose ``db``-using endpoints run on ``get_async_db``."""
+    converted = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute) or "db" not in _parameters(route.endpoint):
+            converted.routes.append(route)
+            continue
+        converted.add_api_route(
+            route.path,
+            _async_endpoint(route.endpoint),
+            methods=list(route.methods),
+            response_model=route.response_model,
+            response_model_exclude_unset=route.response_model_exclude_unset,
+            status_code=route.status_code,
+            tags=route.tags,
+            summary=route.summary,
+            description=route.description,
+            name=route.name,
+        )
+    return converted
@@ -0,0 +1,115 @@
+"""Change sequence for incremental sync.
+
+Every flush that inserts, updates or deletes a tracked row appends
+``(entity, entity_id)`` to ``change_log`` in the same transaction. Clients
+remember the latest ``seq`` and ask for what changed after it; a row that no
+longer exists was deleted. Bulk ``Query.update``/``Query.delete`` bypass this
+hook, so tracked tables must be written through the ORM or followed by
+``record_change`` (``reset_marker`` covers ``/reset``). ``prune_changes``
+keeps the log to the newest ``CHANGE_LOG_KEEP`` rows; a client whose ``seq``
+is older than that must reload.
+"""
+
+from __future__ import annotations
+
+import os
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from .models import ChangeLog, Egg, MarketListing, Pet, Player
+
+TRACKED = {Pet: "pet", Egg: "egg", Player: "player", MarketListing: "listing"}
+RESET = "reset"
+PRUNED = "pruned"
+CHANGE_LOG_KEEP = int(os.getenv("CHANGE_LOG_KEEP", "100000"))
+
+
+@event.listens_for(Session, "after_flush")
+def _record_changes(session: Session, _flush_context) -> None:
+    changed = []
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        entity = TRACKED.get(type(instance))
+        if entity is None:
+            continue
+        if instance in session.dirty and not session.is_modified(instance):
+            continue
+        changed.append({"entity": entity, "entity_id": instance.id})
+    if changed:
+        session.connection().execute(insert(ChangeLog), changed)
+
+
+def current_seq(db: Session) -> int:
+    return db.scalar(select(func.max(ChangeLog.seq))) or 0
+
+
+def entity_version(db: Session, entity: str) -> int:
+    """Latest ``seq`` that wrote ``entity``; a per-table version counter."""
+    return db.scalar(select(func.max(ChangeLog.seq)).where(ChangeLog.entity == entity)) or 0
+
+
+def record_change(db: Session, entity: str, entity_id: int) -> int:
+    """Log a write made outside the ORM flush; returns its ``seq``."""
+    return db.execute(
+        insert(ChangeLog).values(entity=entity, entity_id=entity_id).returning(ChangeLog.seq)
+    ).scalar_one()
+
+
+def record_changes(db: Session, entity: str, entity_ids: list[int]) -> None:
+    """``record_change`` for many rows at once, as one executemany."""
+    if entity_ids:
+        db.execute(insert(ChangeLog), [{"entity": entity, "entity_id": i} for i in entity_ids])
+
+
+def reset_marker(db: Session) -> None:
+    """Record a wipe that the change log cannot describe row by row."""
+    db.add(ChangeLog(entity=RESET, entity_id=0))
+
+
+def pruned_seq(db: Session) -> int:
+    """Highest ``seq`` that ``prune_changes`` may have deleted (0 if none)."""
+    return (
+        db.scalar(
+            select(ChangeLog.entity_id)
+            .where(ChangeLog.entity == PRUNED)
+            .order_by(ChangeLog.seq.desc())
+            .limit(1)
+        )
+        or 0
+    )
+
+
+def prune_changes(db: Session, keep: int = CHANGE_LOG_KEEP) -> int:
+    """Delete all but the newest ``keep`` rows; returns how many went.
+
+    The newest row of each entity stays so ``entity_version`` never moves
+    back, and a ``pruned`` row records the cut for ``changed_since``.
+    """
+    floor = current_seq(db) - keep
+    if floor <= pruned_seq(db):
+        return 0
+    latest = select(func.max(ChangeLog.seq)).group_by(ChangeLog.entity)
+    deleted = db.execute(
+        delete(ChangeLog)
+        .where(ChangeLog.seq <= floor, ChangeLog.seq.not_in(latest))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if deleted:
+        db.add(ChangeLog(entity=PRUNED, entity_id=floor))
+    return deleted
+
+
+def changed_since(db: Session, since: int) -> tuple[dict[str, set[int]], bool]:
+    """Ids per entity changed after ``since``, and whether the client must reload.
+
+    It must after a reset, or when ``since`` predates rows ``prune_changes`` removed.
+    """
+    changed: dict[str, set[int]] = {entity: set() for entity in TRACKED.values()}
+    reset = since < pruned_seq(db)
+    rows = db.execute(select(ChangeLog.entity, ChangeLog.entity_id).where(ChangeLog.seq > since))
+    for entity, entity_id in rows:
+        if entity == RESET:
+            reset = True
+        elif entity != PRUNED:
+            changed[entity].add(entity_id)
+    return changed, reset
@@ -1,14 +1,120 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+import os
+
+from functools import lru_cache
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./pets.db")
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+# Idle SQLite connections kept open; one per uvicorn threadpool worker.
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "40"))
+# Rows sampled per index by the startup ANALYZE; 0 reads whole tables.
+SQLITE_ANALYSIS_LIMIT = int(os.getenv("SQLITE_ANALYSIS_LIMIT", "1000"))
+# "sync" serves routes from the threadpool; "async" runs them on the event
+# loop over ASYNC_DATABASE_URL (aiosqlite for SQLite URLs).
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+# Applied to every new SQLite connection. WAL lets readers run while a write
+# is in progress; NORMAL sync is durable across app crashes in WAL mode.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    # Negative cache_size is in KiB.
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(128 * 1024 * 1024))),
+}
+
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.drivername == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+
+def _pool_args() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def _sqlite_pool_args(url: str) -> dict:
+    parsed = make_url(url)
+    if parsed.database in (None, "", ":memory:"):
+        # In-memory databases use a single shared connection.
+        return {}
+    # No overflow limit: a sync request keeps its connection while FastAPI
+    # serializes the response in the threadpool, so with a capped pool every
+    # worker can end up waiting for a connection that only a worker can free.
+    is_async = parsed.get_driver_name() == "aiosqlite"
+    return {
+        "poolclass": AsyncAdaptedQueuePool if is_async else QueuePool,
+        "pool_size": SQLITE_POOL_SIZE,
+        "max_overflow": -1,
+    }
+
+
+def _apply_pragmas(engine: Engine, pragmas: dict | None) -> None:
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
 
-DATABASE_URL = "sqlite:///./pets.db"
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, _record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-)
+
+def create_db_engine(url: str = DATABASE_URL, pragmas: dict | None = None) -> Engine:
+    """Engine for ``url`` with pool settings, plus ``pragmas`` on SQLite.
+
+    ``pragmas`` defaults to ``SQLITE_PRAGMAS``; pass ``{}`` for SQLite's own
+    defaults.
+    """
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_engine(url, echo=DB_ECHO, **_pool_args())
+
+    engine = create_engine(
+        url,
+        echo=DB_ECHO,
+        connect_args={"check_same_thread": False},
+        **_sqlite_pool_args(url),
+    )
+    _apply_pragmas(engine, pragmas)
+    return engine
+
+
+def create_async_db_engine(
+    url: str = ASYNC_DATABASE_URL, pragmas: dict | None = None
+) -> AsyncEngine:
+    """``create_db_engine`` for an async driver URL (``sqlite+aiosqlite://...``)."""
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_async_engine(url, echo=DB_ECHO, **_pool_args())
+
+    engine = create_async_engine(url, echo=DB_ECHO, **_sqlite_pool_args(url))
+    _apply_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 
@@ -18,8 +124,16 @@ class Base(DeclarativeBase):
 
 def init_db() -> None:
     from . import models  # noqa: F401
+    from .migrations import run_migrations
 
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    if engine.dialect.name == "sqlite":
+        # Row statistics let the planner choose among the order book indexes,
+        # e.g. a price range over the id index for ``min_price`` by age.
+        with engine.begin() as connection:
+            connection.exec_driver_sql(f"PRAGMA analysis_limit={SQLITE_ANALYSIS_LIMIT}")
+            connection.exec_driver_sql("ANALYZE market_listings")
 
 
 def get_db():
@@ -28,3 +142,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+@lru_cache(maxsize=1)
+def async_session_factory() -> async_sessionmaker:
+    """Built on first use so sync mode never imports the async driver."""
+    return async_sessionmaker(bind=create_async_db_engine(), autoflush=False)
+
+
+async def get_async_db():
+    async with async_session_factory()() as db:
+        yield db
@@ -0,0 +1,37 @@
+"""Conditional GETs for polled reads.
+
+ETags are built from version counters the route reads anyway (the change log
+``seq``, the emotion epoch, ...), never by hashing the body, so a request whose
+``If-None-Match`` still matches is answered ``304`` before any rows load.
+``Cache-Control: no-cache`` makes browsers revalidate every poll; ``fetch``
+sends the stored tag and hands a ``304`` back as the cached ``200``.
+"""
+
+from __future__ import annotations
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+
+def make_etag(*parts: object) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an ``If-None-Match`` header lists ``etag`` (or is ``*``)."""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=_headers(etag))
+
+
+def tagged(content, etag: str) -> ORJSONResponse:
+    return ORJSONResponse(content, headers=_headers(etag))
@@ -0,0 +1,203 @@
+"""In-process pub/sub behind the ``/events`` stream.
+
+Committed ORM writes are turned into typed events (``egg_created``,
+``egg_hatched``, ``pet_listed``, ``pet_sold``, ``gold_changed``, ...) and fanned
+out to one bounded queue per subscriber. ``egg_ready`` and ``emotion_epoch``
+are not writes: they are timed with ``loop.call_later``, at each incubating
+egg's ``hatch_at`` and at each emotion window boundary.
+
+Route handlers run in the threadpool, so ``publish`` hands events to the
+event loop with ``call_soon_threadsafe``; everything else runs on the loop.
+A subscriber whose queue fills up is dropped with a ``resync`` event and
+should reload through ``/state``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .genetics.emotions import emotion_epoch, next_emotion_epoch_at
+from .models import Egg, MarketListing, Pet, Player
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+
+PENDING_KEY = "pending_events"
+
+
+class EventBus:
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE) -> None:
+        self.queue_size = queue_size
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._subscribers: set[asyncio.Queue] = set()
+        self._ready_timers: dict[int, asyncio.TimerHandle] = {}
+        self._epoch_timer: asyncio.TimerHandle | None = None
+        self._ids = itertools.count(1)
+        self._listeners: list[Callable[[str, dict], None]] = []
+
+    def start(self, incubating: list[tuple[int, datetime]]) -> None:
+        """Bind to the running loop and time ``egg_ready`` for ``incubating`` eggs."""
+        self._loop = asyncio.get_running_loop()
+        for egg_id, hatch_at in incubating:
+            self._schedule_ready(egg_id, hatch_at)
+        self._schedule_epoch()
+
+    def stop(self) -> None:
+        if self._epoch_timer:
+            self._epoch_timer.cancel()
+            self._epoch_timer = None
+        for timer in self._ready_timers.values():
+            timer.cancel()
+        self._ready_timers.clear()
+        for queue in self._subscribers:
+            self._close(queue)
+        self._subscribers.clear()
+        self._loop = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def add_listener(self, listener: Callable[[str, dict], None]) -> None:
+        """Call ``listener(type, data)`` on the loop for each published event."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, dict], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def publish(self, events: list[tuple[str, dict]]) -> None:
+        """Deliver ``(type, data)`` events; safe to call from any thread."""
+        loop = self._loop
+        if loop is None or not events:
+            return
+        try:
+            loop.call_soon_threadsafe(self._dispatch, events)
+        except RuntimeError:
+            # The loop closed during shutdown.
+            pass
+
+    def _dispatch(self, events: list[tuple[str, dict]]) -> None:
+        for kind, data in events:
+            if kind == "egg_created":
+                self._schedule_ready(data["egg_id"], datetime.fromisoformat(data["hatch_at"]))
+            elif kind == "egg_hatched":
+                timer = self._ready_timers.pop(data["egg_id"], None)
+                if timer:
+                    timer.cancel()
+            elif kind == "reset":
+                for timer in self._ready_timers.values():
+                    timer.cancel()
+                self._ready_timers.clear()
+            for listener in self._listeners:
+                listener(kind, data)
+            self._fan_out((next(self._ids), kind, data))
+
+    def _fan_out(self, item: tuple[int, str, dict]) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                self._subscribers.discard(queue)
+                self._close(queue, resync=True)
+
+    def _close(self, queue: asyncio.Queue, resync: bool = False) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        if resync:
+            queue.put_nowait((next(self._ids), "resync", {}))
+        queue.put_nowait(None)
+
+    def _schedule_ready(self, egg_id: int, hatch_at: datetime) -> None:
+        delay = (hatch_at - datetime.utcnow()).total_seconds()
+        if delay <= 0 or self._loop is None:
+            return
+        self._ready_timers[egg_id] = self._loop.call_later(delay, self._egg_ready, egg_id)
+
+    def _schedule_epoch(self) -> None:
+        delay = (next_emotion_epoch_at(datetime.utcnow()) - datetime.utcnow()).total_seconds()
+        self._epoch_timer = self._loop.call_later(max(delay, 0), self._emotion_epoch)
+
+    def _emotion_epoch(self) -> None:
+        # Computed emotions change for every pet at once; clients reload pets.
+        epoch = emotion_epoch(datetime.utcnow())
+        self._fan_out((next(self._ids), "emotion_epoch", {"epoch": epoch}))
+        self._schedule_epoch()
+
+    def _egg_ready(self, egg_id: int) -> None:
+        self._ready_timers.pop(egg_id, None)
+        self._fan_out((next(self._ids), "egg_ready", {"egg_id": egg_id}))
+
+
+bus = EventBus()
+
+
+def queue_event(db: Session, kind: str, data: dict | None = None) -> None:
+    """Publish ``kind`` once ``db`` commits; for writes the flush hook cannot see."""
+    db.info.setdefault(PENDING_KEY, []).append((kind, data or {}))
+
+
+def _changed(instance, attribute: str) -> bool:
+    return inspect(instance).attrs[attribute].history.has_changes()
+
+
+def _write_events(instance, new: bool, deleted: bool) -> list[tuple[str, dict]]:
+    if isinstance(instance, Egg):
+        if new:
+            hatch_at = instance.hatch_at.isoformat()
+            return [("egg_created", {"egg_id": instance.id, "hatch_at": hatch_at})]
+        if not deleted and instance.status == "Hatched" and _changed(instance, "status"):
+            return [("egg_hatched", {"egg_id": instance.id, "pet_id": instance.hatched_pet_id})]
+    elif isinstance(instance, Pet):
+        if deleted:
+            return [("pet_sold", {"pet_id": instance.id, "listing_id": None})]
+        if not new and _changed(instance, "emotion_override_until"):
+            return [("emotion_changed", {"pet_id": instance.id, "emotion": instance.emotion})]
+    elif isinstance(instance, Player):
+        if not deleted and _changed(instance, "gold"):
+            return [("gold_changed", {"gold": instance.gold})]
+    elif isinstance(instance, MarketListing):
+        listing = {"listing_id": instance.id, "pet_id": instance.pet_id}
+        if new:
+            return [("pet_listed", {**listing, "price": instance.price})]
+        if not deleted and _changed(instance, "status"):
+            if instance.status == "Sold":
+                return [("pet_sold", listing)]
+            if instance.status == "Cancelled":
+                return [("listing_cancelled", listing)]
+    return []
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session: Session, _flush_context) -> None:
+    pending = session.info.setdefault(PENDING_KEY, [])
+    for instance in session.new:
+        pending.extend(_write_events(instance, new=True, deleted=False))
+    for instance in session.dirty:
+        pending.extend(_write_events(instance, new=False, deleted=False))
+    for instance in session.deleted:
+        pending.extend(_write_events(instance, new=False, deleted=True))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session: Session) -> None:
+    bus.publish(session.info.pop(PENDING_KEY, []))
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_events(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
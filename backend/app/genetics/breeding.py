@@ -2,149 +2,229 @@ from __future__ import annotations
 
 import os
 import random
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Tuple
 
-from .genome import LOCI, RARE_ALLELES, choose_mutation_allele
+from .genome import (
+    ALLELE_TABLE,
+    GENOME_WIDTH,
+    LOCI,
+    LOCUS_INDEX,
+    MUTATION_CODES,
+    RARE_ALLELES,
+    allele_code,
+    decode_genome,
+    encode_genome,
+    encode_phenotype,
+)
+from .sampling import ImportanceWeight, roll
 
 BASE_MUTATION_CHANCE = 0.10
 ELEMENT_CLASH_BONUS = 0.10
 RARE_STABILIZE_MULT = 0.5
 TOP_RARE_STABILIZE_MULT = 0.3
 MUTATION_TUNE_MULTIPLIER = float(os.getenv("BREEDING_MUTATION_MULTIPLIER", "1.0"))
+FORCED_RARE_CHANCE = 0.002
+FORCED_RARE_LOCI = ["Aura", "Accessory", "EyeColor"]
+OPPOSITE_ELEMENTS = [{"Fire", "Water"}, {"Wind", "Earth"}]
+STABILIZING_LOCI = ["Accessory", "Aura", "EyeColor"]
+
+_SPECIES = LOCUS_INDEX["Species"]
+_ELEMENT = LOCUS_INDEX["Element"]
+_AURA = LOCUS_INDEX["Aura"]
+_EYE_COLOR = LOCUS_INDEX["EyeColor"]
+_OPPOSITE_ELEMENTS = [
+    {allele_code("Element", element) for element in pair} for pair in OPPOSITE_ELEMENTS
+]
+_RARE_CODES = [
+    (LOCUS_INDEX[locus], {allele_code(locus, a) for a in RARE_ALLELES[locus]})
+    for locus in STABILIZING_LOCI
+]
+_PRISMATIC = allele_code("Aura", "Prismatic")
+_VOID = allele_code("EyeColor", "Void")
+_FORCED_RARE_TARGETS = {
+    locus: (LOCUS_INDEX[locus], [allele_code(locus, a) for a in RARE_ALLELES[locus]])
+    for locus in FORCED_RARE_LOCI
+}
+
+
+# Special crosses roll once against cumulative thresholds. Any other cross keeps
+# a parent's species below CROSS_HYBRID_THRESHOLD and yields a Hybrid above it.
+SPECIES_CROSSES = {
+    frozenset({"Slime", "Spirit"}): [(0.70, "Slime"), (0.95, "Spirit"), (1.0, "Hybrid")],
+    frozenset({"Dragon", "Spirit"}): [(0.60, "Dragon"), (0.90, "Spirit"), (1.0, "Mythic")],
+}
+CROSS_HYBRID_THRESHOLD = 0.90
 
 
 def choose_species(parent_a: str, parent_b: str, rng: random.Random) -> str:
     if parent_a == parent_b:
         return parent_a
 
-    pair = {parent_a, parent_b}
-    if pair == {"Slime", "Spirit"}:
+    cross = SPECIES_CROSSES.get(frozenset((parent_a, parent_b)))
+    if cross:
         roll = rng.random()
-        if roll < 0.70:
-            return "Slime"
-        if roll < 0.95:
-            return "Spirit"
-        return "Hybrid"
-
-    if pair == {"Dragon", "Spirit"}:
-        roll = rng.random()
-        if roll < 0.60:
-            return "Dragon"
-        if roll < 0.90:
-            return "Spirit"
-        return "Mythic"
+        for threshold, species in cross:
+            if roll < threshold:
+                return species
+        return cross[-1][1]
 
     roll = rng.random()
-    if roll < 0.90:
+    if roll < CROSS_HYBRID_THRESHOLD:
         return rng.choice([parent_a, parent_b])
     return "Hybrid"
 
 
+def species_distribution(parent_a: str, parent_b: str) -> dict[str, float]:
+    """Exact outcome probabilities of ``choose_species`` for a pair."""
+    if parent_a == parent_b:
+        return {parent_a: 1.0}
+
+    cross = SPECIES_CROSSES.get(frozenset((parent_a, parent_b)))
+    if cross:
+        distribution: dict[str, float] = {}
+        previous = 0.0
+        for threshold, species in cross:
+            distribution[species] = distribution.get(species, 0.0) + threshold - previous
+            previous = threshold
+        return distribution
+
+    keep = CROSS_HYBRID_THRESHOLD / 2
+    return {parent_a: keep, parent_b: keep, "Hybrid": 1.0 - CROSS_HYBRID_THRESHOLD}
+
+
 def breed(
     parent_a_genome: dict,
     parent_b_genome: dict,
     parent_a_phenotype: dict,
     parent_b_phenotype: dict,
     rng: random.Random,
+    importance: ImportanceWeight | None = None,
 ) -> Tuple[dict, bool]:
-    child_genome = {}
-
-    species = choose_species(
-        parent_a_phenotype.get("Species", "Slime"),
-        parent_b_phenotype.get("Species", "Slime"),
+    child_genome, mutated = breed_encoded(
+        encode_genome(parent_a_genome),
+        encode_genome(parent_b_genome),
+        encode_phenotype(parent_a_phenotype),
+        encode_phenotype(parent_b_phenotype),
         rng,
+        importance,
     )
-
-    for locus in LOCI:
-        if locus == "Species":
-            child_genome[locus] = [species, species]
+    return decode_genome(child_genome), mutated
+
+
+@dataclass(frozen=True, slots=True)
+class BreedingPlan:
+    """Everything ``breed_encoded`` needs for one ordered parent pair.
+
+    ``loci`` holds ``(start, fixed, parent_alleles, other_parent_alleles,
+    mutation_candidates)`` per non-species locus; ``fixed`` is set when both
+    parents carry a single allele and no roll is needed.
+    """
+
+    species_a: str
+    species_b: str
+    mutation_chance: float
+    parent_share: float
+    loci: tuple[tuple[int, int | None, bytes, bytes, tuple[int, ...]], ...]
+
+
+@lru_cache(maxsize=4096)
+def breeding_plan(
+    parent_a_genome: bytes,
+    parent_b_genome: bytes,
+    parent_a_phenotype: bytes,
+    parent_b_phenotype: bytes,
+) -> BreedingPlan:
+    species_names = ALLELE_TABLE["Species"]
+    species_a = species_names[parent_a_phenotype[_SPECIES]]
+    species_b = species_names[parent_b_phenotype[_SPECIES]]
+    mutation_chance = pair_mutation_chance(parent_a_phenotype, parent_b_phenotype)
+
+    loci = []
+    for index in range(len(LOCI)):
+        if index == _SPECIES:
             continue
-        allele_a = _inherit_with_weight(
-            rng,
-            locus,
-            parent_a_genome[locus],
-            parent_b_genome[locus],
-            parent_a_phenotype,
-            parent_b_phenotype,
-        )
-        allele_b = _inherit_with_weight(
-            rng,
-            locus,
-            parent_a_genome[locus],
-            parent_b_genome[locus],
-            parent_a_phenotype,
-            parent_b_phenotype,
-        )
-        child_genome[locus] = [allele_a, allele_b]
-
-    mutated = False
-    if rng.random() < 0.002:
-        mutated = True
-        target = rng.choice(["Aura", "Accessory", "EyeColor"])
-        rare_allele = rng.choice(RARE_ALLELES[target])
-        child_genome[target] = [rare_allele, rare_allele]
-
-    return child_genome, mutated
+        start = index * 2
+        parent_alleles = parent_a_genome[start : start + 2]
+        other_parent_alleles = parent_b_genome[start : start + 2]
+        combined = set(parent_alleles) | set(other_parent_alleles)
+        fixed = next(iter(combined)) if len(combined) == 1 else None
+        candidates = [c for c in MUTATION_CODES[index] if c not in combined]
+        if not candidates:
+            candidates = MUTATION_CODES[index]
+        loci.append((start, fixed, parent_alleles, other_parent_alleles, tuple(candidates)))
+
+    return BreedingPlan(
+        species_a=species_a,
+        species_b=species_b,
+        mutation_chance=mutation_chance,
+        parent_share=(1 - mutation_chance) / 2,
+        loci=tuple(loci),
+    )
 
 
-def _inherit_with_weight(
+def breed_encoded(
+    parent_a_genome: bytes,
+    parent_b_genome: bytes,
+    parent_a_phenotype: bytes,
+    parent_b_phenotype: bytes,
     rng: random.Random,
-    locus: str,
-    parent_alleles: list[str],
-    other_parent_alleles: list[str],
-    parent_a_phenotype: dict,
-    parent_b_phenotype: dict,
-) -> str:
-    combined = set(parent_alleles) | set(other_parent_alleles)
-    if len(combined) == 1:
-        return next(iter(combined))
+    importance: ImportanceWeight | None = None,
+) -> Tuple[bytes, bool]:
+    """Compact-form breed; consumes ``rng`` exactly like the dict-based API.
+
+    With ``importance``, the forced rare roll is named ``"forced_rare"``.
+    """
+    plan = breeding_plan(parent_a_genome, parent_b_genome, parent_a_phenotype, parent_b_phenotype)
+    species = choose_species(plan.species_a, plan.species_b, rng)
+    species_code = allele_code("Species", species)
+
+    child = bytearray(GENOME_WIDTH)
+    child[_SPECIES * 2] = child[_SPECIES * 2 + 1] = species_code
+
+    # Weighted inheritance: mutate, else take an allele from one parent.
+    mutation_chance = plan.mutation_chance
+    parent_share = plan.parent_share
+    for start, fixed, parent_alleles, other_parent_alleles, candidates in plan.loci:
+        if fixed is not None:
+            child[start] = child[start + 1] = fixed
+            continue
+        for position in (start, start + 1):
+            if rng.random() < mutation_chance:
+                child[position] = rng.choice(candidates)
+            elif rng.random() < parent_share:
+                child[position] = rng.choice(parent_alleles)
+            else:
+                child[position] = rng.choice(other_parent_alleles)
 
-    mutation_chance = _mutation_chance(locus, parent_a_phenotype, parent_b_phenotype)
-    roll = rng.random()
-    if roll < mutation_chance:
-        exclude = set(parent_alleles) | set(other_parent_alleles)
-        return choose_mutation_allele(rng, locus, exclude)
+    mutated = False
+    if roll(rng, "forced_rare", FORCED_RARE_CHANCE, importance):
+        mutated = True
+        index, rare_codes = _FORCED_RARE_TARGETS[rng.choice(FORCED_RARE_LOCI)]
+        rare_code = rng.choice(rare_codes)
+        child[index * 2] = child[index * 2 + 1] = rare_code
 
-    parent_share = (1 - mutation_chance) / 2
-    roll = rng.random()
-    if roll < parent_share:
-        return rng.choice(parent_alleles)
-    return rng.choice(other_parent_alleles)
+    return bytes(child), mutated
 
 
-def _mutation_chance(locus: str, parent_a_phenotype: dict, parent_b_phenotype: dict) -> float:
+def pair_mutation_chance(parent_a_phenotype: bytes, parent_b_phenotype: bytes) -> float:
     base = BASE_MUTATION_CHANCE
-    _ = locus
-
-    opposites = [{"Fire", "Water"}, {"Wind", "Earth"}]
-    pair = {
-        parent_a_phenotype.get("Element", ""),
-        parent_b_phenotype.get("Element", ""),
-    }
-    if pair in opposites:
+
+    pair = {parent_a_phenotype[_ELEMENT], parent_b_phenotype[_ELEMENT]}
+    if pair in _OPPOSITE_ELEMENTS:
         base += ELEMENT_CLASH_BONUS
 
-    rare_values = {
-        "Accessory": RARE_ALLELES.get("Accessory", []),
-        "Aura": RARE_ALLELES.get("Aura", []),
-        "EyeColor": RARE_ALLELES.get("EyeColor", []),
-    }
     if any(
-        parent_a_phenotype.get(locus) in values or parent_b_phenotype.get(locus) in values
-        for locus, values in rare_values.items()
+        parent_a_phenotype[index] in codes or parent_b_phenotype[index] in codes
+        for index, codes in _RARE_CODES
     ):
         base *= RARE_STABILIZE_MULT
 
-    if (
-        parent_a_phenotype.get("Aura") == "Prismatic"
-        or parent_b_phenotype.get("Aura") == "Prismatic"
-    ):
+    if _PRISMATIC in (parent_a_phenotype[_AURA], parent_b_phenotype[_AURA]):
         base *= TOP_RARE_STABILIZE_MULT
 
-    if (
-        parent_a_phenotype.get("EyeColor") == "Void"
-        or parent_b_phenotype.get("EyeColor") == "Void"
-    ):
+    if _VOID in (parent_a_phenotype[_EYE_COLOR], parent_b_phenotype[_EYE_COLOR]):
         base *= TOP_RARE_STABILIZE_MULT
 
     base *= MUTATION_TUNE_MULTIPLIER
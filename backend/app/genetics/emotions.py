@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import os
 import random
 from datetime import datetime, timedelta
 
@@ -13,6 +15,8 @@ PERSONALITY_WEIGHTS = {
 }
 
 EMOTION_COOLDOWN = timedelta(minutes=10)
+EMOTION_SEED = int(os.getenv("EMOTION_SEED", "0"))
+_EPOCH_START = datetime(1970, 1, 1)
 
 
 def pick_emotion(rng: random.Random, personality: str) -> str:
@@ -29,5 +33,33 @@ def pick_emotion(rng: random.Random, personality: str) -> str:
     return rng.choice(EMOTIONS)
 
 
-def should_update_emotion(last_updated: datetime, now: datetime) -> bool:
-    return now - last_updated >= EMOTION_COOLDOWN
+def emotion_epoch(now: datetime) -> int:
+    """Index of the ``EMOTION_COOLDOWN`` window containing ``now`` (naive UTC)."""
+    return (now - _EPOCH_START) // EMOTION_COOLDOWN
+
+
+def next_emotion_epoch_at(now: datetime) -> datetime:
+    return _EPOCH_START + (emotion_epoch(now) + 1) * EMOTION_COOLDOWN
+
+
+def emotion_at(pet_id: int, personality: str, now: datetime, seed: int = EMOTION_SEED) -> str:
+    """The emotion a pet shows during ``now``'s window.
+
+    A pure function of its inputs, so every worker agrees without storing it.
+    """
+    key = f"{seed}:{pet_id}:{emotion_epoch(now)}".encode()
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return pick_emotion(random.Random(int.from_bytes(digest, "big")), personality)
+
+
+def current_emotion(
+    pet_id: int,
+    personality: str,
+    override: str | None,
+    override_until: datetime | None,
+    now: datetime,
+) -> str:
+    """A bought override until it expires, otherwise ``emotion_at``."""
+    if override_until is not None and now < override_until:
+        return override
+    return emotion_at(pet_id, personality, now)
@@ -47,6 +47,11 @@ RARE_ALLELES: Dict[str, List[str]] = {
     "EyeColor": ["Void"],
 }
 
+# Species that only appear through cross-breeding (see breeding.choose_species).
+BRED_ALLELES: Dict[str, List[str]] = {
+    "Species": ["Hybrid", "Mythic"],
+}
+
 HIDDEN_CANDIDATES = [
     "Aura",
     "Accessory",
@@ -58,6 +63,77 @@ HIDDEN_CANDIDATES = [
 ]
 
 
+def _allele_table(locus: str) -> list[str]:
+    table: list[str] = []
+    for group in (COMMON_ALLELES, RARE_ALLELES, BRED_ALLELES):
+        for allele in group.get(locus, []):
+            if allele not in table:
+                table.append(allele)
+    return table
+
+
+# Compact encoding: every allele is a small integer indexing ALLELE_TABLE[locus],
+# a genome is GENOME_WIDTH bytes (two per locus, in LOCI order) and a phenotype
+# is PHENOTYPE_WIDTH bytes (one per locus).
+ALLELE_TABLE: Dict[str, List[str]] = {locus: _allele_table(locus) for locus in LOCI}
+ALLELE_CODES: Dict[str, Dict[str, int]] = {
+    locus: {allele: code for code, allele in enumerate(alleles)}
+    for locus, alleles in ALLELE_TABLE.items()
+}
+LOCUS_INDEX: Dict[str, int] = {locus: index for index, locus in enumerate(LOCI)}
+GENOME_WIDTH = len(LOCI) * 2
+PHENOTYPE_WIDTH = len(LOCI)
+
+# Per-locus codes drawn by random_genome (duplicates kept so odds match).
+_COMMON_CODES = [[ALLELE_CODES[locus][a] for a in COMMON_ALLELES[locus]] for locus in LOCI]
+
+
+def allele_code(locus: str, allele: str) -> int:
+    try:
+        return ALLELE_CODES[locus][allele]
+    except KeyError:
+        raise ValueError(f"Unknown allele {allele!r} for locus {locus!r}.") from None
+
+
+def encode_genome(genome: dict) -> bytes:
+    data = bytearray(GENOME_WIDTH)
+    for index, locus in enumerate(LOCI):
+        allele_a, allele_b = genome[locus]
+        data[index * 2] = allele_code(locus, allele_a)
+        data[index * 2 + 1] = allele_code(locus, allele_b)
+    return bytes(data)
+
+
+def decode_genome(data: bytes) -> dict:
+    if len(data) != GENOME_WIDTH:
+        raise ValueError(f"Encoded genome must be {GENOME_WIDTH} bytes, got {len(data)}.")
+    genome = {}
+    for index, locus in enumerate(LOCI):
+        alleles = ALLELE_TABLE[locus]
+        genome[locus] = [alleles[data[index * 2]], alleles[data[index * 2 + 1]]]
+    return genome
+
+
+def encode_phenotype(phenotype: dict) -> bytes:
+    return bytes(allele_code(locus, phenotype[locus]) for locus in LOCI)
+
+
+def decode_phenotype(data: bytes) -> dict:
+    if len(data) != PHENOTYPE_WIDTH:
+        raise ValueError(
+            f"Encoded phenotype must be {PHENOTYPE_WIDTH} bytes, got {len(data)}."
+        )
+    return {locus: ALLELE_TABLE[locus][code] for locus, code in zip(LOCI, data)}
+
+
+def random_genome_encoded(rng: random.Random) -> bytes:
+    data = bytearray(GENOME_WIDTH)
+    for index, codes in enumerate(_COMMON_CODES):
+        data[index * 2] = rng.choice(codes)
+        data[index * 2 + 1] = rng.choice(codes)
+    return bytes(data)
+
+
 def random_genome(rng: random.Random) -> dict:
     genome = {}
     for locus in LOCI:
@@ -83,6 +159,12 @@ def choose_mutation_allele(rng: random.Random, locus: str, exclude: set[str]) ->
     return rng.choice(candidates)
 
 
+# Sorted per-locus candidates mirroring get_locus_alleles, as codes.
+MUTATION_CODES = [
+    [ALLELE_CODES[locus][a] for a in get_locus_alleles(locus)] for locus in LOCI
+]
+
+
 def choose_hidden_loci(rng: random.Random, count: int = 3) -> list[str]:
     count = min(count, len(HIDDEN_CANDIDATES))
     return rng.sample(HIDDEN_CANDIDATES, k=count)
@@ -0,0 +1,173 @@
+"""Exact offspring odds for a parent pair, without sampling ``breed``.
+
+Loci are inherited independently once the pair's mutation chance is fixed, so
+the child phenotype distribution factorizes per locus. The forced rare
+mutation is a mixture component that pins one locus to a rare allele.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from itertools import product
+
+from .breeding import (
+    FORCED_RARE_CHANCE,
+    FORCED_RARE_LOCI,
+    pair_mutation_chance,
+    species_distribution,
+)
+from .genome import (
+    ALLELE_TABLE,
+    LOCI,
+    LOCUS_INDEX,
+    MUTATION_CODES,
+    PHENOTYPE_WIDTH,
+    RARE_ALLELES,
+    allele_code,
+)
+from .phenotype import DOMINANT_CODES, genome_to_phenotype_encoded
+from .rarity import (
+    RARITY_LOCI,
+    TIER_ORDER,
+    hatch_reward,
+    rarity_classes,
+    rarity_profile_encoded,
+)
+
+Distribution = dict[int, float]
+
+_SPECIES = LOCUS_INDEX["Species"]
+_RARITY_COLUMNS = [LOCUS_INDEX[locus] for locus in RARITY_LOCI]
+
+
+_RARITY_CLASSES = [rarity_classes(locus) for locus in RARITY_LOCI]
+
+
+def allele_distribution(
+    locus_index: int,
+    parent_alleles: bytes,
+    other_parent_alleles: bytes,
+    mutation_chance: float,
+) -> Distribution:
+    """Probability of each allele code from one inherited draw in ``breed``."""
+    combined = set(parent_alleles) | set(other_parent_alleles)
+    if len(combined) == 1:
+        return {next(iter(combined)): 1.0}
+
+    distribution: Distribution = {}
+    candidates = [c for c in MUTATION_CODES[locus_index] if c not in combined]
+    if not candidates:
+        candidates = MUTATION_CODES[locus_index]
+    for code in candidates:
+        distribution[code] = distribution.get(code, 0.0) + mutation_chance / len(candidates)
+
+    # The parent roll only happens once the mutation roll has missed.
+    parent_share = (1 - mutation_chance) * (1 - mutation_chance) / 2
+    other_share = 1 - mutation_chance - parent_share
+    for code in parent_alleles:
+        distribution[code] = distribution.get(code, 0.0) + parent_share / 2
+    for code in other_parent_alleles:
+        distribution[code] = distribution.get(code, 0.0) + other_share / 2
+    return distribution
+
+
+def _expressed(locus_index: int, alleles: Distribution) -> Distribution:
+    table = DOMINANT_CODES[locus_index]
+    distribution: Distribution = {}
+    for code_a, p_a in alleles.items():
+        for code_b, p_b in alleles.items():
+            expressed = table[code_a][code_b]
+            distribution[expressed] = distribution.get(expressed, 0.0) + p_a * p_b
+    return distribution
+
+
+def _rarity_distribution(phenotypes: list[Distribution]) -> dict[tuple[int, str], float]:
+    """Joint (score, tier) odds over rarity loci, collapsing equivalent alleles."""
+    collapsed = []
+    for column, classes in zip(_RARITY_COLUMNS, _RARITY_CLASSES):
+        merged: Distribution = {}
+        for code, p in phenotypes[column].items():
+            merged[classes[code]] = merged.get(classes[code], 0.0) + p
+        collapsed.append(list(merged.items()))
+
+    outcomes: dict[tuple[int, str], float] = {}
+    row = bytearray(PHENOTYPE_WIDTH)
+    for combination in product(*collapsed):
+        p = 1.0
+        for column, (code, p_code) in zip(_RARITY_COLUMNS, combination):
+            row[column] = code
+            p *= p_code
+        score, tier, _ = rarity_profile_encoded(bytes(row))
+        outcomes[(score, tier)] = outcomes.get((score, tier), 0.0) + p
+    return outcomes
+
+
+@lru_cache(maxsize=1024)
+def offspring_odds(parent_a_genome: bytes, parent_b_genome: bytes) -> dict:
+    """Exact child phenotype, rarity and hatch reward odds for encoded parents.
+
+    Parent order matters, as in ``breed``. Results are cached per pair; treat
+    the returned dict as read-only.
+    """
+    parent_a_phenotype = genome_to_phenotype_encoded(parent_a_genome)
+    parent_b_phenotype = genome_to_phenotype_encoded(parent_b_genome)
+    mutation_chance = pair_mutation_chance(parent_a_phenotype, parent_b_phenotype)
+
+    species_names = ALLELE_TABLE["Species"]
+    species = species_distribution(
+        species_names[parent_a_phenotype[_SPECIES]],
+        species_names[parent_b_phenotype[_SPECIES]],
+    )
+
+    inherited: list[Distribution] = []
+    for index in range(len(LOCI)):
+        if index == _SPECIES:
+            inherited.append({allele_code("Species", name): p for name, p in species.items()})
+            continue
+        start = index * 2
+        alleles = allele_distribution(
+            index,
+            parent_a_genome[start : start + 2],
+            parent_b_genome[start : start + 2],
+            mutation_chance,
+        )
+        inherited.append(_expressed(index, alleles))
+
+    # Mixture: no forced mutation, or one forced locus pinned to a rare allele.
+    components = [(1 - FORCED_RARE_CHANCE, inherited)]
+    for locus in FORCED_RARE_LOCI:
+        rare = RARE_ALLELES[locus]
+        pinned = list(inherited)
+        pinned[LOCUS_INDEX[locus]] = {allele_code(locus, a): 1 / len(rare) for a in rare}
+        components.append((FORCED_RARE_CHANCE / len(FORCED_RARE_LOCI), pinned))
+
+    phenotype: dict[str, dict[str, float]] = {locus: {} for locus in LOCI}
+    outcomes: dict[tuple[int, str], float] = {}
+    for weight, distributions in components:
+        for locus, distribution in zip(LOCI, distributions):
+            values = phenotype[locus]
+            for code, p in distribution.items():
+                allele = ALLELE_TABLE[locus][code]
+                values[allele] = values.get(allele, 0.0) + weight * p
+        for key, p in _rarity_distribution(distributions).items():
+            outcomes[key] = outcomes.get(key, 0.0) + weight * p
+
+    tiers = {tier: 0.0 for tier in TIER_ORDER}
+    scores: dict[int, float] = {}
+    rewards: dict[int, float] = {}
+    for (score, tier), p in sorted(outcomes.items()):
+        reward = hatch_reward(score, tier)
+        tiers[tier] += p
+        scores[score] = scores.get(score, 0.0) + p
+        rewards[reward] = rewards.get(reward, 0.0) + p
+
+    return {
+        "mutation_chance": mutation_chance,
+        "forced_rare_chance": FORCED_RARE_CHANCE,
+        "species": species,
+        "phenotype": phenotype,
+        "tiers": tiers,
+        "scores": scores,
+        "rewards": rewards,
+        "expected_reward": sum(reward * p for reward, p in rewards.items()),
+    }
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Dict
 
-from .genome import COMMON_ALLELES, LOCI
+from .genome import ALLELE_CODES, ALLELE_TABLE, COMMON_ALLELES, LOCI
 
 DOMINANCE: Dict[str, Dict[str, int]] = {}
 for locus, alleles in COMMON_ALLELES.items():
@@ -23,9 +23,26 @@ def _pick_dominant(locus: str, allele_a: str, allele_b: str) -> str:
     return allele_a if weight_a > weight_b else allele_b
 
 
+def _dominance_table(locus: str) -> list[list[int]]:
+    alleles = ALLELE_TABLE[locus]
+    codes = ALLELE_CODES[locus]
+    return [[codes[_pick_dominant(locus, a, b)] for b in alleles] for a in alleles]
+
+
+# DOMINANT_CODES[locus_index][code_a][code_b] -> expressed allele code.
+DOMINANT_CODES = [_dominance_table(locus) for locus in LOCI]
+
+
 def genome_to_phenotype(genome: dict) -> dict:
     phenotype: Dict[str, str] = {}
     for locus in LOCI:
         alleles = genome[locus]
         phenotype[locus] = _pick_dominant(locus, alleles[0], alleles[1])
     return phenotype
+
+
+def genome_to_phenotype_encoded(genome: bytes) -> bytes:
+    return bytes(
+        table[genome[index * 2]][genome[index * 2 + 1]]
+        for index, table in enumerate(DOMINANT_CODES)
+    )
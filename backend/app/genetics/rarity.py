@@ -1,5 +1,14 @@
 from __future__ import annotations
 
+import os
+from functools import lru_cache
+from itertools import product
+
+from .genome import ALLELE_TABLE, LOCUS_INDEX, decode_phenotype
+
+# Re-check every compiled profile against the interpreted rules (slow; for tuning).
+RARITY_VERIFY_COMPILED = os.getenv("RARITY_VERIFY_COMPILED", "false").lower() == "true"
+
 RARE_BY_LOCUS = {
     "Accessory": {"Relic"},
     "Aura": {"Prismatic"},
@@ -27,55 +36,181 @@ SYNERGY_RULES = [
     },
 ]
 
+# Loci that count as "active" whenever they express anything but None.
+ACTIVE_BONUSES = [
+    ("Aura", 10, "AURA_ACTIVE"),
+    ("Element", 0, "ELEMENT_ACTIVE"),
+]
 
-def rarity_profile(phenotype: dict) -> tuple[int, str, list[str]]:
-    score = 0
-    tags: list[str] = []
-
-    aura_value = phenotype.get("Aura")
-    element_value = phenotype.get("Element")
+TRAIT_BONUSES = [
+    ("Aura", "Prismatic", 5, "PRISMATIC_AURA"),
+    ("EyeColor", "Void", 0, "VOID_EYES"),
+    ("Wing", "Crystal", 0, "CRYSTAL_WINGS"),
+    ("ShinyGene", "Shiny", 15, "SHINY_GENE"),
+    ("Species", "Mythic", 20, "MYTHIC_SPECIES"),
+]
 
-    if aura_value and aura_value != "None":
-        score += 10
-        tags.append("AURA_ACTIVE")
+TIER_ORDER = ["Common", "Uncommon", "Rare", "Epic", "Legendary"]
 
-    if element_value and element_value != "None":
-        tags.append("ELEMENT_ACTIVE")
 
+def _build_rules() -> list[dict]:
+    """Normalize every scoring rule to ``requirements: [(locus, values)]``."""
+    rules = []
+    for locus, bonus, tag in ACTIVE_BONUSES:
+        active = frozenset(a for a in ALLELE_TABLE[locus] if a != "None")
+        rules.append({"tags": [tag], "requirements": [(locus, active)], "bonus": bonus})
     for locus, rare_values in RARE_BY_LOCUS.items():
-        if phenotype.get(locus) in rare_values:
-            score += 5
-            tags.append(f"{locus.upper()}_RARE")
+        rules.append(
+            {
+                "tags": [f"{locus.upper()}_RARE"],
+                "requirements": [(locus, frozenset(rare_values))],
+                "bonus": 5,
+            }
+        )
+    for locus, value, bonus, tag in TRAIT_BONUSES:
+        rules.append({"tags": [tag], "requirements": [(locus, frozenset([value]))], "bonus": bonus})
+    for rule in SYNERGY_RULES:
+        rules.append(
+            {
+                "tags": list(rule["tags"]),
+                "requirements": [
+                    (locus, frozenset([value])) for locus, value in rule["requirements"]
+                ],
+                "bonus": rule["bonus"],
+                "min_tier": rule["min_tier"],
+            }
+        )
+    return rules
+
+
+RULES = _build_rules()
+
+RARITY_LOCI = sorted(
+    {locus for rule in RULES for locus, _ in rule["requirements"]},
+    key=LOCUS_INDEX.__getitem__,
+)
+
+
+def _compile_rules() -> tuple[list[int], list[dict[str, int]], list[list[int]]]:
+    """Give every (rule, requirement) a bit; each locus value maps to its bits.
+
+    A phenotype's OR-ed bits are its canonical key: a rule matches when all of
+    its requirement bits are set.
+    """
+    rule_masks = []
+    value_bits: list[dict[str, int]] = [{} for _ in RARITY_LOCI]
+    position = {locus: index for index, locus in enumerate(RARITY_LOCI)}
+    bit = 0
+    for rule in RULES:
+        mask = 0
+        for locus, values in rule["requirements"]:
+            bits = value_bits[position[locus]]
+            for value in values:
+                bits[value] = bits.get(value, 0) | 1 << bit
+            mask |= 1 << bit
+            bit += 1
+        rule_masks.append(mask)
+    code_bits = [
+        [bits.get(allele, 0) for allele in ALLELE_TABLE[locus]]
+        for locus, bits in zip(RARITY_LOCI, value_bits)
+    ]
+    return rule_masks, value_bits, code_bits
+
+
+_RULE_MASKS, _VALUE_BITS, _CODE_BITS = _compile_rules()
+
+
+def rarity_classes(locus: str) -> dict[int, int]:
+    """Map each allele code to a representative code scoring identically."""
+    requirements = [
+        values
+        for rule in RULES
+        for rule_locus, values in rule["requirements"]
+        if rule_locus == locus
+    ]
+    representatives: dict[tuple[bool, ...], int] = {}
+    classes = {}
+    for code, allele in enumerate(ALLELE_TABLE[locus]):
+        signature = tuple(allele in values for values in requirements)
+        classes[code] = representatives.setdefault(signature, code)
+    return classes
+
+
+_RARITY_COLUMNS = [LOCUS_INDEX[locus] for locus in RARITY_LOCI]
+
+
+def _summarize(matched: list[dict]) -> tuple[int, str, list[str]]:
+    score = sum(rule["bonus"] for rule in matched)
+    tier = rarity_tier(score)
+    tags: set[str] = set()
+    for rule in matched:
+        tags.update(rule["tags"])
+        if "min_tier" in rule:
+            tier = _max_tier(tier, rule["min_tier"])
+    return score, tier, sorted(tags)
 
-    if phenotype.get("Aura") == "Prismatic":
-        score += 5
-        tags.append("PRISMATIC_AURA")
 
-    if phenotype.get("EyeColor") == "Void":
-        tags.append("VOID_EYES")
+@lru_cache(maxsize=4096)
+def _profile_for_key(key: int) -> tuple[int, str, tuple[str, ...]]:
+    matched = [rule for rule, mask in zip(RULES, _RULE_MASKS) if key & mask == mask]
+    score, tier, tags = _summarize(matched)
+    return score, tier, tuple(tags)
 
-    if phenotype.get("Wing") == "Crystal":
-        tags.append("CRYSTAL_WINGS")
 
-    if phenotype.get("ShinyGene") == "Shiny":
-        score += 15
-        tags.append("SHINY_GENE")
+def rarity_profile_interpreted(phenotype: dict) -> tuple[int, str, list[str]]:
+    """Reference evaluation that walks RULES directly."""
+    matched = [
+        rule
+        for rule in RULES
+        if all(phenotype.get(locus) in values for locus, values in rule["requirements"])
+    ]
+    return _summarize(matched)
 
-    if phenotype.get("Species") == "Mythic":
-        score += 20
-        tags.append("MYTHIC_SPECIES")
 
-    for rule in SYNERGY_RULES:
-        if all(phenotype.get(locus) == value for locus, value in rule["requirements"]):
-            score += rule["bonus"]
-            tags.extend(rule["tags"])
+def _phenotype_key(phenotype: dict) -> int:
+    key = 0
+    for locus, bits in zip(RARITY_LOCI, _VALUE_BITS):
+        key |= bits.get(phenotype.get(locus), 0)
+    return key
 
-    tier = rarity_tier(score)
-    for rule in SYNERGY_RULES:
-        if any(tag in tags for tag in rule["tags"]):
-            tier = _max_tier(tier, rule["min_tier"])
 
-    return score, tier, sorted(set(tags))
+def rarity_profile(phenotype: dict) -> tuple[int, str, list[str]]:
+    score, tier, tags = _profile_for_key(_phenotype_key(phenotype))
+    if RARITY_VERIFY_COMPILED:
+        _verify(phenotype, (score, tier, list(tags)))
+    return score, tier, list(tags)
+
+
+def rarity_profile_encoded(phenotype: bytes) -> tuple[int, str, list[str]]:
+    key = 0
+    for column, bits in zip(_RARITY_COLUMNS, _CODE_BITS):
+        key |= bits[phenotype[column]]
+    score, tier, tags = _profile_for_key(key)
+    if RARITY_VERIFY_COMPILED:
+        _verify(decode_phenotype(phenotype), (score, tier, list(tags)))
+    return score, tier, list(tags)
+
+
+def _verify(phenotype: dict, compiled: tuple[int, str, list[str]]) -> None:
+    expected = rarity_profile_interpreted(phenotype)
+    if compiled != expected:
+        raise RuntimeError(
+            f"Compiled rarity {compiled} != interpreted {expected} for {phenotype}."
+        )
+
+
+def check_compiled_rules() -> int:
+    """Compare compiled and interpreted profiles over every rarity-relevant phenotype.
+
+    Returns the number of phenotypes checked; raises RuntimeError on a mismatch.
+    """
+    checked = 0
+    for values in product(*(ALLELE_TABLE[locus] for locus in RARITY_LOCI)):
+        phenotype = dict(zip(RARITY_LOCI, values))
+        score, tier, tags = _profile_for_key(_phenotype_key(phenotype))
+        _verify(phenotype, (score, tier, list(tags)))
+        checked += 1
+    return checked
 
 
 def rarity_score(phenotype: dict) -> int:
@@ -95,8 +230,7 @@ def rarity_tier(score: int) -> str:
 
 
 def _max_tier(current: str, minimum: str) -> str:
-    order = ["Common", "Uncommon", "Rare", "Epic", "Legendary"]
-    return order[max(order.index(current), order.index(minimum))]
+    return TIER_ORDER[max(TIER_ORDER.index(current), TIER_ORDER.index(minimum))]
 
 
 def hatch_reward(score: int, tier: str) -> int:
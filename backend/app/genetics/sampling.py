@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import random
+from functools import lru_cache
+from itertools import accumulate, product
+from typing import Iterable
+
+from .genome import (
+    COMMON_ALLELES,
+    GENOME_WIDTH,
+    LOCI,
+    LOCUS_INDEX,
+    PHENOTYPE_WIDTH,
+    allele_code,
+    decode_genome,
+)
+from .phenotype import DOMINANT_CODES
+from .rarity import RARITY_LOCI, TIER_ORDER, rarity_classes, rarity_profile_encoded
+
+
+class ImportanceWeight:
+    """Likelihood ratio for rolls drawn at boosted chances instead of the game's.
+
+    ``proposals`` maps a roll name (``"forced_rare"``, ``"premium_rare"``, ...)
+    to the chance it is drawn at. ``weight`` is the product of ratios for every
+    roll so far; weighting an outcome by it keeps estimates unbiased.
+    """
+
+    def __init__(self, proposals: dict[str, float]) -> None:
+        self.proposals = proposals
+        self.weight = 1.0
+
+    def roll(self, rng: random.Random, name: str, chance: float) -> bool:
+        proposal = self.proposals.get(name)
+        if proposal is None:
+            return rng.random() < chance
+        hit = rng.random() < proposal
+        self.weight *= chance / proposal if hit else (1 - chance) / (1 - proposal)
+        return hit
+
+
+def roll(
+    rng: random.Random,
+    name: str,
+    chance: float,
+    importance: ImportanceWeight | None = None,
+) -> bool:
+    """``rng.random() < chance``, optionally drawn at the importance proposal."""
+    if importance is None:
+        return rng.random() < chance
+    return importance.roll(rng, name, chance)
+
+
+def _values(values: str | Iterable[str]) -> list[str]:
+    return [values] if isinstance(values, str) else list(values)
+
+
+class TierSampler:
+    """Draws ``random_genome`` genomes conditioned on a rarity tier.
+
+    ``traits`` pins loci to expressed alleles (one value or a collection). The
+    result is distributed exactly like ``random_genome`` rejection-sampled
+    until the tier and traits match, but takes one draw per locus.
+    """
+
+    def __init__(self, traits: dict[str, str | Iterable[str]] | None = None) -> None:
+        allowed = {
+            locus: {allele_code(locus, value) for value in _values(values)}
+            for locus, values in (traits or {}).items()
+        }
+
+        # Genotype pairs random_genome can draw, grouped by expressed code.
+        genotypes: list[dict[int, list[tuple[int, int]]]] = []
+        for index, locus in enumerate(LOCI):
+            codes = [allele_code(locus, allele) for allele in COMMON_ALLELES[locus]]
+            table = DOMINANT_CODES[index]
+            by_expressed: dict[int, list[tuple[int, int]]] = {}
+            for code_a in codes:
+                for code_b in codes:
+                    expressed = table[code_a][code_b]
+                    if locus in allowed and expressed not in allowed[locus]:
+                        continue
+                    by_expressed.setdefault(expressed, []).append((code_a, code_b))
+            if not by_expressed:
+                raise ValueError(f"No {locus} genotype expresses {traits[locus]!r}.")
+            genotypes.append(by_expressed)
+        self._pairs = [
+            [pair for pairs in by_expressed.values() for pair in pairs]
+            for by_expressed in genotypes
+        ]
+
+        # Every combination of scoring classes over the rarity loci, by tier.
+        self._rarity_columns = [LOCUS_INDEX[locus] for locus in RARITY_LOCI]
+        classes = []
+        for locus, index in zip(RARITY_LOCI, self._rarity_columns):
+            representative = rarity_classes(locus)
+            members: dict[int, list[tuple[int, int]]] = {}
+            for expressed, pairs in genotypes[index].items():
+                members.setdefault(representative[expressed], []).extend(pairs)
+            classes.append(list(members.items()))
+
+        by_tier: dict[str, tuple[list, list[int]]] = {tier: ([], []) for tier in TIER_ORDER}
+        row = bytearray(PHENOTYPE_WIDTH)
+        for combination in product(*classes):
+            weight = 1
+            for index, (code, pairs) in zip(self._rarity_columns, combination):
+                row[index] = code
+                weight *= len(pairs)
+            _, tier, _ = rarity_profile_encoded(bytes(row))
+            combos, weights = by_tier[tier]
+            combos.append(tuple(pairs for _, pairs in combination))
+            weights.append(weight)
+
+        total = sum(sum(weights) for _, weights in by_tier.values())
+        self.tier_odds = {tier: sum(weights) / total for tier, (_, weights) in by_tier.items()}
+        self._tiers = {
+            tier: (combos, list(accumulate(weights))) for tier, (combos, weights) in by_tier.items()
+        }
+
+    def sample_encoded(self, rng: random.Random, tier: str | None = None) -> bytes:
+        pairs_by_locus = list(self._pairs)
+        if tier is not None:
+            combos, cumulative = self._tiers[tier]
+            if not combos:
+                raise ValueError(f"Tier {tier!r} is unreachable with these traits.")
+            combo = rng.choices(combos, cum_weights=cumulative)[0]
+            for index, pairs in zip(self._rarity_columns, combo):
+                pairs_by_locus[index] = pairs
+
+        data = bytearray(GENOME_WIDTH)
+        for index, pairs in enumerate(pairs_by_locus):
+            data[index * 2], data[index * 2 + 1] = rng.choice(pairs)
+        return bytes(data)
+
+    def sample(self, rng: random.Random, tier: str | None = None) -> dict:
+        return decode_genome(self.sample_encoded(rng, tier))
+
+    def sample_population(self, rng: random.Random, mix: dict[str, int]) -> list[dict]:
+        """``mix[tier]`` genomes per tier, in ``mix`` order."""
+        return [self.sample(rng, tier) for tier, count in mix.items() for _ in range(count)]
+
+
+@lru_cache(maxsize=64)
+def _tier_sampler(traits: tuple[tuple[str, frozenset[str]], ...]) -> TierSampler:
+    return TierSampler(dict(traits))
+
+
+def tier_sampler(traits: dict[str, str | Iterable[str]] | None = None) -> TierSampler:
+    """Shared ``TierSampler`` for ``traits``; the tables are built once per trait set."""
+    key = tuple(
+        sorted(
+            (locus, frozenset(_values(values)))
+            for locus, values in (traits or {}).items()
+        )
+    )
+    return _tier_sampler(key)
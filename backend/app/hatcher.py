@@ -0,0 +1,107 @@
+"""Optional auto-hatch scheduler (``AUTO_HATCH=true``).
+
+Keeps a min-heap of ``(hatch_at, egg_id)`` for incubating eggs, loaded once at
+startup and fed by the event bus's ``egg_created`` events (``/breed`` and the
+adopt routes), and hatches eggs in batched transactions as they come due.
+Eggs are claimed by ``_hatch_eggs`` first, so an egg already hatched by a
+request, or before a restart, is skipped rather than hatched twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import os
+from datetime import datetime, timedelta
+
+from .database import SessionLocal
+from .events import bus
+from .models import Egg
+from .routes.eggs import _hatch_eggs
+
+AUTO_HATCH = os.getenv("AUTO_HATCH", "false").lower() == "true"
+AUTO_HATCH_BATCH = int(os.getenv("AUTO_HATCH_BATCH", "200"))
+# Delay before eggs from a failed batch are tried again.
+AUTO_HATCH_RETRY = timedelta(seconds=5)
+
+logger = logging.getLogger(__name__)
+
+
+def hatch_due(egg_ids: list[int], now: datetime) -> int:
+    """Hatch the still-incubating eggs among ``egg_ids``; returns how many hatched."""
+    with SessionLocal() as db:
+        eggs = _hatch_eggs(db, now, Egg.id.in_(egg_ids), Egg.hatch_at <= now)
+        if eggs:
+            db.commit()
+        return len(eggs)
+
+
+class HatchScheduler:
+    def __init__(self, batch_size: int = AUTO_HATCH_BATCH) -> None:
+        self.batch_size = batch_size
+        self._heap: list[tuple[datetime, int]] = []
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self, incubating: list[tuple[int, datetime]]) -> None:
+        """Schedule ``incubating`` eggs and start hatching on the running loop."""
+        self._heap = [(hatch_at, egg_id) for egg_id, hatch_at in incubating]
+        heapq.heapify(self._heap)
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        bus.add_listener(self._on_event)
+
+    async def stop(self) -> None:
+        bus.remove_listener(self._on_event)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._heap.clear()
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap)
+
+    def push(self, egg_id: int, hatch_at: datetime) -> None:
+        heapq.heappush(self._heap, (hatch_at, egg_id))
+        if self._wake and self._heap[0] == (hatch_at, egg_id):
+            self._wake.set()
+
+    def _on_event(self, kind: str, data: dict) -> None:
+        if kind == "egg_created":
+            self.push(data["egg_id"], datetime.fromisoformat(data["hatch_at"]))
+        elif kind == "reset":
+            self._heap.clear()
+
+    def _pop_due(self, now: datetime) -> list[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            now = datetime.utcnow()
+            due = self._pop_due(now)
+            if due:
+                try:
+                    await asyncio.to_thread(hatch_due, due, now)
+                except Exception:
+                    logger.exception("Auto-hatch of %d eggs failed; retrying.", len(due))
+                    for egg_id in due:
+                        self.push(egg_id, now + AUTO_HATCH_RETRY)
+                continue
+            timeout = (self._heap[0][0] - now).total_seconds() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+hatcher = HatchScheduler()
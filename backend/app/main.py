@@ -3,8 +3,13 @@ from __future__ import annotations
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import init_db, SessionLocal
-from .routes import breeding, eggs, market, pets, shop
+from .aio import async_router
+from .changes import prune_changes
+from .database import DB_MODE, init_db, SessionLocal
+from .events import bus
+from .hatcher import AUTO_HATCH, hatcher
+from .models import Egg
+from .routes import breeding, eggs, events, market, pets, shop
 from .seed import seed_db
 
 app = FastAPI(title="SD Fantasy Pet MVP")
@@ -17,11 +22,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(pets.router)
-app.include_router(breeding.router)
-app.include_router(eggs.router)
-app.include_router(market.router)
-app.include_router(shop.router)
+for module in (pets, breeding, eggs, market, shop):
+    app.include_router(async_router(module.router) if DB_MODE == "async" else module.router)
+app.include_router(events.router)
 
 
 @app.on_event("startup")
@@ -30,5 +33,28 @@ def on_startup():
     db = SessionLocal()
     try:
         seed_db(db)
+        prune_changes(db)
+        db.commit()
     finally:
         db.close()
+
+
+@app.on_event("startup")
+async def start_event_bus():
+    db = SessionLocal()
+    try:
+        incubating = (
+            db.query(Egg.id, Egg.hatch_at).filter(Egg.status == "Incubating").all()
+        )
+    finally:
+        db.close()
+    incubating = [tuple(row) for row in incubating]
+    bus.start(incubating)
+    if AUTO_HATCH:
+        hatcher.start(incubating)
+
+
+@app.on_event("shutdown")
+async def stop_event_bus():
+    await hatcher.stop()
+    bus.stop()
@@ -0,0 +1,242 @@
+"""Versioned schema migrations applied at startup.
+
+``create_all`` only creates missing tables, so changes to existing tables are
+made here. Each migration runs once per database, in version order, inside a
+transaction, and is recorded in ``schema_migrations``. Migrations must be
+idempotent: a fresh database gets the full schema from ``create_all`` and then
+runs every migration on top of it.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import JSON, Connection, Engine, bindparam, column, inspect, select, table, text
+
+from .database import Base
+from .genetics.genome import encode_genome, encode_phenotype
+from .models import TRAIT_COLUMNS, listing_columns, public_phenotype, trait_columns
+
+Migration = tuple[int, str, Callable[[Connection], None]]
+
+
+def _add_missing_columns(connection: Connection, table: str, columns: list[str]) -> None:
+    existing = _columns(connection, table)
+    for name in columns:
+        if name in existing:
+            continue
+        column = Base.metadata.tables[table].columns[name]
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
+
+
+def _create_index(connection: Connection, table: str, name: str, columns: list[str]) -> None:
+    # Spelled out per migration rather than read from ``Base.metadata``: the
+    # models describe the latest schema, whose columns may not exist yet.
+    connection.execute(
+        text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+    )
+
+
+def _columns(connection: Connection, table_name: str) -> set[str]:
+    return {info["name"] for info in inspect(connection).get_columns(table_name)}
+
+
+def _player_cooldown_columns(connection: Connection) -> None:
+    _add_missing_columns(
+        connection,
+        "players",
+        ["adopt_egg_ready_at", "adopt_premium_egg_ready_at", "reveal_ready_at"],
+    )
+
+
+def _hot_path_indexes(connection: Connection) -> None:
+    _create_index(connection, "pets", "ix_pets_owner_name", ["owner_name"])
+    _create_index(connection, "eggs", "ix_eggs_status_hatch_at", ["status", "hatch_at"])
+    _create_index(connection, "eggs", "ix_eggs_hatched_pet_id", ["hatched_pet_id"])
+    _create_index(
+        connection,
+        "market_listings",
+        "ix_market_listings_status_created_at",
+        ["status", "created_at"],
+    )
+    _create_index(
+        connection, "market_listings", "ix_market_listings_pet_id_status", ["pet_id", "status"]
+    )
+
+
+def _emotion_override_column(connection: Connection) -> None:
+    _add_missing_columns(connection, "pets", ["emotion_override_until"])
+
+
+def _binary_genomes(connection: Connection) -> None:
+    traits = list(TRAIT_COLUMNS.values())
+    _add_missing_columns(connection, "pets", ["genome", "phenotype", *traits])
+    _add_missing_columns(connection, "eggs", ["genome"])
+
+    # Convert the JSON columns of databases created before this migration.
+    if "genome_json" in _columns(connection, "pets"):
+        pets = table(
+            "pets", column("id"), column("genome_json", JSON), column("phenotype_json", JSON)
+        )
+        rows = []
+        for pet_id, genome, phenotype in connection.execute(pets.select()):
+            encoded = encode_phenotype(phenotype)
+            rows.append(
+                {
+                    "id": pet_id,
+                    "genome": encode_genome(genome),
+                    "phenotype": encoded,
+                    **trait_columns(encoded),
+                }
+            )
+        if rows:
+            assignments = ", ".join(f"{name} = :{name}" for name in ["genome", "phenotype", *traits])
+            connection.execute(text(f"UPDATE pets SET {assignments} WHERE id = :id"), rows)
+        connection.execute(text("ALTER TABLE pets DROP COLUMN genome_json"))
+        connection.execute(text("ALTER TABLE pets DROP COLUMN phenotype_json"))
+
+    if "genome_json" in _columns(connection, "eggs"):
+        eggs = table("eggs", column("id"), column("genome_json", JSON))
+        rows = [
+            {"id": egg_id, "genome": encode_genome(genome)}
+            for egg_id, genome in connection.execute(eggs.select())
+        ]
+        if rows:
+            connection.execute(text("UPDATE eggs SET genome = :genome WHERE id = :id"), rows)
+        connection.execute(text("ALTER TABLE eggs DROP COLUMN genome_json"))
+
+    for name in traits:
+        _create_index(connection, "pets", f"ix_pets_{name}", [name])
+
+
+def _public_phenotype_column(connection: Connection) -> None:
+    _add_missing_columns(connection, "pets", ["phenotype_public_json"])
+    pets = table(
+        "pets",
+        column("id"),
+        column("phenotype"),
+        column("hidden_loci_json", JSON),
+        column("phenotype_public_json", JSON),
+    )
+    rows = [
+        {"pet_id": pet_id, "public": public_phenotype(phenotype, hidden_loci or [])}
+        for pet_id, phenotype, hidden_loci in connection.execute(
+            select(pets.c.id, pets.c.phenotype, pets.c.hidden_loci_json).where(
+                pets.c.phenotype_public_json.is_(None)
+            )
+        )
+    ]
+    if rows:
+        connection.execute(
+            pets.update()
+            .where(pets.c.id == bindparam("pet_id"))
+            .values(phenotype_public_json=bindparam("public")),
+            rows,
+        )
+
+
+def _change_log_entity_index(connection: Connection) -> None:
+    _create_index(connection, "change_log", "ix_change_log_entity_seq", ["entity", "seq"])
+
+
+def _pet_insert_sentinel(connection: Connection) -> None:
+    _add_missing_columns(connection, "pets", ["_sentinel"])
+
+
+def _egg_insert_sentinel(connection: Connection) -> None:
+    _add_missing_columns(connection, "eggs", ["_sentinel"])
+
+
+def _egg_status_index(connection: Connection) -> None:
+    _create_index(connection, "eggs", "ix_eggs_status_id", ["status", "id"])
+
+
+def _order_book_columns(connection: Connection) -> None:
+    columns = ["rarity_tier", *TRAIT_COLUMNS.values()]
+    _add_missing_columns(connection, "market_listings", columns)
+    listings = table("market_listings", column("id"), column("pet_id"), *map(column, columns))
+    pets = table(
+        "pets",
+        column("id"),
+        column("rarity_tier"),
+        column("phenotype"),
+        column("hidden_loci_json", JSON),
+    )
+    rows = []
+    for listing_id, tier, phenotype, hidden_loci in connection.execute(
+        select(listings.c.id, pets.c.rarity_tier, pets.c.phenotype, pets.c.hidden_loci_json)
+        .join(pets, pets.c.id == listings.c.pet_id)
+        .where(listings.c.rarity_tier.is_(None))
+    ):
+        values = listing_columns(tier, phenotype, hidden_loci)
+        # Bind names must differ from the columns in the UPDATE's SET clause.
+        rows.append({"listing_id": listing_id} | {f"new_{k}": v for k, v in values.items()})
+    if rows:
+        connection.execute(
+            listings.update()
+            .where(listings.c.id == bindparam("listing_id"))
+            .values({name: bindparam(f"new_{name}") for name in columns}),
+            rows,
+        )
+    _create_index(connection, "market_listings", "ix_market_listings_status_id", ["status", "id"])
+    _create_index(
+        connection, "market_listings", "ix_market_listings_status_price", ["status", "price"]
+    )
+    for name in columns:
+        _create_index(
+            connection,
+            "market_listings",
+            f"ix_market_listings_status_{name}_price",
+            ["status", name, "price"],
+        )
+
+
+def _emotion_override_index(connection: Connection) -> None:
+    _create_index(
+        connection, "pets", "ix_pets_emotion_override_until", ["emotion_override_until"]
+    )
+
+
+MIGRATIONS: list[Migration] = [
+    (1, "player cooldown columns", _player_cooldown_columns),
+    (2, "hot path indexes", _hot_path_indexes),
+    (3, "pet emotion override", _emotion_override_column),
+    (4, "binary genomes and trait columns", _binary_genomes),
+    (5, "precomputed public phenotype", _public_phenotype_column),
+    (6, "change log entity index", _change_log_entity_index),
+    (7, "pet insert sentinel", _pet_insert_sentinel),
+    (8, "market order book columns", _order_book_columns),
+    (9, "pet emotion override index", _emotion_override_index),
+    (10, "egg insert sentinel", _egg_insert_sentinel),
+    (11, "egg status id index", _egg_status_index),
+]
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Apply pending migrations; returns the versions applied."""
+    applied = []
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at DATETIME NOT NULL)"
+            )
+        )
+        done = set(connection.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+    for version, name, migrate in sorted(MIGRATIONS):
+        if version in done:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(
+                text(
+                    "INSERT INTO schema_migrations (version, name, applied_at) "
+                    "VALUES (:version, :name, :applied_at)"
+                ),
+                {"version": version, "name": name, "applied_at": datetime.utcnow()},
+            )
+        applied.append(version)
+    return applied
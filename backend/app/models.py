@@ -2,11 +2,66 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    SmallInteger,
+    String,
+    Text,
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
+from sqlalchemy.schema import insert_sentinel
 from sqlalchemy.types import JSON
 
 from .database import Base
+from .genetics.genome import (
+    ALLELE_TABLE,
+    GENOME_WIDTH,
+    LOCUS_INDEX,
+    PHENOTYPE_WIDTH,
+    decode_genome,
+    decode_phenotype,
+)
+
+# Phenotype loci copied into indexed allele-code columns on ``pets`` so trait
+# filters are index lookups instead of scans over the phenotype blob.
+TRAIT_COLUMNS = {
+    "Species": "species",
+    "Element": "element",
+    "Aura": "aura",
+    "EyeColor": "eye_color",
+    "Accessory": "accessory",
+    "ShinyGene": "shiny_gene",
+}
+
+
+def trait_columns(phenotype: bytes) -> dict[str, int]:
+    """Trait column values for an encoded phenotype, for bulk inserts."""
+    return {column: phenotype[LOCUS_INDEX[locus]] for locus, column in TRAIT_COLUMNS.items()}
+
+
+def public_phenotype(phenotype: bytes, hidden_loci: list[str]) -> dict[str, str]:
+    """The phenotype players see: hidden loci read ``"Unknown"``."""
+    return {
+        locus: "Unknown" if locus in hidden_loci else allele
+        for locus, allele in decode_phenotype(phenotype).items()
+    }
+
+
+def listing_columns(rarity_tier: str, phenotype: bytes, hidden_loci: list[str]) -> dict:
+    """A pet's tier and trait codes as copied onto its ``MarketListing``.
+
+    Hidden traits are ``None``, so order book filters cannot reveal them.
+    """
+    hidden = set(hidden_loci or [])
+    codes = trait_columns(phenotype)
+    return {"rarity_tier": rarity_tier} | {
+        column: None if locus in hidden else codes[column]
+        for locus, column in TRAIT_COLUMNS.items()
+    }
 
 
 class Pet(Base):
@@ -14,16 +69,54 @@ class Pet(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    genome_json: Mapped[dict] = mapped_column(JSON, nullable=False)
-    phenotype_json: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # Encoded with ``genetics.genome``; ``genome_dict``/``phenotype_dict``
+    # decode them for responses.
+    genome: Mapped[bytes] = mapped_column(LargeBinary(GENOME_WIDTH), nullable=False)
+    phenotype: Mapped[bytes] = mapped_column(LargeBinary(PHENOTYPE_WIDTH), nullable=False)
+    species: Mapped[int] = mapped_column(SmallInteger, index=True)
+    element: Mapped[int] = mapped_column(SmallInteger, index=True)
+    aura: Mapped[int] = mapped_column(SmallInteger, index=True)
+    eye_color: Mapped[int] = mapped_column(SmallInteger, index=True)
+    accessory: Mapped[int] = mapped_column(SmallInteger, index=True)
+    shiny_gene: Mapped[int] = mapped_column(SmallInteger, index=True)
     rarity_score: Mapped[int] = mapped_column(Integer, default=0)
     rarity_tier: Mapped[str] = mapped_column(String, default="Common")
     rarity_tags_json: Mapped[list] = mapped_column(JSON, default=list)
     breeding_locked_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     hidden_loci_json: Mapped[list] = mapped_column(JSON, default=list)
+    # ``public_phenotype(phenotype, hidden_loci_json)``, kept in step by
+    # ``_derive_columns`` so reads do not rebuild it.
+    phenotype_public_json: Mapped[dict] = mapped_column(JSON, default=dict)
+    # Emotion is computed at read time (``genetics.emotions.current_emotion``);
+    # these hold the last override bought with /shop/refresh-emotion.
     emotion: Mapped[str] = mapped_column(String, default="Calm")
     emotion_updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    owner_name: Mapped[str] = mapped_column(String, default="LocalUser")
+    emotion_override_until: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, index=True
+    )
+    owner_name: Mapped[str] = mapped_column(String, default="LocalUser", index=True)
+    # Filled by SQLAlchemy during multi-row inserts so ``INSERT ... RETURNING``
+    # ids can be matched to their rows; SQLite does not return them in order.
+    _sentinel: Mapped[int | None] = insert_sentinel()
+
+    @validates("phenotype", "hidden_loci_json")
+    def _derive_columns(self, key: str, value):
+        if key == "phenotype":
+            for column, code in trait_columns(value).items():
+                setattr(self, column, code)
+        phenotype = value if key == "phenotype" else self.phenotype
+        hidden_loci = value if key == "hidden_loci_json" else self.hidden_loci_json
+        if phenotype is not None:
+            self.phenotype_public_json = public_phenotype(phenotype, hidden_loci or [])
+        return value
+
+    @property
+    def genome_dict(self) -> dict:
+        return decode_genome(self.genome)
+
+    @property
+    def phenotype_dict(self) -> dict:
+        return decode_phenotype(self.phenotype)
 
 
 class Player(Base):
@@ -39,14 +132,31 @@ class Player(Base):
 
 class Egg(Base):
     __tablename__ = "eggs"
+    __table_args__ = (
+        Index("ix_eggs_status_hatch_at", "status", "hatch_at"),
+        Index("ix_eggs_hatched_pet_id", "hatched_pet_id"),
+        # /eggs?status= pages in id order.
+        Index("ix_eggs_status_id", "status", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     hatch_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
-    genome_json: Mapped[dict] = mapped_column(JSON, nullable=False)
+    genome: Mapped[bytes] = mapped_column(LargeBinary(GENOME_WIDTH), nullable=False)
     status: Mapped[str] = mapped_column(String, default="Incubating")
     hatched_pet_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("pets.id"))
     hatched_pet: Mapped[Pet | None] = relationship("Pet")
+    # See ``Pet._sentinel``; lets /breed/batch insert its eggs in one statement.
+    _sentinel: Mapped[int | None] = insert_sentinel()
+
+    @property
+    def genome_dict(self) -> dict:
+        return decode_genome(self.genome)
+
+    @property
+    def species_seed(self) -> str:
+        """The first Species allele, read straight from the genome blob."""
+        return ALLELE_TABLE["Species"][self.genome[LOCUS_INDEX["Species"] * 2]]
 
 
 class Breeding(Base):
@@ -66,6 +176,17 @@ class Breeding(Base):
 
 class MarketListing(Base):
     __tablename__ = "market_listings"
+    __table_args__ = (
+        Index("ix_market_listings_status_created_at", "status", "created_at"),
+        Index("ix_market_listings_pet_id_status", "pet_id", "status"),
+        # Order book: age is id order; each filter column leads a price index.
+        Index("ix_market_listings_status_id", "status", "id"),
+        Index("ix_market_listings_status_price", "status", "price"),
+        *(
+            Index(f"ix_market_listings_status_{column}_price", "status", column, "price")
+            for column in ["rarity_tier", *TRAIT_COLUMNS.values()]
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -75,5 +196,24 @@ class MarketListing(Base):
     seller_name: Mapped[str] = mapped_column(String, default="LocalUser")
     buyer_name: Mapped[str | None] = mapped_column(String, nullable=True)
     sold_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Set from the pet by ``listing_columns`` for the order book.
+    rarity_tier: Mapped[str | None] = mapped_column(String, nullable=True)
+    species: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    element: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    aura: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    eye_color: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    accessory: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    shiny_gene: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
 
     pet: Mapped[Pet] = relationship("Pet")
+
+
+class ChangeLog(Base):
+    """One row per write to a synced entity; ``seq`` orders the changes."""
+
+    __tablename__ = "change_log"
+    __table_args__ = (Index("ix_change_log_entity_seq", "entity", "seq"),)
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    entity: Mapped[str] = mapped_column(String, nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
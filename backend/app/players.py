@@ -0,0 +1,203 @@
+"""The local player's row: cached reads and atomic gold/cooldown writes.
+
+There is one player. ``get_player`` returns a ``PlayerState`` snapshot that is
+cached per process, so read paths such as ``/state`` skip the query. Gold and
+cooldowns change through ``spend`` and ``earn``, each a single conditional
+``UPDATE ... RETURNING``: concurrent requests cannot lose an update, and a
+spend the player cannot afford matches no row instead of going negative.
+
+A written snapshot replaces the cached one when the request commits, ordered
+by the change log ``seq`` of the write, and is dropped on rollback. ORM writes
+to ``Player`` and ``forget_player`` clear the cache instead, and bump a
+generation so a read or write that began before the clear cannot refill the
+cache with the row it saw. The cache assumes
+one process serves the database; set ``PLAYER_CACHE=false`` when running
+several workers.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import event, or_, select, update
+from sqlalchemy.orm import Session
+
+from .changes import record_change
+from .events import queue_event
+from .models import Player
+
+PLAYER_CACHE = os.getenv("PLAYER_CACHE", "true").lower() == "true"
+
+PENDING_KEY = "pending_player"
+# Cooldown column -> subject of its "... cooldown. Try again in Ns." error.
+COOLDOWN_LABELS = {
+    "adopt_egg_ready_at": "Adoption",
+    "adopt_premium_egg_ready_at": "Premium adoption",
+    "reveal_ready_at": "Reveal",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerState:
+    id: int
+    gold: int
+    adopt_egg_ready_at: datetime | None
+    adopt_premium_egg_ready_at: datetime | None
+    reveal_ready_at: datetime | None
+
+
+_COLUMNS = (
+    Player.id,
+    Player.gold,
+    Player.adopt_egg_ready_at,
+    Player.adopt_premium_egg_ready_at,
+    Player.reveal_ready_at,
+)
+_STALE = object()
+_lock = threading.Lock()
+_cached: tuple[int, PlayerState] | None = None
+_generation = 0
+
+
+def clear_cache() -> None:
+    global _cached, _generation
+    with _lock:
+        _cached = None
+        _generation += 1
+
+
+def _store(seq: int, state: PlayerState, generation: int) -> None:
+    # Loads store with seq 0, so they only fill an empty cache. ``generation``
+    # is read before the row was; a clear since then makes the row suspect.
+    global _cached
+    with _lock:
+        if generation != _generation:
+            return
+        if _cached is None or seq > _cached[0]:
+            _cached = (seq, state)
+
+
+def _load(db: Session) -> PlayerState:
+    generation = _generation
+    row = db.execute(select(*_COLUMNS).order_by(Player.id).limit(1)).first()
+    if row is None:
+        # ``seed_db`` normally creates the player; this one is committed with
+        # the request, if the request commits.
+        player = Player(gold=0)
+        db.add(player)
+        db.flush()
+        return PlayerState(player.id, player.gold, None, None, None)
+    state = PlayerState(*row)
+    if PLAYER_CACHE and PENDING_KEY not in db.info:
+        _store(0, state, generation)
+    return state
+
+
+def get_player(db: Session) -> PlayerState:
+    pending = db.info.get(PENDING_KEY)
+    if isinstance(pending, tuple):
+        return pending[1]
+    cached = _cached
+    if PLAYER_CACHE and pending is None and cached is not None:
+        return cached[1]
+    return _load(db)
+
+
+def forget_player(db: Session) -> None:
+    """Clear the cache when ``db`` commits; for bulk writes such as ``/reset``."""
+    db.info[PENDING_KEY] = _STALE
+
+
+def _write(db: Session, player_id: int, values: dict, conditions: list) -> PlayerState | None:
+    generation = _generation
+    row = db.execute(
+        update(Player)
+        .where(Player.id == player_id, *conditions)
+        .values(values)
+        .returning(*_COLUMNS),
+        execution_options={"synchronize_session": False},
+    ).first()
+    if row is None:
+        return None
+    state = PlayerState(*row)
+    seq = record_change(db, "player", state.id)
+    queue_event(db, "gold_changed", {"gold": state.gold})
+    db.info[PENDING_KEY] = (seq, state, generation)
+    return state
+
+
+def _check(player: PlayerState, cost: int, now: datetime, cooldown: str | None) -> None:
+    if player.gold < cost:
+        raise HTTPException(status_code=400, detail="Not enough gold.")
+    ready_at = getattr(player, cooldown) if cooldown else None
+    if ready_at and ready_at > now:
+        remaining = int((ready_at - now).total_seconds())
+        raise HTTPException(
+            status_code=400,
+            detail=f"{COOLDOWN_LABELS[cooldown]} cooldown. Try again in {remaining}s.",
+        )
+
+
+def spend(
+    db: Session,
+    cost: int,
+    now: datetime,
+    cooldown: str | None = None,
+    cooldown_for: timedelta | None = None,
+) -> PlayerState:
+    """Take ``cost`` gold and, with ``cooldown``, restart that cooldown.
+
+    ``cooldown`` names a ``Player`` column; it must have passed and is set to
+    ``now + cooldown_for``. Raises ``HTTPException`` (400) without writing
+    when the player cannot afford it or the cooldown is still running.
+    """
+    values: dict = {"gold": Player.gold - cost}
+    conditions = [Player.gold >= cost]
+    if cooldown:
+        column = getattr(Player, cooldown)
+        values[cooldown] = now + cooldown_for
+        conditions.append(or_(column.is_(None), column <= now))
+
+    state = _write(db, get_player(db).id, values, conditions)
+    if state is None:
+        # Refused, or the cached id is stale; explain from the row itself.
+        player = _load(db)
+        _check(player, cost, now, cooldown)
+        state = _write(db, player.id, values, conditions)
+        if state is None:
+            raise HTTPException(status_code=400, detail="Not enough gold.")
+    return state
+
+
+def earn(db: Session, amount: int) -> PlayerState:
+    values = {"gold": Player.gold + amount}
+    state = _write(db, get_player(db).id, values, [])
+    if state is None:
+        state = _write(db, _load(db).id, values, [])
+    return state
+
+
+@event.listens_for(Session, "after_flush")
+def _orm_writes(session: Session, _flush_context) -> None:
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        if isinstance(instance, Player):
+            session.info[PENDING_KEY] = _STALE
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_player(session: Session) -> None:
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending is _STALE:
+        clear_cache()
+    elif pending is not None:
+        _store(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_player(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
@@ -4,25 +4,54 @@ import random
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from ..aio import offload
+from ..changes import record_changes
 from ..database import get_db
-from ..genetics.breeding import breed
+from ..events import queue_event
+from ..genetics.breeding import breed_encoded
+from ..genetics.odds import offspring_odds
 from ..models import Breeding, Egg, Pet
-from ..schemas import BreedIn, EggOut
+from ..schemas import BreedBatchIn, BreedBatchOut, BreedIn, BreedPreviewOut, EggOut
+from .eggs import _egg_out
 
 router = APIRouter()
 
 BREEDING_COOLDOWN = timedelta(minutes=10)
 EGG_HATCH_SECONDS = 60
+BREED_BATCH_MAX = 100
+
+
+def _resting(pet: Pet, now: datetime) -> str | None:
+    if pet.breeding_locked_until and pet.breeding_locked_until > now:
+        return f"Pet {pet.id} is resting until {pet.breeding_locked_until}."
+    return None
 
 
 def _assert_available(pet: Pet) -> None:
-    if pet.breeding_locked_until and pet.breeding_locked_until > datetime.utcnow():
-        raise HTTPException(
-            status_code=400,
-            detail=f"Pet {pet.id} is resting until {pet.breeding_locked_until}.",
-        )
+    error = _resting(pet, datetime.utcnow())
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+
+def _breed_all(parents: list[tuple[bytes, bytes, bytes, bytes]]) -> list[bytes]:
+    rng = random.Random()
+    return [breed_encoded(*genomes, rng)[0] for genomes in parents]
+
+
+def _pair_error(
+    pair: BreedIn, pets: dict[int, Pet], used: set[int], now: datetime
+) -> str | None:
+    if pair.parent_a_id == pair.parent_b_id:
+        return "Choose two different pets."
+    for pet_id in (pair.parent_a_id, pair.parent_b_id):
+        if pet_id in used:
+            return f"Pet {pet_id} appears in more than one pair."
+    if pair.parent_a_id not in pets or pair.parent_b_id not in pets:
+        return "One or both pets not found."
+    return _resting(pets[pair.parent_a_id], now) or _resting(pets[pair.parent_b_id], now)
 
 
 @router.post("/breed", response_model=EggOut)
@@ -39,18 +68,19 @@ def breed_pets(payload: BreedIn, db: Session = Depends(get_db)):
     _assert_available(parent_b)
 
     rng = random.Random()
-    child_genome, _ = breed(
-        parent_a.genome_json,
-        parent_b.genome_json,
-        parent_a.phenotype_json,
-        parent_b.phenotype_json,
+    child_genome, _ = offload(
+        breed_encoded,
+        parent_a.genome,
+        parent_b.genome,
+        parent_a.phenotype,
+        parent_b.phenotype,
         rng,
     )
 
     now = datetime.utcnow()
     egg = Egg(
         hatch_at=now + timedelta(seconds=EGG_HATCH_SECONDS),
-        genome_json=child_genome,
+        genome=child_genome,
         status="Incubating",
     )
     db.add(egg)
@@ -74,7 +104,93 @@ def breed_pets(payload: BreedIn, db: Session = Depends(get_db)):
         id=egg.id,
         created_at=egg.created_at,
         hatch_at=egg.hatch_at,
-        genome=egg.genome_json,
+        genome=egg.genome_dict,
+        species_seed=egg.species_seed,
         status=egg.status,
         hatched_pet_id=egg.hatched_pet_id,
     )
+
+
+@router.post("/breed/batch", response_model=BreedBatchOut)
+def breed_batch(payload: BreedBatchIn, db: Session = Depends(get_db)):
+    """Breed many pairs in one transaction; each result has an egg or an error.
+
+    A pet may appear in only one pair: later pairs using it fail. Pairs that
+    fail do not stop the others.
+    """
+    if not payload.pairs:
+        raise HTTPException(status_code=400, detail="Give at least one pair.")
+    if len(payload.pairs) > BREED_BATCH_MAX:
+        raise HTTPException(
+            status_code=400, detail=f"At most {BREED_BATCH_MAX} pairs per batch."
+        )
+
+    pet_ids = {pet_id for pair in payload.pairs for pet_id in (pair.parent_a_id, pair.parent_b_id)}
+    pets = {pet.id: pet for pet in db.query(Pet).filter(Pet.id.in_(pet_ids))}
+
+    now = datetime.utcnow()
+    used: set[int] = set()
+    results = []
+    accepted: list[tuple[dict, Pet, Pet]] = []
+    for pair in payload.pairs:
+        result = {"parent_a_id": pair.parent_a_id, "parent_b_id": pair.parent_b_id}
+        results.append(result)
+        error = _pair_error(pair, pets, used, now)
+        used.update((pair.parent_a_id, pair.parent_b_id))
+        if error:
+            result["error"] = error
+        else:
+            accepted.append((result, pets[pair.parent_a_id], pets[pair.parent_b_id]))
+
+    if accepted:
+        genomes = offload(
+            _breed_all,
+            [(a.genome, b.genome, a.phenotype, b.phenotype) for _, a, b in accepted],
+        )
+        hatch_at = now + timedelta(seconds=EGG_HATCH_SECONDS)
+        rows = [
+            {"created_at": now, "hatch_at": hatch_at, "genome": genome, "status": "Incubating"}
+            for genome in genomes
+        ]
+        egg_ids = db.scalars(
+            insert(Egg).returning(Egg.id, sort_by_parameter_order=True), rows
+        ).all()
+        eggs = [Egg(id=egg_id, **row) for egg_id, row in zip(egg_ids, rows)]
+        # Bulk statements skip the flush hooks, so log and announce the eggs here.
+        record_changes(db, "egg", egg_ids)
+        for egg in eggs:
+            queue_event(db, "egg_created", {"egg_id": egg.id, "hatch_at": hatch_at.isoformat()})
+
+        lock_until = now + BREEDING_COOLDOWN
+        breedings = []
+        for (result, parent_a, parent_b), egg in zip(accepted, eggs):
+            breedings.append(
+                {
+                    "parent_a_id": parent_a.id,
+                    "parent_b_id": parent_b.id,
+                    "egg_id": egg.id,
+                    "status": "Created",
+                }
+            )
+            parent_a.breeding_locked_until = lock_until
+            parent_b.breeding_locked_until = lock_until
+            result["egg"] = _egg_out(egg)
+        db.execute(insert(Breeding), breedings)
+        db.commit()
+
+    return {"results": results, "created": len(accepted)}
+
+
+@router.get("/breed/preview", response_model=BreedPreviewOut)
+def preview_breed(parent_a_id: int, parent_b_id: int, db: Session = Depends(get_db)):
+    if parent_a_id == parent_b_id:
+        raise HTTPException(status_code=400, detail="Choose two different pets.")
+
+    parent_a = db.query(Pet).filter(Pet.id == parent_a_id).first()
+    parent_b = db.query(Pet).filter(Pet.id == parent_b_id).first()
+    if not parent_a or not parent_b:
+        raise HTTPException(status_code=404, detail="One or both pets not found.")
+
+    # Genomes never change after hatching, so the odds cache is keyed on them.
+    odds = offload(offspring_odds, parent_a.genome, parent_b.genome)
+    return BreedPreviewOut(parent_a_id=parent_a.id, parent_b_id=parent_b.id, **odds)
@@ -4,19 +4,35 @@ import os
 import random
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 
+from ..aio import offload
+from ..changes import record_changes
 from ..database import get_db
-from ..genetics.emotions import pick_emotion
-from ..genetics.genome import RARE_ALLELES, choose_hidden_loci, get_locus_alleles, random_genome
-from ..genetics.phenotype import genome_to_phenotype
-from ..genetics.rarity import hatch_reward, rarity_profile
-from ..models import Egg, Pet, Player
-from ..schemas import EggOut, HatchIn
+from ..events import queue_event
+from ..genetics.genome import (
+    RARE_ALLELES,
+    choose_hidden_loci,
+    encode_genome,
+    get_locus_alleles,
+    random_genome,
+    random_genome_encoded,
+)
+from ..genetics.phenotype import genome_to_phenotype_encoded
+from ..genetics.rarity import hatch_reward, rarity_profile_encoded
+from ..genetics.sampling import ImportanceWeight, roll
+from ..models import Egg, Pet, public_phenotype, trait_columns
+from ..players import earn, spend
+from ..schemas import EggOut, EggPageOut, HatchIn
 
 router = APIRouter()
+# Encoded phenotype, rarity score, tier and tags computed for a hatching genome.
+PetProfile = tuple[bytes, int, str, list[str]]
 EGG_HATCH_SECONDS = 60
+PAGE_LIMIT_MAX = 200
 ADOPT_EGG_COST = int(os.getenv("ADOPT_EGG_COST", "12"))
 ADOPT_COOLDOWN_SECONDS = int(os.getenv("ADOPT_EGG_COOLDOWN_SECONDS", "300"))
 ADOPT_COOLDOWN = timedelta(seconds=ADOPT_COOLDOWN_SECONDS)
@@ -35,53 +51,68 @@ def _pick_weighted_allele(
     locus: str,
     prefer_rare: bool,
     exclude: set[str] | None = None,
+    importance: ImportanceWeight | None = None,
 ) -> str:
     exclude = exclude or set()
     alleles = [a for a in get_locus_alleles(locus) if a not in exclude]
     if not alleles:
         alleles = get_locus_alleles(locus)
     if prefer_rare and locus in RARE_ALLELES:
-        if rng.random() < PREMIUM_RARE_CHANCE:
+        if roll(rng, "premium_rare", PREMIUM_RARE_CHANCE, importance):
             return rng.choice(RARE_ALLELES[locus])
     return rng.choice(alleles)
 
 
-def premium_genome(rng: random.Random) -> dict:
+def premium_genome(rng: random.Random, importance: ImportanceWeight | None = None) -> dict:
+    """Random genome with boosted aura, rare and shiny odds.
+
+    With ``importance``, rolls are named ``"premium_aura"``, ``"premium_rare"``
+    and ``"premium_shiny"``.
+    """
     genome = random_genome(rng)
 
-    if rng.random() < PREMIUM_AURA_ACTIVE_CHANCE:
-        aura = _pick_weighted_allele(rng, "Aura", prefer_rare=True, exclude={"None"})
+    if roll(rng, "premium_aura", PREMIUM_AURA_ACTIVE_CHANCE, importance):
+        aura = _pick_weighted_allele(
+            rng, "Aura", prefer_rare=True, exclude={"None"}, importance=importance
+        )
         genome["Aura"] = [aura, aura]
 
-    if rng.random() < PREMIUM_RARE_CHANCE:
-        accessory = _pick_weighted_allele(rng, "Accessory", prefer_rare=True)
+    if roll(rng, "premium_rare", PREMIUM_RARE_CHANCE, importance):
+        accessory = _pick_weighted_allele(rng, "Accessory", prefer_rare=True, importance=importance)
         genome["Accessory"] = [accessory, accessory]
 
-    if rng.random() < PREMIUM_RARE_CHANCE:
-        eye_color = _pick_weighted_allele(rng, "EyeColor", prefer_rare=True)
+    if roll(rng, "premium_rare", PREMIUM_RARE_CHANCE, importance):
+        eye_color = _pick_weighted_allele(rng, "EyeColor", prefer_rare=True, importance=importance)
         genome["EyeColor"] = [eye_color, eye_color]
 
-    if rng.random() < PREMIUM_SHINY_CHANCE:
+    if roll(rng, "premium_shiny", PREMIUM_SHINY_CHANCE, importance):
         genome["ShinyGene"] = ["Shiny", "Shiny"]
 
     return genome
 
 
-def _create_pet_from_genome(db: Session, genome: dict) -> Pet:
+def _pet_profiles(genomes: list[bytes]) -> list[PetProfile]:
+    """Phenotype and rarity for each genome; CPU-bound, so callers ``offload`` it."""
+    profiles = []
+    for genome in genomes:
+        phenotype = genome_to_phenotype_encoded(genome)
+        profiles.append((phenotype, *rarity_profile_encoded(phenotype)))
+    return profiles
+
+
+def _create_pet_from_genome(
+    db: Session, genome: bytes, profile: PetProfile | None = None
+) -> Pet:
     rng = random.Random()
-    phenotype = genome_to_phenotype(genome)
-    score, tier, tags = rarity_profile(phenotype)
+    phenotype, score, tier, tags = profile or _pet_profiles([genome])[0]
     hidden_loci = choose_hidden_loci(rng)
-    emotion = pick_emotion(rng, phenotype.get("Personality", "Calm"))
     pet = Pet(
-        genome_json=genome,
-        phenotype_json=phenotype,
+        genome=genome,
+        phenotype=phenotype,
         rarity_score=score,
         rarity_tier=tier,
         rarity_tags_json=tags,
         hidden_loci_json=hidden_loci,
-        emotion=emotion,
-        emotion_updated_at=datetime.utcnow(),
         owner_name="LocalUser",
     )
     db.add(pet)
@@ -89,23 +120,138 @@ def _create_pet_from_genome(db: Session, genome: dict) -> Pet:
     return pet
 
 
-def _get_player(db: Session) -> Player:
-    player = db.query(Player).first()
-    if not player:
-        player = Player(gold=0)
-        db.add(player)
-        db.commit()
-        db.refresh(player)
-    return player
-
-
-def _hatch_egg(db: Session, egg: Egg, player: Player, now: datetime) -> None:
-    pet = _create_pet_from_genome(db, egg.genome_json)
-    reward = hatch_reward(pet.rarity_score, pet.rarity_tier)
-    player.gold += reward
+def _egg_out(egg: Egg, include_genome: bool = True) -> dict:
+    """``EggOut`` fields as plain values, in field order, for ``ORJSONResponse``."""
+    fields = {"id": egg.id, "created_at": egg.created_at, "hatch_at": egg.hatch_at}
+    if include_genome:
+        fields["genome"] = egg.genome_dict
+    fields["species_seed"] = egg.species_seed
+    fields["status"] = egg.status
+    fields["hatched_pet_id"] = egg.hatched_pet_id
+    return fields
+
+
+def _hatch_egg(
+    db: Session,
+    egg: Egg,
+    now: datetime,
+    profile: PetProfile | None = None,
+) -> int:
+    """Hatch ``egg`` into a new pet; returns the gold reward for the caller to ``earn``."""
+    pet = _create_pet_from_genome(db, egg.genome, profile)
     egg.status = "Hatched"
     egg.hatched_pet_id = pet.id
     egg.hatch_at = now
+    return hatch_reward(pet.rarity_score, pet.rarity_tier)
+
+
+def _claim(db: Session, columns: list, conditions: tuple) -> list:
+    return db.execute(
+        update(Egg)
+        .where(Egg.status == "Incubating", *conditions)
+        .values(status="Hatching")
+        .returning(*columns)
+    ).all()
+
+
+def _claim_eggs(db: Session, *conditions) -> list[Egg]:
+    """Incubating eggs matching ``conditions``, marked ``Hatching``, in id order.
+
+    The conditional UPDATE is the transaction's first write, so when two
+    hatchers race for an egg (requests or the auto-hatch scheduler) only one
+    of them claims it.
+    """
+    claimed = [egg_id for (egg_id,) in _claim(db, [Egg.id], conditions)]
+    if not claimed:
+        return []
+    return db.query(Egg).filter(Egg.id.in_(claimed)).order_by(Egg.id).all()
+
+
+def _pet_rows(genomes: list[bytes]) -> list[dict]:
+    """``Pet`` insert rows for hatching ``genomes``; CPU-bound, so callers ``offload`` it."""
+    rng = random.Random()
+    rows = []
+    for genome, (phenotype, score, tier, tags) in zip(genomes, _pet_profiles(genomes)):
+        hidden_loci = choose_hidden_loci(rng)
+        rows.append(
+            {
+                "genome": genome,
+                "phenotype": phenotype,
+                **trait_columns(phenotype),
+                "rarity_score": score,
+                "rarity_tier": tier,
+                "rarity_tags_json": tags,
+                "hidden_loci_json": hidden_loci,
+                "phenotype_public_json": public_phenotype(phenotype, hidden_loci),
+                "owner_name": "LocalUser",
+            }
+        )
+    return rows
+
+
+def _hatch_eggs(db: Session, now: datetime, *conditions) -> list[Egg]:
+    """Claim the incubating eggs matching ``conditions`` and hatch them in bulk.
+
+    The set-based ``_hatch_egg``: one multi-row ``INSERT ... RETURNING`` for the
+    pets, one executemany ``UPDATE`` for the eggs and one ``earn`` for all the
+    rewards. Returns the hatched eggs in id order, detached, for ``_egg_out``.
+    """
+    claimed = sorted(_claim(db, [Egg.id, Egg.created_at, Egg.genome], conditions))
+    if not claimed:
+        return []
+
+    rows = offload(_pet_rows, [genome for _, _, genome in claimed])
+    pet_ids = db.scalars(
+        insert(Pet).returning(Pet.id, sort_by_parameter_order=True), rows
+    ).all()
+    eggs = [
+        Egg(
+            id=egg_id,
+            created_at=created_at,
+            hatch_at=now,
+            genome=genome,
+            status="Hatched",
+            hatched_pet_id=pet_id,
+        )
+        for (egg_id, created_at, genome), pet_id in zip(claimed, pet_ids)
+    ]
+    hatched = [
+        {"id": egg.id, "status": egg.status, "hatched_pet_id": egg.hatched_pet_id, "hatch_at": now}
+        for egg in eggs
+    ]
+    db.execute(update(Egg), hatched)
+    # Bulk statements skip the flush hooks, so log and announce the writes here.
+    record_changes(db, "pet", pet_ids)
+    record_changes(db, "egg", [egg.id for egg in eggs])
+    for egg in eggs:
+        queue_event(db, "egg_hatched", {"egg_id": egg.id, "pet_id": egg.hatched_pet_id})
+    earn(db, sum(hatch_reward(row["rarity_score"], row["rarity_tier"]) for row in rows))
+    return eggs
+
+
+@router.get("/eggs", response_model=EggPageOut)
+def list_eggs(
+    cursor: int | None = None,
+    limit: int = Query(50, ge=1, le=PAGE_LIMIT_MAX),
+    status: str | None = None,
+    include_genome: bool = True,
+    db: Session = Depends(get_db),
+):
+    """Eggs in id order; pass the previous page's ``next_cursor`` as ``cursor``."""
+    query = db.query(Egg)
+    if cursor is not None:
+        query = query.filter(Egg.id > cursor)
+    if status:
+        query = query.filter(Egg.status == status)
+    eggs = query.order_by(Egg.id).limit(limit + 1).all()
+    has_more = len(eggs) > limit
+    eggs = eggs[:limit]
+    return ORJSONResponse(
+        {
+            "items": [_egg_out(egg, include_genome) for egg in eggs],
+            "next_cursor": eggs[-1].id if has_more else None,
+        }
+    )
 
 
 @router.post("/hatch", response_model=EggOut)
@@ -119,116 +265,56 @@ def hatch_egg(payload: HatchIn, db: Session = Depends(get_db)):
     now = datetime.utcnow()
     if egg.hatch_at > now:
         raise HTTPException(status_code=400, detail="Egg is not ready yet.")
+    if not _claim_eggs(db, Egg.id == egg.id):
+        raise HTTPException(status_code=400, detail="Egg already hatched.")
 
-    player = _get_player(db)
-    _hatch_egg(db, egg, player, now)
+    earn(db, _hatch_egg(db, egg, now))
     db.commit()
 
-    return EggOut(
-        id=egg.id,
-        created_at=egg.created_at,
-        hatch_at=egg.hatch_at,
-        genome=egg.genome_json,
-        status=egg.status,
-        hatched_pet_id=egg.hatched_pet_id,
-    )
+    return _egg_out(egg)
 
 
 @router.post("/hatch-all", response_model=list[EggOut])
 def hatch_all_eggs(db: Session = Depends(get_db)):
     now = datetime.utcnow()
-    eggs_ready = (
-        db.query(Egg)
-        .filter(Egg.status == "Incubating", Egg.hatch_at <= now)
-        .all()
-    )
+    eggs_ready = _hatch_eggs(db, now, Egg.hatch_at <= now)
     if not eggs_ready:
         return []
 
-    player = _get_player(db)
-    for egg in eggs_ready:
-        _hatch_egg(db, egg, player, now)
-
     db.commit()
 
-    return [
-        EggOut(
-            id=egg.id,
-            created_at=egg.created_at,
-            hatch_at=egg.hatch_at,
-            genome=egg.genome_json,
-            status=egg.status,
-            hatched_pet_id=egg.hatched_pet_id,
-        )
-        for egg in eggs_ready
-    ]
+    return ORJSONResponse([_egg_out(egg) for egg in eggs_ready])
 
 
 @router.post("/adopt-egg", response_model=EggOut)
 def adopt_egg(db: Session = Depends(get_db)):
     now = datetime.utcnow()
-    player = _get_player(db)
-    if player.gold < ADOPT_EGG_COST:
-        raise HTTPException(status_code=400, detail="Not enough gold.")
-    if player.adopt_egg_ready_at and player.adopt_egg_ready_at > now:
-        remaining = int((player.adopt_egg_ready_at - now).total_seconds())
-        raise HTTPException(
-            status_code=400,
-            detail=f"Adoption cooldown. Try again in {remaining}s.",
-        )
-
-    player.gold -= ADOPT_EGG_COST
-    player.adopt_egg_ready_at = now + ADOPT_COOLDOWN
+    spend(db, ADOPT_EGG_COST, now, "adopt_egg_ready_at", ADOPT_COOLDOWN)
     rng = random.Random()
-    genome = random_genome(rng)
+    genome = random_genome_encoded(rng)
     egg = Egg(
         hatch_at=now + timedelta(seconds=EGG_HATCH_SECONDS),
-        genome_json=genome,
+        genome=genome,
         status="Incubating",
     )
     db.add(egg)
     db.commit()
     db.refresh(egg)
-    return EggOut(
-        id=egg.id,
-        created_at=egg.created_at,
-        hatch_at=egg.hatch_at,
-        genome=egg.genome_json,
-        status=egg.status,
-        hatched_pet_id=egg.hatched_pet_id,
-    )
+    return _egg_out(egg)
 
 
 @router.post("/adopt-egg-premium", response_model=EggOut)
 def adopt_premium_egg(db: Session = Depends(get_db)):
     now = datetime.utcnow()
-    player = _get_player(db)
-    if player.gold < ADOPT_PREMIUM_EGG_COST:
-        raise HTTPException(status_code=400, detail="Not enough gold.")
-    if player.adopt_premium_egg_ready_at and player.adopt_premium_egg_ready_at > now:
-        remaining = int((player.adopt_premium_egg_ready_at - now).total_seconds())
-        raise HTTPException(
-            status_code=400,
-            detail=f"Premium adoption cooldown. Try again in {remaining}s.",
-        )
-
-    player.gold -= ADOPT_PREMIUM_EGG_COST
-    player.adopt_premium_egg_ready_at = now + ADOPT_PREMIUM_COOLDOWN
+    spend(db, ADOPT_PREMIUM_EGG_COST, now, "adopt_premium_egg_ready_at", ADOPT_PREMIUM_COOLDOWN)
     rng = random.Random()
-    genome = premium_genome(rng)
+    genome = encode_genome(premium_genome(rng))
     egg = Egg(
         hatch_at=now + timedelta(seconds=EGG_HATCH_SECONDS),
-        genome_json=genome,
+        genome=genome,
         status="Incubating",
     )
     db.add(egg)
     db.commit()
     db.refresh(egg)
-    return EggOut(
-        id=egg.id,
-        created_at=egg.created_at,
-        hatch_at=egg.hatch_at,
-        genome=egg.genome_json,
-        status=egg.status,
-        hatched_pet_id=egg.hatched_pet_id,
-    )
+    return _egg_out(egg)
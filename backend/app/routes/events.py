@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from ..events import bus
+
+router = APIRouter()
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+
+
+async def _stream():
+    queue = bus.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), EVENT_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line; keeps proxies from closing an idle stream.
+                yield ": keepalive\n\n"
+                continue
+            if item is None:
+                break
+            event_id, kind, data = item
+            yield f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+    finally:
+        bus.unsubscribe(queue)
+
+
+@router.get("/events")
+async def stream_events():
+    """Server-sent events for committed writes and eggs becoming ready."""
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
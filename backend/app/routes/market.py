@@ -2,15 +2,27 @@ from __future__ import annotations
 
 import os
 from datetime import datetime
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 
+from ..changes import entity_version
 from ..database import get_db
-from ..models import MarketListing, Pet
-from ..schemas import ListingBuyIn, ListingCancelIn, ListingCreateIn, ListingOut
+from ..etags import make_etag, matches, not_modified, tagged
+from ..genetics.genome import ALLELE_CODES
+from ..models import TRAIT_COLUMNS, MarketListing, Pet, listing_columns
+from ..schemas import (
+    ListingBuyIn,
+    ListingCancelIn,
+    ListingCreateIn,
+    ListingOut,
+    OrderBookPageOut,
+)
 
 router = APIRouter(prefix="/market", tags=["market"])
+PAGE_LIMIT_MAX = 200
 
 
 def _ensure_enabled() -> None:
@@ -18,29 +30,146 @@ def _ensure_enabled() -> None:
         raise HTTPException(status_code=404, detail="Market is disabled.")
 
 
-def _to_out(listing: MarketListing) -> ListingOut:
-    return ListingOut(
-        id=listing.id,
-        created_at=listing.created_at,
-        pet_id=listing.pet_id,
-        price=listing.price,
-        status=listing.status,
-        seller_name=listing.seller_name,
-        buyer_name=listing.buyer_name,
-        sold_at=listing.sold_at,
-    )
+def _to_out(listing: MarketListing) -> dict:
+    """``ListingOut`` fields as plain values, in field order, for ``ORJSONResponse``."""
+    return {
+        "id": listing.id,
+        "created_at": listing.created_at,
+        "pet_id": listing.pet_id,
+        "price": listing.price,
+        "status": listing.status,
+        "seller_name": listing.seller_name,
+        "buyer_name": listing.buyer_name,
+        "sold_at": listing.sold_at,
+    }
 
 
 @router.get("/listings", response_model=list[ListingOut])
-def get_listings(db: Session = Depends(get_db)):
+def get_listings(if_none_match: str | None = Header(None), db: Session = Depends(get_db)):
+    """Active listings, newest first; tagged with the listings' change log version."""
     _ensure_enabled()
+    etag = make_etag("listings", entity_version(db, "listing"))
+    if matches(if_none_match, etag):
+        return not_modified(etag)
     listings = (
         db.query(MarketListing)
         .filter(MarketListing.status == "Active")
         .order_by(MarketListing.created_at.desc())
         .all()
     )
-    return [_to_out(listing) for listing in listings]
+    return tagged([_to_out(listing) for listing in listings], etag)
+
+
+def _sync_listing(db: Session, pet: Pet) -> None:
+    """Refresh the copied columns of ``pet``'s active listing, e.g. after a reveal."""
+    columns = listing_columns(pet.rarity_tier, pet.phenotype, pet.hidden_loci_json)
+    for listing in db.query(MarketListing).filter(
+        MarketListing.pet_id == pet.id, MarketListing.status == "Active"
+    ):
+        for name, value in columns.items():
+            setattr(listing, name, value)
+
+
+def _parse_cursor(cursor: str, by_price: bool):
+    """The sort key a ``next_cursor`` names: ``price:id`` by price, else ``id``."""
+    parts = cursor.split(":")
+    if len(parts) != (2 if by_price else 1) or not all(part.isdigit() for part in parts):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    values = [int(part) for part in parts]
+    return tuple_(*values) if by_price else values[0]
+
+
+@router.get("/order-book", response_model=OrderBookPageOut)
+def get_order_book(
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=PAGE_LIMIT_MAX),
+    sort: Literal["price", "-price", "newest", "oldest"] = "price",
+    tier: list[str] | None = Query(None),
+    species: str | None = None,
+    element: str | None = None,
+    aura: str | None = None,
+    eye_color: str | None = None,
+    accessory: str | None = None,
+    shiny_gene: str | None = None,
+    min_price: int | None = Query(None, ge=0),
+    max_price: int | None = Query(None, ge=0),
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Active listings with a summary of each pet, cheapest first by default.
+
+    ``sort`` is ``price``, ``-price``, ``newest`` or ``oldest``; pass the
+    previous page's ``next_cursor`` as ``cursor`` with the same filters and
+    sort. Trait filters match only traits the pet shows.
+    """
+    _ensure_enabled()
+    etag = make_etag("listings", entity_version(db, "listing"))
+    if matches(if_none_match, etag):
+        return not_modified(etag)
+
+    query = (
+        db.query(
+            MarketListing,
+            Pet.rarity_score,
+            Pet.rarity_tags_json,
+            Pet.phenotype_public_json,
+        )
+        .join(Pet, Pet.id == MarketListing.pet_id)
+        .filter(MarketListing.status == "Active")
+    )
+    if tier:
+        query = query.filter(MarketListing.rarity_tier.in_(tier))
+    traits = {
+        "Species": species,
+        "Element": element,
+        "Aura": aura,
+        "EyeColor": eye_color,
+        "Accessory": accessory,
+        "ShinyGene": shiny_gene,
+    }
+    for locus, allele in traits.items():
+        if not allele:
+            continue
+        code = ALLELE_CODES[locus].get(allele)
+        if code is None:
+            return tagged({"items": [], "next_cursor": None}, etag)
+        query = query.filter(getattr(MarketListing, TRAIT_COLUMNS[locus]) == code)
+    if min_price is not None:
+        query = query.filter(MarketListing.price >= min_price)
+    if max_price is not None:
+        query = query.filter(MarketListing.price <= max_price)
+
+    # Listing ids grow with ``created_at``, so age is id order. Price ties are
+    # broken by id, which the (status, ..., price) indexes carry as the rowid.
+    by_price = sort in ("price", "-price")
+    descending = sort in ("-price", "newest")
+    key = tuple_(MarketListing.price, MarketListing.id) if by_price else MarketListing.id
+    if cursor is not None:
+        after = _parse_cursor(cursor, by_price)
+        query = query.filter(key < after if descending else key > after)
+    order = [MarketListing.price, MarketListing.id] if by_price else [MarketListing.id]
+    rows = query.order_by(*(c.desc() if descending else c for c in order)).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = [
+        _to_out(listing)
+        | {
+            "pet": {
+                "id": listing.pet_id,
+                "rarity_score": score,
+                "rarity_tier": listing.rarity_tier,
+                "rarity_tags": tags or [],
+                "phenotype_public": phenotype_public,
+            }
+        }
+        for listing, score, tags, phenotype_public in rows
+    ]
+    next_cursor = None
+    if has_more:
+        last = rows[-1][0]
+        next_cursor = f"{last.price}:{last.id}" if by_price else str(last.id)
+    return tagged({"items": items, "next_cursor": next_cursor}, etag)
 
 
 @router.post("/list", response_model=ListingOut)
@@ -66,6 +195,7 @@ def create_listing(payload: ListingCreateIn, db: Session = Depends(get_db)):
         price=payload.price,
         status="Active",
         seller_name=payload.seller_name or pet.owner_name or "LocalUser",
+        **listing_columns(pet.rarity_tier, pet.phenotype, pet.hidden_loci_json),
     )
     db.add(listing)
     db.commit()
@@ -1,20 +1,28 @@
 from __future__ import annotations
 
 import os
-import random
+import zlib
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
+from ..changes import changed_since, current_seq, prune_changes, reset_marker
 from ..database import get_db, init_db
-from ..genetics.emotions import pick_emotion, should_update_emotion
-from ..genetics.genome import choose_hidden_loci
-from ..genetics.phenotype import genome_to_phenotype
-from ..genetics.rarity import hatch_reward, rarity_profile
-from ..models import Egg, Pet, Player
-from ..schemas import EggOut, PetOut, ResetOut, StateOut
+from ..etags import make_etag, matches, not_modified, tagged
+from ..events import queue_event
+from ..genetics.emotions import current_emotion, emotion_epoch
+from ..genetics.genome import ALLELE_CODES, ALLELE_TABLE, LOCUS_INDEX
+from ..genetics.rarity import TIER_ORDER, hatch_reward
+from ..hatcher import AUTO_HATCH
+from ..models import TRAIT_COLUMNS, Egg, MarketListing, Pet, Player
+from ..players import forget_player, get_player
+from ..schemas import PetEmotionPageOut, PetPageOut, ResetOut, StateOut
 from ..seed import seed_db
+from .eggs import _egg_out
+from .market import _to_out as _listing_out
 from .shop import (
     EMOTION_REFRESH_COST,
     INSTANT_HATCH_COST,
@@ -32,6 +40,10 @@ ADOPT_PREMIUM_EGG_COST = int(os.getenv("ADOPT_PREMIUM_EGG_COST", "30"))
 ADOPT_PREMIUM_EGG_COOLDOWN_SECONDS = int(
     os.getenv("ADOPT_PREMIUM_EGG_COOLDOWN_SECONDS", "600")
 )
+PAGE_LIMIT_MAX = 200
+# /pets/emotions rows are two fields, so clients can take bigger pages.
+EMOTION_PAGE_LIMIT_MAX = 1000
+_PERSONALITY = LOCUS_INDEX["Personality"]
 SHOP_NOTES = {
     "en": [
         "Selling removes the pet immediately.",
@@ -42,106 +54,256 @@ SHOP_NOTES = {
         "숨김 파츠에 따라 공개 비용이 달라집니다.",
     ],
 }
+# Part of the /state ETag: the env-configured settings in the body, so a
+# restart with different costs does not revalidate an old response.
+_SETTINGS_TAG = zlib.crc32(
+    repr(
+        (
+            AUTO_HATCH,
+            EMOTION_REFRESH_COST,
+            INSTANT_HATCH_COST,
+            REVEAL_AURA_COST,
+            REVEAL_EYE_COLOR_COST,
+            REVEAL_ACCESSORY_COST,
+            REVEAL_COOLDOWN_SECONDS,
+            ADOPT_EGG_COST,
+            ADOPT_EGG_COOLDOWN_SECONDS,
+            SELL_PRICES,
+            ADOPT_PREMIUM_EGG_COST,
+            ADOPT_PREMIUM_EGG_COOLDOWN_SECONDS,
+            SHOP_NOTES,
+        )
+    ).encode()
+)
+
+
+def _pet_out(pet: Pet, now: datetime, include_genome: bool = True) -> dict:
+    """``PetOut`` fields as plain values, in field order, for ``ORJSONResponse``."""
+    phenotype = pet.phenotype_dict
+    fields = {"id": pet.id, "created_at": pet.created_at}
+    if include_genome:
+        fields["genome"] = pet.genome_dict
+    fields |= {
+        "phenotype": phenotype,
+        "phenotype_public": pet.phenotype_public_json,
+        "rarity_score": pet.rarity_score,
+        "rarity_tier": pet.rarity_tier,
+        "rarity_tags": pet.rarity_tags_json or [],
+        "breeding_locked_until": pet.breeding_locked_until,
+        "hidden_loci": pet.hidden_loci_json or [],
+        "emotion": current_emotion(
+            pet.id,
+            phenotype.get("Personality", "Calm"),
+            pet.emotion,
+            pet.emotion_override_until,
+            now,
+        ),
+        "owner_name": pet.owner_name,
+    }
+    return fields
 
 
-def _get_player(db: Session) -> Player:
-    player = db.query(Player).first()
-    if not player:
-        player = Player(gold=0)
-        db.add(player)
-        db.commit()
-        db.refresh(player)
-    return player
-
-
-def _create_pet_from_genome(db: Session, genome: dict) -> Pet:
-    rng = random.Random()
-    phenotype = genome_to_phenotype(genome)
-    score, tier, tags = rarity_profile(phenotype)
-    hidden_loci = choose_hidden_loci(rng)
-    emotion = pick_emotion(rng, phenotype.get("Personality", "Calm"))
-    pet = Pet(
-        genome_json=genome,
-        phenotype_json=phenotype,
-        rarity_score=score,
-        rarity_tier=tier,
-        rarity_tags_json=tags,
-        hidden_loci_json=hidden_loci,
-        emotion=emotion,
-        emotion_updated_at=datetime.utcnow(),
-        owner_name="LocalUser",
+def _changes_since(
+    db: Session, since: int, seq: int, now: datetime, include_genome: bool
+) -> dict:
+    """``StateChangesOut`` fields."""
+    changed, reset = changed_since(db, since)
+    if reset or since > seq:
+        return {
+            "pets": [],
+            "eggs": [],
+            "listings": [],
+            "deleted": {},
+            "full_reload_required": True,
+        }
+
+    pets = db.query(Pet).filter(Pet.id.in_(changed["pet"])).order_by(Pet.id).all()
+    eggs = db.query(Egg).filter(Egg.id.in_(changed["egg"])).order_by(Egg.id).all()
+    listings = (
+        db.query(MarketListing)
+        .filter(MarketListing.id.in_(changed["listing"]))
+        .order_by(MarketListing.id)
+        .all()
     )
-    db.add(pet)
-    db.flush()
-    return pet
+    deleted = {
+        "pets": sorted(changed["pet"] - {pet.id for pet in pets}),
+        "eggs": sorted(changed["egg"] - {egg.id for egg in eggs}),
+        "listings": sorted(changed["listing"] - {listing.id for listing in listings}),
+    }
+    return {
+        "pets": [_pet_out(pet, now, include_genome) for pet in pets],
+        "eggs": [_egg_out(egg, include_genome) for egg in eggs],
+        "listings": [_listing_out(listing) for listing in listings],
+        "deleted": deleted,
+        "full_reload_required": False,
+    }
 
 
 @router.get("/state", response_model=StateOut)
-def get_state(db: Session = Depends(get_db)):
+def get_state(
+    since: int | None = None,
+    include_genome: bool = True,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Counters and settings; ``since`` adds the rows changed after that ``seq``.
+
+    The ETag covers every write (the change log ``seq``), the emotion epoch
+    and the eggs that have come due, so an unchanged world answers ``304``
+    after those three cheap queries; ``server_time`` is then the time of the
+    cached response. With ``since`` it also covers the latest emotion override
+    to expire, since pets in ``changes`` then show their computed emotion
+    without any write.
+    """
+    now = datetime.utcnow()
+    player = get_player(db)
+    seq = current_seq(db)
+    epoch = emotion_epoch(now)
+    incubating = db.query(Egg).filter(Egg.status == "Incubating")
+    ready_egg_count = incubating.filter(Egg.hatch_at <= now).count()
+    parts = [_SETTINGS_TAG, seq, epoch, ready_egg_count]
+    if since is not None:
+        expired = (
+            db.query(func.max(Pet.emotion_override_until))
+            .filter(Pet.emotion_override_until <= now)
+            .scalar()
+        )
+        parts.append(expired.isoformat() if expired else 0)
+    etag = make_etag(*parts)
+    if matches(if_none_match, etag):
+        return not_modified(etag)
+
+    state = {"seq": seq}
+    if since is not None:
+        state["changes"] = _changes_since(db, since, seq, now, include_genome)
+
+    pet_count_by_tier = {tier: 0 for tier in TIER_ORDER}
+    for tier, count in db.query(Pet.rarity_tier, func.count(Pet.id)).group_by(Pet.rarity_tier):
+        pet_count_by_tier[tier] = count
+    incubating_egg_count, next_hatch_at = incubating.with_entities(
+        func.count(Egg.id), func.min(Egg.hatch_at)
+    ).one()
+
+    state |= {
+        "emotion_epoch": epoch,
+        "pet_count": sum(pet_count_by_tier.values()),
+        "pet_count_by_tier": pet_count_by_tier,
+        "incubating_egg_count": incubating_egg_count,
+        "ready_egg_count": ready_egg_count,
+        "next_hatch_at": next_hatch_at,
+        "auto_hatch": AUTO_HATCH,
+        "server_time": now,
+        "gold": player.gold,
+        "emotion_refresh_cost": EMOTION_REFRESH_COST,
+        "instant_hatch_cost": INSTANT_HATCH_COST,
+        "reveal_aura_cost": REVEAL_AURA_COST,
+        "reveal_eye_color_cost": REVEAL_EYE_COLOR_COST,
+        "reveal_accessory_cost": REVEAL_ACCESSORY_COST,
+        "reveal_cooldown_seconds": REVEAL_COOLDOWN_SECONDS,
+        "reveal_ready_at": player.reveal_ready_at,
+        "adopt_egg_cost": ADOPT_EGG_COST,
+        "adopt_egg_cooldown_seconds": ADOPT_EGG_COOLDOWN_SECONDS,
+        "adopt_egg_ready_at": player.adopt_egg_ready_at,
+        "sell_price_by_tier": SELL_PRICES,
+        "adopt_premium_egg_cost": ADOPT_PREMIUM_EGG_COST,
+        "adopt_premium_egg_cooldown_seconds": ADOPT_PREMIUM_EGG_COOLDOWN_SECONDS,
+        "adopt_premium_egg_ready_at": player.adopt_premium_egg_ready_at,
+        "shop_notes": SHOP_NOTES,
+    }
+    return tagged(state, etag)
+
+
+@router.get("/pets", response_model=PetPageOut)
+def list_pets(
+    cursor: int | None = None,
+    limit: int = Query(50, ge=1, le=PAGE_LIMIT_MAX),
+    tier: list[str] | None = Query(None),
+    species: str | None = None,
+    element: str | None = None,
+    aura: str | None = None,
+    eye_color: str | None = None,
+    accessory: str | None = None,
+    shiny_gene: str | None = None,
+    available: bool | None = None,
+    include_genome: bool = True,
+    db: Session = Depends(get_db),
+):
+    """Pets in id order; pass the previous page's ``next_cursor`` as ``cursor``.
+
+    Trait filters (``species``, ``aura``, ...) match the expressed allele.
+    """
+    now = datetime.utcnow()
+    query = db.query(Pet)
+    if cursor is not None:
+        query = query.filter(Pet.id > cursor)
+    if tier:
+        query = query.filter(Pet.rarity_tier.in_(tier))
+    traits = {
+        "Species": species,
+        "Element": element,
+        "Aura": aura,
+        "EyeColor": eye_color,
+        "Accessory": accessory,
+        "ShinyGene": shiny_gene,
+    }
+    for locus, allele in traits.items():
+        if not allele:
+            continue
+        code = ALLELE_CODES[locus].get(allele)
+        if code is None:
+            return ORJSONResponse({"items": [], "next_cursor": None})
+        query = query.filter(getattr(Pet, TRAIT_COLUMNS[locus]) == code)
+    if available is True:
+        query = query.filter(
+            or_(Pet.breeding_locked_until.is_(None), Pet.breeding_locked_until <= now)
+        )
+    elif available is False:
+        query = query.filter(Pet.breeding_locked_until > now)
+    pets = query.order_by(Pet.id).limit(limit + 1).all()
+    has_more = len(pets) > limit
+    pets = pets[:limit]
+
+    return ORJSONResponse(
+        {
+            "items": [_pet_out(pet, now, include_genome) for pet in pets],
+            "next_cursor": pets[-1].id if has_more else None,
+        }
+    )
+
+
+@router.get("/pets/emotions", response_model=PetEmotionPageOut)
+def list_pet_emotions(
+    cursor: int | None = None,
+    limit: int = Query(500, ge=1, le=EMOTION_PAGE_LIMIT_MAX),
+    db: Session = Depends(get_db),
+):
+    """Each pet's current emotion, in id order and paged like ``/pets``.
+
+    A new emotion epoch changes every pet without a write, so clients refresh
+    just this listing instead of reloading the pets.
+    """
     now = datetime.utcnow()
-    rng = random.Random()
-    player = _get_player(db)
-
-    pets = db.query(Pet).order_by(Pet.id).all()
-    updated = False
-    for pet in pets:
-        if pet.emotion_updated_at and should_update_emotion(pet.emotion_updated_at, now):
-            pet.emotion = pick_emotion(rng, pet.phenotype_json.get("Personality", "Calm"))
-            pet.emotion_updated_at = now
-            updated = True
-    if updated:
-        db.commit()
-    eggs = db.query(Egg).order_by(Egg.id).all()
-
-    return StateOut(
-        pets=[
-            PetOut(
-                id=pet.id,
-                created_at=pet.created_at,
-                genome=pet.genome_json,
-                phenotype=pet.phenotype_json,
-                phenotype_public={
-                    key: ("Unknown" if key in (pet.hidden_loci_json or []) else value)
-                    for key, value in pet.phenotype_json.items()
-                },
-                rarity_score=pet.rarity_score,
-                rarity_tier=pet.rarity_tier,
-                rarity_tags=pet.rarity_tags_json or [],
-                breeding_locked_until=pet.breeding_locked_until,
-                hidden_loci=pet.hidden_loci_json or [],
-                emotion=pet.emotion,
-                owner_name=pet.owner_name,
-            )
-            for pet in pets
-        ],
-        eggs=[
-            EggOut(
-                id=egg.id,
-                created_at=egg.created_at,
-                hatch_at=egg.hatch_at,
-                genome=egg.genome_json,
-                status=egg.status,
-                hatched_pet_id=egg.hatched_pet_id,
-            )
-            for egg in eggs
-        ],
-        server_time=now,
-        gold=player.gold,
-        emotion_refresh_cost=EMOTION_REFRESH_COST,
-        instant_hatch_cost=INSTANT_HATCH_COST,
-        reveal_aura_cost=REVEAL_AURA_COST,
-        reveal_eye_color_cost=REVEAL_EYE_COLOR_COST,
-        reveal_accessory_cost=REVEAL_ACCESSORY_COST,
-        reveal_cooldown_seconds=REVEAL_COOLDOWN_SECONDS,
-        reveal_ready_at=player.reveal_ready_at,
-        adopt_egg_cost=ADOPT_EGG_COST,
-        adopt_egg_cooldown_seconds=ADOPT_EGG_COOLDOWN_SECONDS,
-        adopt_egg_ready_at=player.adopt_egg_ready_at,
-        sell_price_by_tier=SELL_PRICES,
-        adopt_premium_egg_cost=ADOPT_PREMIUM_EGG_COST,
-        adopt_premium_egg_cooldown_seconds=ADOPT_PREMIUM_EGG_COOLDOWN_SECONDS,
-        adopt_premium_egg_ready_at=player.adopt_premium_egg_ready_at,
-        shop_notes=SHOP_NOTES,
+    query = db.query(Pet.id, Pet.phenotype, Pet.emotion, Pet.emotion_override_until)
+    if cursor is not None:
+        query = query.filter(Pet.id > cursor)
+    rows = query.order_by(Pet.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    personalities = ALLELE_TABLE["Personality"]
+    return ORJSONResponse(
+        {
+            "items": [
+                {
+                    "id": pet_id,
+                    "emotion": current_emotion(
+                        pet_id, personalities[phenotype[_PERSONALITY]], emotion, until, now
+                    ),
+                }
+                for pet_id, phenotype, emotion, until in rows
+            ],
+            "next_cursor": rows[-1].id if has_more else None,
+        }
     )
 
 
@@ -154,8 +316,13 @@ def reset_db(db: Session = Depends(get_db)):
     db.query(Egg).delete()
     db.query(Pet).delete()
     db.query(Player).delete()
+    reset_marker(db)
+    forget_player(db)
+    queue_event(db, "reset")
     db.commit()
 
     init_db()
     seed_db(db)
+    prune_changes(db)
+    db.commit()
     return ResetOut(ok=True)
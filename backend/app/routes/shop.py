@@ -8,11 +8,12 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from ..database import get_db
-from ..genetics.emotions import pick_emotion
+from ..genetics.emotions import EMOTION_COOLDOWN, pick_emotion
 from ..genetics.genome import choose_hidden_loci
-from ..genetics.phenotype import genome_to_phenotype
-from ..genetics.rarity import rarity_profile
-from ..models import Egg, MarketListing, Pet, Player
+from ..genetics.phenotype import genome_to_phenotype_encoded
+from ..genetics.rarity import rarity_profile_encoded
+from ..models import Egg, MarketListing, Pet
+from ..players import earn, get_player, spend
 from ..schemas import (
     ShopEmotionIn,
     ShopHatchIn,
@@ -22,6 +23,8 @@ from ..schemas import (
     ShopRevealIn,
     ShopRevealOut,
 )
+from .eggs import _claim_eggs
+from .market import _sync_listing
 
 router = APIRouter(prefix="/shop", tags=["shop"])
 
@@ -45,30 +48,18 @@ SELL_PRICES = {
 }
 
 
-def _get_player(db: Session) -> Player:
-    player = db.query(Player).first()
-    if not player:
-        player = Player(gold=0)
-        db.add(player)
-        db.commit()
-        db.refresh(player)
-    return player
-
-
 @router.post("/refresh-emotion", response_model=ShopResultOut)
 def refresh_emotion(payload: ShopEmotionIn, db: Session = Depends(get_db)):
-    player = _get_player(db)
-    if player.gold < EMOTION_REFRESH_COST:
-        raise HTTPException(status_code=400, detail="Not enough gold.")
-
     pet = db.query(Pet).filter(Pet.id == payload.pet_id).first()
     if not pet:
         raise HTTPException(status_code=404, detail="Pet not found.")
 
-    player.gold -= EMOTION_REFRESH_COST
+    now = datetime.utcnow()
+    player = spend(db, EMOTION_REFRESH_COST, now)
     rng = random.Random()
-    pet.emotion = pick_emotion(rng, pet.phenotype_json.get("Personality", "Calm"))
-    pet.emotion_updated_at = datetime.utcnow()
+    pet.emotion = pick_emotion(rng, pet.phenotype_dict.get("Personality", "Calm"))
+    pet.emotion_updated_at = now
+    pet.emotion_override_until = now + EMOTION_COOLDOWN
     db.commit()
 
     return ShopResultOut(ok=True, gold=player.gold)
@@ -76,30 +67,26 @@ def refresh_emotion(payload: ShopEmotionIn, db: Session = Depends(get_db)):
 
 @router.post("/instant-hatch", response_model=ShopResultOut)
 def instant_hatch(payload: ShopHatchIn, db: Session = Depends(get_db)):
-    player = _get_player(db)
-    if player.gold < INSTANT_HATCH_COST:
-        raise HTTPException(status_code=400, detail="Not enough gold.")
-
     egg = db.query(Egg).filter(Egg.id == payload.egg_id).first()
     if not egg:
         raise HTTPException(status_code=404, detail="Egg not found.")
     if egg.status != "Incubating":
         raise HTTPException(status_code=400, detail="Egg already hatched.")
+    if not _claim_eggs(db, Egg.id == egg.id):
+        raise HTTPException(status_code=400, detail="Egg already hatched.")
 
-    player.gold -= INSTANT_HATCH_COST
+    player = spend(db, INSTANT_HATCH_COST, datetime.utcnow())
     rng = random.Random()
-    phenotype = genome_to_phenotype(egg.genome_json)
-    score, tier, tags = rarity_profile(phenotype)
+    phenotype = genome_to_phenotype_encoded(egg.genome)
+    score, tier, tags = rarity_profile_encoded(phenotype)
     hidden_loci = choose_hidden_loci(rng)
     pet = Pet(
-        genome_json=egg.genome_json,
-        phenotype_json=phenotype,
+        genome=egg.genome,
+        phenotype=phenotype,
         rarity_score=score,
         rarity_tier=tier,
         rarity_tags_json=tags,
         hidden_loci_json=hidden_loci,
-        emotion=pick_emotion(rng, phenotype.get("Personality", "Calm")),
-        emotion_updated_at=datetime.utcnow(),
         owner_name="LocalUser",
     )
     db.add(pet)
@@ -116,7 +103,6 @@ def instant_hatch(payload: ShopHatchIn, db: Session = Depends(get_db)):
 
 @router.post("/sell", response_model=ShopSellOut)
 def sell_pet(payload: ShopSellIn, db: Session = Depends(get_db)):
-    player = _get_player(db)
     pet = db.query(Pet).filter(Pet.id == payload.pet_id).first()
     if not pet:
         raise HTTPException(status_code=404, detail="Pet not found.")
@@ -130,11 +116,10 @@ def sell_pet(payload: ShopSellIn, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Pet is listed on the market.")
 
     payout = SELL_PRICES.get(pet.rarity_tier, SELL_PRICES["Common"])
-    player.gold += payout
+    player = earn(db, payout)
 
-    db.query(Egg).filter(Egg.hatched_pet_id == pet.id).update(
-        {"hatched_pet_id": None}
-    )
+    for egg in db.query(Egg).filter(Egg.hatched_pet_id == pet.id):
+        egg.hatched_pet_id = None
     db.delete(pet)
     db.commit()
 
@@ -146,31 +131,26 @@ def reveal_hidden(payload: ShopRevealIn, db: Session = Depends(get_db)):
     locus = payload.locus or "Aura"
     if locus not in REVEAL_COSTS:
         raise HTTPException(status_code=400, detail="Invalid locus.")
-    player = _get_player(db)
     pet = db.query(Pet).filter(Pet.id == payload.pet_id).first()
     if not pet:
         raise HTTPException(status_code=404, detail="Pet not found.")
 
     hidden = list(pet.hidden_loci_json or [])
     if locus not in hidden:
+        player = get_player(db)
         return ShopRevealOut(ok=True, gold=player.gold, revealed=False, locus=locus)
 
     now = datetime.utcnow()
-    if player.reveal_ready_at and player.reveal_ready_at > now:
-        remaining = int((player.reveal_ready_at - now).total_seconds())
-        raise HTTPException(
-            status_code=400,
-            detail=f"Reveal cooldown. Try again in {remaining}s.",
-        )
-
-    cost = REVEAL_COSTS[locus]
-    if player.gold < cost:
-        raise HTTPException(status_code=400, detail="Not enough gold.")
-
+    player = spend(
+        db,
+        REVEAL_COSTS[locus],
+        now,
+        "reveal_ready_at",
+        timedelta(seconds=REVEAL_COOLDOWN_SECONDS),
+    )
     hidden.remove(locus)
     pet.hidden_loci_json = hidden
-    player.gold -= cost
-    player.reveal_ready_at = now + timedelta(seconds=REVEAL_COOLDOWN_SECONDS)
+    _sync_listing(db, pet)
     db.commit()
 
     return ShopRevealOut(ok=True, gold=player.gold, revealed=True, locus=locus)
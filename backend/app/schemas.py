@@ -9,7 +9,7 @@ from pydantic import BaseModel, Field
 class PetOut(BaseModel):
     id: int
     created_at: datetime
-    genome: dict[str, Any]
+    genome: dict[str, Any] | None = None
     phenotype: dict[str, Any]
     phenotype_public: dict[str, Any]
     rarity_score: int
@@ -25,11 +25,32 @@ class EggOut(BaseModel):
     id: int
     created_at: datetime
     hatch_at: datetime
-    genome: dict[str, Any]
+    genome: dict[str, Any] | None = None
+    species_seed: str
     status: str
     hatched_pet_id: int | None
 
 
+class PetPageOut(BaseModel):
+    items: list[PetOut]
+    next_cursor: int | None
+
+
+class PetEmotionOut(BaseModel):
+    id: int
+    emotion: str
+
+
+class PetEmotionPageOut(BaseModel):
+    items: list[PetEmotionOut]
+    next_cursor: int | None
+
+
+class EggPageOut(BaseModel):
+    items: list[EggOut]
+    next_cursor: int | None
+
+
 class BreedingOut(BaseModel):
     id: int
     created_at: datetime
@@ -39,9 +60,52 @@ class BreedingOut(BaseModel):
     status: str
 
 
-class StateOut(BaseModel):
+class ListingOut(BaseModel):
+    id: int
+    created_at: datetime
+    pet_id: int
+    price: int
+    status: str
+    seller_name: str
+    buyer_name: str | None
+    sold_at: datetime | None
+
+
+class ListingPetOut(BaseModel):
+    id: int
+    rarity_score: int
+    rarity_tier: str
+    rarity_tags: list[str]
+    phenotype_public: dict[str, Any]
+
+
+class OrderBookListingOut(ListingOut):
+    pet: ListingPetOut
+
+
+class OrderBookPageOut(BaseModel):
+    items: list[OrderBookListingOut]
+    next_cursor: str | None
+
+
+class StateChangesOut(BaseModel):
     pets: list[PetOut]
     eggs: list[EggOut]
+    listings: list[ListingOut]
+    deleted: dict[str, list[int]]
+    full_reload_required: bool
+
+
+class StateOut(BaseModel):
+    seq: int
+    changes: StateChangesOut | None = None
+    emotion_epoch: int
+    pet_count: int
+    pet_count_by_tier: dict[str, int]
+    incubating_egg_count: int
+    ready_egg_count: int
+    next_hatch_at: datetime | None
+    auto_hatch: bool
     server_time: datetime
     gold: int
     emotion_refresh_cost: int
@@ -66,6 +130,35 @@ class BreedIn(BaseModel):
     parent_b_id: int = Field(alias="parentBId")
 
 
+class BreedBatchIn(BaseModel):
+    pairs: list[BreedIn]
+
+
+class BreedBatchResultOut(BaseModel):
+    parent_a_id: int
+    parent_b_id: int
+    egg: EggOut | None = None
+    error: str | None = None
+
+
+class BreedBatchOut(BaseModel):
+    results: list[BreedBatchResultOut]
+    created: int
+
+
+class BreedPreviewOut(BaseModel):
+    parent_a_id: int
+    parent_b_id: int
+    mutation_chance: float
+    forced_rare_chance: float
+    species: dict[str, float]
+    phenotype: dict[str, dict[str, float]]
+    tiers: dict[str, float]
+    scores: dict[int, float]
+    rewards: dict[int, float]
+    expected_reward: float
+
+
 class HatchIn(BaseModel):
     egg_id: int = Field(alias="eggId")
 
@@ -74,17 +167,6 @@ class ResetOut(BaseModel):
     ok: bool
 
 
-class ListingOut(BaseModel):
-    id: int
-    created_at: datetime
-    pet_id: int
-    price: int
-    status: str
-    seller_name: str
-    buyer_name: str | None
-    sold_at: datetime | None
-
-
 class ListingCreateIn(BaseModel):
     pet_id: int = Field(alias="petId")
     price: int
@@ -0,0 +1,636 @@
+"""Genetics micro-benchmarks and in-process API request benchmarks.
+
+Run from ``backend/``:
+
+    python tools/benchmark.py run --out reports/bench.json
+    python tools/benchmark.py compare reports/base.json reports/bench.json
+
+Request benchmarks seed a throwaway SQLite database per size and call the app
+through ``TestClient``; the regular ``pets.db`` is never touched. The ``load``
+suite instead starts uvicorn once per ``DB_MODE`` (sync, async) and drives it
+with ``--clients`` concurrent HTTP clients. ``compare``
+exits with status 1 when any benchmark's median slows down by more than
+``--threshold``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from importlib import metadata
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import sessionmaker
+
+from app.genetics.breeding import breed
+from app.genetics.emotions import emotion_at
+from app.genetics.genome import (
+    choose_hidden_loci,
+    choose_mutation_allele,
+    random_genome,
+    random_genome_encoded,
+)
+from app.genetics.phenotype import genome_to_phenotype, genome_to_phenotype_encoded
+from app.genetics.rarity import rarity_profile, rarity_profile_encoded
+
+SUITES = ["genetics", "requests", "concurrency", "load", "all"]
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+LISTED_FRACTION = 0.1
+# Ready eggs hatched per timed /hatch-all call.
+HATCH_BATCHES = (50, 10_000)
+BREED_BATCH = 20
+# Request mix for the load suite: name -> weight.
+LOAD_MIX = {"state": 70, "pets_page": 25, "breed": 5}
+
+
+def measure(
+    func: Callable[[], object],
+    repeat: int,
+    number: int | None = None,
+    setup: Callable[[], object] | None = None,
+) -> dict:
+    """Per-call timings in microseconds over ``repeat`` rounds of ``number`` calls.
+
+    ``number`` is calibrated to ~0.2s per round when omitted. ``setup`` runs
+    untimed before every call.
+    """
+    if number is None:
+        number, _ = timeit.Timer(func).autorange()
+    samples = []
+    for _ in range(repeat):
+        elapsed = 0.0
+        for _ in range(number):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            func()
+            elapsed += time.perf_counter() - start
+        samples.append(elapsed / number * 1e6)
+    return {
+        "unit": "us",
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def bench_genetics(repeat: int) -> dict[str, dict]:
+    from app.routes.eggs import premium_genome
+
+    rng = random.Random(1234)
+    parent_a = random_genome(rng)
+    parent_b = random_genome(rng)
+    phenotype_a = genome_to_phenotype(parent_a)
+    phenotype_b = genome_to_phenotype(parent_b)
+    now = datetime.utcnow()
+
+    cases = {
+        "random_genome": lambda: random_genome(rng),
+        "breed": lambda: breed(parent_a, parent_b, phenotype_a, phenotype_b, rng),
+        "genome_to_phenotype": lambda: genome_to_phenotype(parent_a),
+        "rarity_profile": lambda: rarity_profile(phenotype_a),
+        "choose_mutation_allele": lambda: choose_mutation_allele(rng, "Aura", {"None"}),
+        "premium_genome": lambda: premium_genome(rng),
+        "emotion_at": lambda: emotion_at(rng.randrange(1 << 20), "Bold", now),
+    }
+    results = {}
+    for name, func in cases.items():
+        results[f"genetics.{name}"] = measure(func, repeat)
+        print(f"{name}: {results[f'genetics.{name}']['median']:.2f} us", file=sys.stderr)
+    return results
+
+
+def _pet_rows(count: int, rng: random.Random, now: datetime) -> list[dict]:
+    from app.models import public_phenotype, trait_columns
+
+    rows = []
+    for _ in range(count):
+        genome = random_genome_encoded(rng)
+        phenotype = genome_to_phenotype_encoded(genome)
+        score, tier, tags = rarity_profile_encoded(phenotype)
+        hidden_loci = choose_hidden_loci(rng)
+        rows.append(
+            {
+                "created_at": now,
+                "genome": genome,
+                "phenotype": phenotype,
+                **trait_columns(phenotype),
+                "rarity_score": score,
+                "rarity_tier": tier,
+                "rarity_tags_json": tags,
+                "hidden_loci_json": hidden_loci,
+                "phenotype_public_json": public_phenotype(phenotype, hidden_loci),
+                "owner_name": "LocalUser",
+            }
+        )
+    return rows
+
+
+def _seed(session_factory, pets: int, seed: int) -> None:
+    from app.models import MarketListing, Pet, Player, listing_columns
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with session_factory() as db:
+        db.add(Player(gold=1_000_000_000))
+        pet_rows = []
+        for start in range(0, pets, 10_000):
+            rows = _pet_rows(min(10_000, pets - start), rng, now)
+            db.execute(insert(Pet), rows)
+            pet_rows += rows
+        listed = rng.sample(range(1, pets + 1), int(pets * LISTED_FRACTION))
+        listings = [
+            {
+                "created_at": now,
+                "pet_id": pet_id,
+                "price": rng.randint(10, 500),
+                "status": "Active",
+                "seller_name": "LocalUser",
+                **listing_columns(
+                    pet_rows[pet_id - 1]["rarity_tier"],
+                    pet_rows[pet_id - 1]["phenotype"],
+                    pet_rows[pet_id - 1]["hidden_loci_json"],
+                ),
+            }
+            for pet_id in listed
+        ]
+        db.execute(insert(MarketListing), listings)
+        db.commit()
+
+
+@contextmanager
+def bench_database(size: int, seed: int, pragmas: dict | None = None):
+    """Seed a temporary database and route the app's sessions to it.
+
+    Yields the session factory; ``pragmas`` is passed to ``create_db_engine``.
+    """
+    from app.database import Base, create_db_engine, get_db
+    from app.main import app
+    from app.players import clear_cache
+
+    # The cached player row belongs to whichever database was used last.
+    clear_cache()
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(f"sqlite:///{Path(directory) / 'bench.db'}", pragmas)
+        session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+        Base.metadata.create_all(bind=engine)
+        started = time.perf_counter()
+        _seed(session_factory, size, seed)
+        print(f"seeded {size} pets in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        def override_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            yield session_factory
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            engine.dispose()
+
+
+def _client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    # No ``with`` block: startup hooks would seed the regular database.
+    return TestClient(app)
+
+
+def bench_requests(sizes: list[int], repeat: int, seed: int) -> dict[str, dict]:
+    from app.models import Egg, Pet
+
+    os.environ["ENABLE_MARKET"] = "true"
+    results = {}
+    for size in sizes:
+        with bench_database(size, seed) as session_factory:
+            client = _client()
+            # Breeding locks both parents; every breed call starts with the
+            # locks cleared, so the pairs can repeat at any size and --repeat.
+            pairs = itertools.cycle(range(1, size, 2))
+
+            def call(method: str, path: str, body: dict | None = None) -> None:
+                response = client.request(method, path, json=body)
+                response.raise_for_status()
+
+            def breed_next_pair() -> None:
+                parent = next(pairs)
+                call("POST", "/breed", {"parentAId": parent, "parentBId": parent + 1})
+
+            def breed_next_batch() -> None:
+                batch = [next(pairs) for _ in range(BREED_BATCH)]
+                body = [{"parentAId": parent, "parentBId": parent + 1} for parent in batch]
+                call("POST", "/breed/batch", {"pairs": body})
+
+            def unlock_pets() -> None:
+                with session_factory() as db:
+                    db.execute(update(Pet).values(breeding_locked_until=None))
+                    db.commit()
+
+            def add_ready_eggs(count: int) -> None:
+                genomes = [random_genome_encoded(random.Random()) for _ in range(count)]
+                ready = datetime.utcnow() - timedelta(seconds=1)
+                with session_factory() as db:
+                    db.execute(
+                        insert(Egg),
+                        [
+                            {
+                                "created_at": ready,
+                                "hatch_at": ready,
+                                "genome": genome,
+                                "status": "Incubating",
+                            }
+                            for genome in genomes
+                        ],
+                    )
+                    db.commit()
+
+            cases = {
+                "state": (lambda: call("GET", "/state"), None),
+                "pets_page": (lambda: call("GET", "/pets?limit=50&include_genome=false"), None),
+                "pets_page_200": (lambda: call("GET", "/pets?limit=200"), None),
+                "pets_by_aura": (
+                    lambda: call("GET", "/pets?aura=Prismatic&limit=50&include_genome=false"),
+                    None,
+                ),
+                "breed": (breed_next_pair, unlock_pets),
+                f"breed_batch_{BREED_BATCH}": (breed_next_batch, unlock_pets),
+                "market_listings": (lambda: call("GET", "/market/listings"), None),
+                "market_order_book": (
+                    lambda: call("GET", "/market/order-book?tier=Rare&tier=Epic&limit=50"),
+                    None,
+                ),
+            }
+            for count in HATCH_BATCHES:
+                cases[f"hatch_all_{count}"] = (
+                    lambda: call("POST", "/hatch-all"),
+                    functools.partial(add_ready_eggs, count),
+                )
+            for name, (func, setup) in cases.items():
+                # One untimed warm-up call per endpoint.
+                if setup is not None:
+                    setup()
+                func()
+                key = f"requests.{name}@{size}"
+                results[key] = measure(func, repeat, number=1, setup=setup)
+                print(f"{key}: {results[key]['median'] / 1000:.1f} ms", file=sys.stderr)
+    return results
+
+
+def _latency_stats(samples: list[float], errors: int, duration: float) -> dict:
+    samples = sorted(samples) or [0.0]
+    return {
+        "unit": "us",
+        "median": statistics.median(samples),
+        "min": samples[0],
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "ops_per_s": len(samples) / duration,
+        "errors": errors,
+    }
+
+
+def bench_concurrency(pets: int, readers: int, duration: float, seed: int) -> dict[str, dict]:
+    """``/state`` readers racing a ``/breed`` writer, default vs tuned SQLite pragmas."""
+    from app.models import Pet
+
+    results = {}
+    for label, pragmas in (("sqlite_defaults", {}), ("tuned", None)):
+        with bench_database(pets, seed, pragmas) as session_factory:
+            stop = threading.Event()
+            latencies: dict[str, list[float]] = {"state": [], "breed": []}
+            errors = {"state": 0, "breed": 0}
+
+            def timed(name: str, client, method: str, path: str, body=None) -> None:
+                start = time.perf_counter()
+                try:
+                    client.request(method, path, json=body).raise_for_status()
+                except Exception:
+                    errors[name] += 1
+                    return
+                latencies[name].append((time.perf_counter() - start) * 1e6)
+
+            def reader() -> None:
+                client = _client()
+                while not stop.is_set():
+                    timed("state", client, "GET", "/state")
+
+            def writer() -> None:
+                client = _client()
+                while not stop.is_set():
+                    for parent in range(1, pets, 2):
+                        if stop.is_set():
+                            return
+                        body = {"parentAId": parent, "parentBId": parent + 1}
+                        timed("breed", client, "POST", "/breed", body)
+                    # Every pair is resting now; unlock them for the next lap.
+                    with session_factory() as db:
+                        db.execute(update(Pet).values(breeding_locked_until=None))
+                        db.commit()
+
+            threads = [threading.Thread(target=reader) for _ in range(readers)]
+            threads.append(threading.Thread(target=writer))
+            for thread in threads:
+                thread.start()
+            time.sleep(duration)
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        for name in ("state", "breed"):
+            key = f"concurrency.{name}@{label}"
+            results[key] = _latency_stats(latencies[name], errors[name], duration)
+            print(
+                f"{key}: median {results[key]['median'] / 1000:.1f} ms, "
+                f"p95 {results[key]['p95'] / 1000:.1f} ms, "
+                f"{results[key]['ops_per_s']:.1f}/s, {errors[name]} errors",
+                file=sys.stderr,
+            )
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with status {server.returncode}")
+        try:
+            httpx.get(f"{url}/state", timeout=1.0).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not start within {timeout:.0f}s")
+
+
+async def _drive(url: str, pets: int, clients: int, duration: float, seed: int):
+    import httpx
+
+    latencies: dict[str, list[float]] = {name: [] for name in LOAD_MIX}
+    errors = {name: 0 for name in LOAD_MIX}
+    names, weights = list(LOAD_MIX), list(LOAD_MIX.values())
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+
+        async def worker(index: int, deadline: float) -> None:
+            rng = random.Random(seed * 10_007 + index)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                if name == "state":
+                    request = client.get("/state")
+                elif name == "pets_page":
+                    cursor = rng.randrange(pets)
+                    request = client.get(f"/pets?cursor={cursor}&limit=50&include_genome=false")
+                else:
+                    parent = rng.randrange(1, pets, 2)
+                    body = {"parentAId": parent, "parentBId": parent + 1}
+                    request = client.post("/breed", json=body)
+                start = time.perf_counter()
+                try:
+                    response = await request
+                except httpx.HTTPError:
+                    errors[name] += 1
+                    continue
+                # A resting pair answers 400; it still went through the database.
+                if response.status_code >= 500 or (
+                    response.status_code >= 400 and name != "breed"
+                ):
+                    errors[name] += 1
+                    continue
+                latencies[name].append((time.perf_counter() - start) * 1e6)
+
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(worker(index, deadline) for index in range(clients)))
+    return latencies, errors
+
+
+def bench_load(pets: int, clients: int, duration: float, seed: int) -> dict[str, dict]:
+    """p50/p99 latency of a real uvicorn server in sync vs async ``DB_MODE``."""
+    from app import models  # noqa: F401
+    from app.database import Base, create_db_engine
+
+    results = {}
+    for mode in ("sync", "async"):
+        with tempfile.TemporaryDirectory() as directory:
+            database_url = f"sqlite:///{Path(directory) / 'load.db'}"
+            engine = create_db_engine(database_url)
+            Base.metadata.create_all(bind=engine)
+            _seed(sessionmaker(bind=engine, autoflush=False), pets, seed)
+            engine.dispose()
+
+            port = _free_port()
+            env = {**os.environ, "DATABASE_URL": database_url, "DB_MODE": mode}
+            env.pop("ASYNC_DATABASE_URL", None)
+            server = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "uvicorn",
+                    "app.main:app",
+                    "--port",
+                    str(port),
+                    "--log-level",
+                    "warning",
+                    "--backlog",
+                    str(max(2048, clients * 2)),
+                ],
+                env=env,
+            )
+            url = f"http://127.0.0.1:{port}"
+            try:
+                _wait_ready(url, server)
+                latencies, errors = asyncio.run(_drive(url, pets, clients, duration, seed))
+            finally:
+                server.terminate()
+                server.wait()
+
+        latencies["all"] = [sample for name in LOAD_MIX for sample in latencies[name]]
+        errors["all"] = sum(errors.values())
+        for name in latencies:
+            key = f"load.{name}@{mode}"
+            results[key] = _latency_stats(latencies[name], errors[name], duration)
+            print(
+                f"{key}: p50 {results[key]['median'] / 1000:.1f} ms, "
+                f"p99 {results[key]['p99'] / 1000:.1f} ms, "
+                f"{results[key]['ops_per_s']:.1f}/s, {errors[name]} errors",
+                file=sys.stderr,
+            )
+    return results
+
+
+def _version(package: str) -> str | None:
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def machine_info() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "packages": {
+            name: _version(name)
+            for name in ["fastapi", "sqlalchemy", "pydantic", "numpy", "aiosqlite", "uvicorn"]
+        },
+        "git_commit": commit,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Print a median-to-median table; returns names slower than ``threshold``."""
+    regressions = []
+    old, new = baseline["benchmarks"], current["benchmarks"]
+    width = max((len(name) for name in old.keys() | new.keys()), default=10)
+    for name in sorted(old.keys() | new.keys()):
+        if name not in old or name not in new:
+            print(f"{name:<{width}}  {'only in ' + ('current' if name in new else 'baseline')}")
+            continue
+        ratio = new[name]["median"] / old[name]["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(
+            f"{name:<{width}}  {old[name]['median']:>12.2f}  {new[name]['median']:>12.2f}"
+            f"  {ratio:>6.2f}x{flag}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark genetics and API hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmarks and write JSON results")
+    run_parser.add_argument("--suite", choices=SUITES, default="all")
+    run_parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=DEFAULT_SIZES,
+        help="Comma-separated pet counts for request benchmarks.",
+    )
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument(
+        "--readers",
+        type=int,
+        default=4,
+        help="Concurrent /state readers in the concurrency suite.",
+    )
+    run_parser.add_argument(
+        "--duration",
+        type=float,
+        default=10.0,
+        help="Seconds per concurrency or load run.",
+    )
+    run_parser.add_argument(
+        "--concurrency-pets",
+        type=int,
+        default=1_000,
+        help="Pets seeded for the concurrency and load suites.",
+    )
+    run_parser.add_argument(
+        "--clients",
+        type=int,
+        default=200,
+        help="Concurrent HTTP clients in the load suite.",
+    )
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--out", type=str, default=None)
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Allowed median slowdown as a fraction (default 0.10).",
+    )
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+        return
+
+    benchmarks = {}
+    if args.suite in ("genetics", "all"):
+        benchmarks.update(bench_genetics(args.repeat))
+    if args.suite in ("requests", "all"):
+        benchmarks.update(bench_requests(args.sizes, args.repeat, args.seed))
+    if args.suite in ("concurrency", "all"):
+        benchmarks.update(
+            bench_concurrency(args.concurrency_pets, args.readers, args.duration, args.seed)
+        )
+    if args.suite in ("load", "all"):
+        benchmarks.update(
+            bench_load(args.concurrency_pets, args.clients, args.duration, args.seed)
+        )
+
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    out_path = Path(args.out or f"reports/bench_{timestamp}.json")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    result = {
+        "created_at": datetime.utcnow().isoformat(),
+        "machine": machine_info(),
+        "benchmarks": benchmarks,
+    }
+    out_path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    print(f"Wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
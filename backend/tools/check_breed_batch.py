@@ -0,0 +1,111 @@
+"""Check that ``breed_batch`` matches the scalar ``breed_encoded`` statistically.
+
+For each of ``--pairs`` random parent pairs, breeds ``--children`` children
+with both engines and compares, for every locus, allele position and allele,
+the share of children carrying it, plus the forced rare mutation rate, with a
+two-proportion z-test. Fails if any ``|z|`` exceeds ``--max-z``; the default
+leaves room for the few hundred comparisons per pair. Requires numpy. Run
+from ``backend/``:
+
+    python tools/check_breed_batch.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import sys
+
+import numpy as np
+
+from app.genetics.batch import breed_batch
+from app.genetics.breeding import breed_encoded
+from app.genetics.genome import ALLELE_TABLE, GENOME_WIDTH, LOCI, random_genome_encoded
+from app.genetics.phenotype import genome_to_phenotype_encoded
+
+
+def z_score(hits_a: int, hits_b: int, count: int) -> float:
+    """Two-proportion z for ``hits_a`` and ``hits_b`` out of ``count`` each."""
+    pooled = (hits_a + hits_b) / (2 * count)
+    if pooled in (0.0, 1.0):
+        return 0.0
+    return (hits_a - hits_b) / count / math.sqrt(pooled * (1 - pooled) * 2 / count)
+
+
+def scalar_children(
+    parent_a: bytes, parent_b: bytes, count: int, seed: int
+) -> tuple[np.ndarray, int]:
+    rng = random.Random(seed)
+    phenotype_a = genome_to_phenotype_encoded(parent_a)
+    phenotype_b = genome_to_phenotype_encoded(parent_b)
+    children = np.empty((count, GENOME_WIDTH), dtype=np.uint8)
+    mutated = 0
+    for row in range(count):
+        child, forced = breed_encoded(parent_a, parent_b, phenotype_a, phenotype_b, rng)
+        children[row] = np.frombuffer(child, dtype=np.uint8)
+        mutated += forced
+    return children, mutated
+
+
+def batch_children(
+    parent_a: bytes, parent_b: bytes, count: int, seed: int
+) -> tuple[np.ndarray, int]:
+    parents_a = np.tile(np.frombuffer(parent_a, dtype=np.uint8), (count, 1))
+    parents_b = np.tile(np.frombuffer(parent_b, dtype=np.uint8), (count, 1))
+    children, mutated = breed_batch(parents_a, parents_b, np.random.default_rng(seed))
+    return children, int(mutated.sum())
+
+
+def compare(scalar: np.ndarray, batch: np.ndarray) -> list[tuple[float, str]]:
+    """``(z, label)`` for every locus position and allele seen in either run."""
+    count = len(scalar)
+    scores = []
+    for index, locus in enumerate(LOCI):
+        for position in (index * 2, index * 2 + 1):
+            width = len(ALLELE_TABLE[locus])
+            hits_a = np.bincount(scalar[:, position], minlength=width)
+            hits_b = np.bincount(batch[:, position], minlength=width)
+            for code in np.flatnonzero(hits_a + hits_b):
+                label = f"{locus}[{position % 2}]={ALLELE_TABLE[locus][code]}"
+                scores.append((z_score(int(hits_a[code]), int(hits_b[code]), count), label))
+    return scores
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=4, help="random parent pairs")
+    parser.add_argument("--children", type=int, default=60_000, help="children per engine")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-z", type=float, default=4.5)
+    args = parser.parse_args()
+
+    parent_rng = random.Random(args.seed)
+    ok = True
+    for pair in range(args.pairs):
+        parent_a = random_genome_encoded(parent_rng)
+        parent_b = random_genome_encoded(parent_rng)
+        seed = args.seed * 1000 + pair
+        scalar, scalar_mutated = scalar_children(parent_a, parent_b, args.children, seed)
+        batch, batch_mutated = batch_children(parent_a, parent_b, args.children, seed)
+
+        scores = compare(scalar, batch)
+        forced = z_score(scalar_mutated, batch_mutated, args.children)
+        scores.append((forced, "forced rare rate"))
+        worst, label = max(scores, key=lambda score: abs(score[0]))
+        bad = [score for score in scores if abs(score[0]) > args.max_z]
+        ok = ok and not bad
+        print(
+            f"{'FAIL' if bad else 'ok  '}  pair {pair}: {len(scores)} comparisons, "
+            f"forced rare {scalar_mutated} vs {batch_mutated}, "
+            f"max |z| {abs(worst):.2f} ({label})"
+        )
+        for z, label in bad:
+            print(f"        z={z:+.2f}  {label}")
+    print("ok" if ok else "FAIL")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
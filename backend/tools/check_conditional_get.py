@@ -0,0 +1,136 @@
+"""Check that polling an unchanged world with ``If-None-Match`` loads no rows.
+
+Builds a throwaway SQLite database, polls ``/state?since=0`` and
+``/market/listings`` once for their ETags, then repeats each poll with the tag
+and counts ORM row loads and SQL statements. Every repeat must be a ``304``
+with no row loads, and a write must change the tag, as must an emotion
+override expiring under ``/state?since=``. Run from ``backend/``:
+
+    python tools/check_conditional_get.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import event
+
+POLLS = ("/state?since=0", "/market/listings")
+
+
+def _client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    # No ``with`` block: startup hooks are not needed here.
+    return TestClient(app)
+
+
+def _prepare() -> None:
+    import app.main  # noqa: F401  (registers the change log hooks)
+    from app.database import SessionLocal, init_db
+    from app.models import MarketListing, Pet
+    from app.seed import seed_db
+
+    init_db()
+    with SessionLocal() as db:
+        seed_db(db)
+        pet = db.query(Pet).order_by(Pet.id).first()
+        db.add(MarketListing(pet_id=pet.id, price=10, status="Active"))
+        db.commit()
+
+
+def expire_override(client, path: str) -> bool:
+    """Poll across an emotion override running out, which writes nothing."""
+    from app.database import SessionLocal
+    from app.models import Pet
+
+    with SessionLocal() as db:
+        pet = db.query(Pet).order_by(Pet.id).first()
+        pet.emotion_override_until = datetime.utcnow() + timedelta(seconds=1)
+        db.commit()
+    etag = client.get(path).headers["etag"]
+    time.sleep(1.1)
+    after = client.get(path, headers={"If-None-Match": etag})
+    print(f"  after an emotion override expires: {after.status_code}")
+    return after.status_code == 200 and after.headers.get("etag") != etag
+
+
+def poll(engine, repeats: int) -> bool:
+    from app.database import Base
+
+    client = _client()
+    loads = statements = 0
+
+    def count_load(*_args) -> None:
+        nonlocal loads
+        loads += 1
+
+    def count_statement(*_args) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(Base, "load", count_load, propagate=True)
+    event.listen(engine, "before_cursor_execute", count_statement)
+    ok = True
+    try:
+        for path in POLLS:
+            loads = statements = 0
+            first = client.get(path)
+            etag = first.headers.get("etag")
+            print(f"GET {path}: {first.status_code}, {loads} rows loaded, ETag {etag}")
+            ok = ok and first.status_code == 200 and etag is not None and loads > 0
+
+            loads = statements = 0
+            codes = {
+                client.get(path, headers={"If-None-Match": etag}).status_code
+                for _ in range(repeats)
+            }
+            print(
+                f"  {repeats} conditional polls: status {sorted(codes)}, {loads} rows loaded, "
+                f"{statements / repeats:.1f} queries per poll"
+            )
+            ok = ok and codes == {304} and loads == 0
+
+            if path.startswith("/state"):
+                pet_id = first.json()["changes"]["pets"][-1]["id"]
+                client.post("/shop/sell", json={"petId": pet_id})
+            else:
+                client.post("/market/cancel", json={"listingId": first.json()[0]["id"]})
+            after = client.get(path, headers={"If-None-Match": etag})
+            print(f"  after a write: {after.status_code}, ETag {after.headers.get('etag')}")
+            ok = ok and after.status_code == 200 and after.headers.get("etag") != etag
+            if path.startswith("/state"):
+                ok = expire_override(client, path) and ok
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    print("ok" if ok else "FAIL")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20, help="conditional polls per route")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(directory) / 'polls.db'}"
+        os.environ["ENABLE_MARKET"] = "true"
+        from app.database import engine
+
+        _prepare()
+        ok = poll(engine, args.repeats)
+        engine.dispose()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Check that a database created by an older revision upgrades to this one.
+
+Exports ``backend/app`` at ``--from`` (default: the repository's first commit)
+with ``git archive``, lets that code create and seed ``pets.db`` with an egg and
+a market listing, then starts the current app on the same file. Startup must
+apply every pending migration, leave each table with the columns and indexes
+the models declare, and serve the upgraded rows. Run from ``backend/``:
+
+    python tools/check_migrations.py
+    python tools/check_migrations.py --from 7f8b407
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+
+# Runs inside the old tree, which hard-coded ``sqlite:///./pets.db``.
+OLD_SEED = """
+from datetime import datetime
+
+from app.database import SessionLocal, init_db
+from app.models import Egg, MarketListing, Pet
+from app.seed import seed_db
+
+init_db()
+with SessionLocal() as db:
+    seed_db(db)
+    pet = db.query(Pet).order_by(Pet.id).first()
+    key = "genome_json" if hasattr(Egg, "genome_json") else "genome"
+    db.add(Egg(hatch_at=datetime.utcnow(), **{key: getattr(pet, key)}))
+    db.add(MarketListing(pet_id=pet.id, price=10, status="Active"))
+    db.commit()
+"""
+
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def _git(*args: str) -> bytes:
+    return subprocess.run(["git", *args], cwd=ROOT, check=True, capture_output=True).stdout
+
+
+def create_old_database(revision: str, directory: Path) -> None:
+    archive = _git("archive", f"{revision}:backend/app")
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory / "old" / "app", filter="data")
+    env = os.environ | {
+        "PYTHONPATH": str(directory / "old"),
+        "DATABASE_URL": f"sqlite:///{directory / 'pets.db'}",
+    }
+    subprocess.run([sys.executable, "-c", OLD_SEED], cwd=directory, env=env, check=True)
+
+
+def upgrade(path: Path) -> bool:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import inspect, text
+
+    from app.database import Base, engine
+    from app.main import app
+    from app.migrations import MIGRATIONS
+
+    with TestClient(app) as client:  # startup runs init_db
+        state = client.get("/state")
+        book = client.get("/market/order-book")
+
+    ok = True
+    with engine.connect() as connection:
+        done = set(connection.execute(text("SELECT version FROM schema_migrations")).scalars())
+        missing = {version for version, _name, _migrate in MIGRATIONS} - done
+        print(f"migrations applied: {sorted(done)}")
+        ok = ok and not missing
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            columns = {info["name"] for info in inspector.get_columns(table.name)}
+            indexes = {info["name"] for info in inspector.get_indexes(table.name)}
+            lacking = sorted(
+                ({column.name for column in table.columns} - columns)
+                | ({index.name for index in table.indexes} - indexes)
+            )
+            if lacking:
+                print(f"  {table.name}: missing {', '.join(lacking)}")
+                ok = False
+    print(f"GET /state: {state.status_code}, {state.json()['pet_count']} pets")
+    print(f"GET /market/order-book: {book.status_code}, {len(book.json()['items'])} listings")
+    ok = ok and state.status_code == 200 and book.status_code == 200
+    ok = ok and state.json()["pet_count"] > 0 and len(book.json()["items"]) == 1
+    print("ok" if ok else "FAIL")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--from", dest="revision", help="revision that creates the database")
+    args = parser.parse_args()
+    revision = args.revision or _git("rev-list", "--max-parents=0", "HEAD").decode().split()[0]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "pets.db"
+        create_old_database(revision, Path(directory))
+        print(f"created {path.name} at {revision[:7]}")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        os.environ["ENABLE_MARKET"] = "true"
+        ok = upgrade(path)
+        from app.database import engine
+
+        engine.dispose()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Check that parallel shop requests never lose a gold update.
+
+Builds a throwaway SQLite database, then races ``/shop/refresh-emotion``
+spenders against ``/shop/sell`` earners from several threads and compares the
+final gold with the sum of what the successful requests reported. Also counts
+the SQL statements per request with and without the player cache. Run from
+``backend/``:
+
+    python tools/check_player_concurrency.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+
+from sqlalchemy import event
+
+START_GOLD = 500
+SPEND = "/shop/refresh-emotion"
+
+
+def _client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    # No ``with`` block: startup hooks are not needed here.
+    return TestClient(app)
+
+
+def _prepare(sell_count: int) -> None:
+    from app.database import SessionLocal, init_db
+    from app.models import Pet, Player
+    from app.seed import seed_db
+
+    init_db()
+    with SessionLocal() as db:
+        seed_db(db)
+        template = db.query(Pet).order_by(Pet.id).first()
+        for _ in range(sell_count):
+            db.add(
+                Pet(
+                    genome=template.genome,
+                    phenotype=template.phenotype,
+                    rarity_tier="Common",
+                    owner_name="LocalUser",
+                )
+            )
+        db.query(Player).one().gold = START_GOLD
+        db.commit()
+
+
+def race(threads: int, spends: int) -> bool:
+    from app.database import SessionLocal
+    from app.models import Pet, Player
+
+    with SessionLocal() as db:
+        keep = db.query(Pet.id).order_by(Pet.id).first()[0]
+        for_sale = [pet_id for (pet_id,) in db.query(Pet.id).filter(Pet.id != keep)]
+    statuses: Counter = Counter()
+    payouts: list[int] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(index: int) -> None:
+        client = _client()
+        barrier.wait()
+        mine = for_sale[index::threads]
+        for step in range(spends):
+            response = client.post(SPEND, json={"petId": keep})
+            with lock:
+                statuses[f"spend {response.status_code}"] += 1
+            if step < len(mine):
+                response = client.post("/shop/sell", json={"petId": mine[step]})
+                with lock:
+                    statuses[f"sell {response.status_code}"] += 1
+                    if response.status_code == 200:
+                        payouts.append(response.json()["payout"])
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    from app.routes.shop import EMOTION_REFRESH_COST
+
+    with SessionLocal() as db:
+        gold = db.query(Player).one().gold
+    expected = START_GOLD + sum(payouts) - statuses["spend 200"] * EMOTION_REFRESH_COST
+    cached = _client().get("/state").json()["gold"]
+    print(f"requests: {dict(sorted(statuses.items()))}")
+    print(f"gold: {gold} (expected {expected}, /state {cached})")
+    ok = gold == expected == cached and gold >= 0 and len(payouts) == len(for_sale)
+    print("ok" if ok else "FAIL: lost update")
+    return ok
+
+
+def queries_per_request(engine, samples: int = 20) -> dict[str, dict[str, float]]:
+    from app import players
+    from app.database import SessionLocal
+    from app.models import Pet, Player
+
+    with SessionLocal() as db:
+        pet_id = db.query(Pet.id).order_by(Pet.id).first()[0]
+        db.query(Player).one().gold = 100 * (samples + 1)
+        db.commit()
+    statements = 0
+
+    def count(*_args) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    client = _client()
+    results: dict[str, dict[str, float]] = {}
+    try:
+        for label, cache in (("uncached", False), ("cached", True)):
+            players.PLAYER_CACHE = cache
+            players.clear_cache()
+            for name, call in (
+                ("GET /state", lambda: client.get("/state")),
+                (f"POST {SPEND}", lambda: client.post(SPEND, json={"petId": pet_id})),
+            ):
+                call()
+                statements = 0
+                for _ in range(samples):
+                    call()
+                results.setdefault(name, {})[label] = statements / samples
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+        players.PLAYER_CACHE = True
+    for name, counts in results.items():
+        print(f"{name}: {counts['uncached']:.1f} -> {counts['cached']:.1f} queries per request")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--spends", type=int, default=20, help="spend requests per thread")
+    parser.add_argument("--sells", type=int, default=40, help="pets sold across all threads")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(directory) / 'players.db'}"
+        from app.database import engine
+
+        _prepare(args.sells)
+        ok = race(args.threads, args.spends)
+        counts = queries_per_request(engine)
+        ok = ok and counts["GET /state"]["cached"] < counts["GET /state"]["uncached"]
+        engine.dispose()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Check that the hot route queries are served by an index.
+
+Builds a throwaway SQLite database through ``init_db`` (``create_all`` plus
+migrations), runs ``EXPLAIN QUERY PLAN`` for each query and fails if any
+step scans a table without an index. Run from ``backend/``:
+
+    python tools/check_query_plans.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+
+def _order_book(*order, where=()):
+    from app.models import MarketListing, Pet
+
+    return (
+        select(MarketListing, Pet.rarity_score)
+        .join(Pet, Pet.id == MarketListing.pet_id)
+        .where(MarketListing.status == "Active", *where)
+        .order_by(*order)
+        .limit(51)
+    )
+
+
+def hot_queries() -> dict:
+    from app.models import ChangeLog, Egg, MarketListing, Pet
+
+    now = datetime.utcnow()
+    return {
+        "POST /hatch-all ready eggs": select(Egg).where(
+            Egg.status == "Incubating", Egg.hatch_at <= now
+        ),
+        "GET /market/listings": select(MarketListing)
+        .where(MarketListing.status == "Active")
+        .order_by(MarketListing.created_at.desc()),
+        "POST /market/list, /shop/sell active listing": select(MarketListing).where(
+            MarketListing.pet_id == 1, MarketListing.status == "Active"
+        ),
+        "GET /eggs?status=": select(Egg)
+        .where(Egg.status == "Hatched", Egg.id > 1)
+        .order_by(Egg.id)
+        .limit(25),
+        "POST /shop/sell egg unlink": select(Egg).where(Egg.hatched_pet_id == 1),
+        "GET /state?since change log": select(ChangeLog.entity, ChangeLog.entity_id).where(
+            ChangeLog.seq > 1
+        ),
+        "GET /state?since pruned seq": select(ChangeLog.entity_id)
+        .where(ChangeLog.entity == "pruned")
+        .order_by(ChangeLog.seq.desc())
+        .limit(1),
+        "GET /state?since ETag expired override": select(
+            func.max(Pet.emotion_override_until)
+        ).where(Pet.emotion_override_until <= now),
+        "GET /market/listings ETag version": select(func.max(ChangeLog.seq)).where(
+            ChangeLog.entity == "listing"
+        ),
+        "GET /market/order-book": _order_book(MarketListing.price, MarketListing.id),
+        "GET /market/order-book?tier=&species=": _order_book(
+            MarketListing.price,
+            MarketListing.id,
+            where=[MarketListing.rarity_tier.in_(["Epic"]), MarketListing.species == 1],
+        ),
+        "GET /market/order-book?aura=&sort=-price": _order_book(
+            MarketListing.price.desc(), MarketListing.id.desc(), where=[MarketListing.aura == 4]
+        ),
+        "GET /market/order-book?sort=newest": _order_book(
+            MarketListing.id.desc(), where=[MarketListing.id < 1000]
+        ),
+        "pets by owner": select(Pet).where(Pet.owner_name == "LocalUser"),
+        "GET /pets?aura=": select(Pet).where(Pet.aura == 1, Pet.id > 0).order_by(Pet.id).limit(51),
+    }
+
+
+def query_plan(connection, statement) -> list[str]:
+    compiled = statement.compile(
+        dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params = compiled.construct_params()
+    args = tuple(params[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", args).all()
+    return [row[-1] for row in rows]
+
+
+def unindexed(plan: list[str]) -> list[str]:
+    """Plan steps that read a table without an index (``SCAN <table>``)."""
+    return [
+        step
+        for step in plan
+        if (step.startswith("SCAN ") and "USING" not in step) or "TEMP B-TREE" in step
+    ]
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(directory) / 'plans.db'}"
+        from app.database import engine, init_db
+
+        init_db()
+        failures = 0
+        with engine.connect() as connection:
+            for name, statement in hot_queries().items():
+                plan = query_plan(connection, statement)
+                bad = unindexed(plan)
+                failures += bool(bad)
+                print(f"{'FAIL' if bad else 'ok  '}  {name}")
+                for step in plan:
+                    print(f"        {step}")
+        engine.dispose()
+    if failures:
+        print(f"{failures} quer{'y' if failures == 1 else 'ies'} without an index")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Adaptive Monte Carlo estimate of tier odds with confidence intervals.
+
+Samples independent eggs in batches and stops once every target tier's
+confidence interval half-width is within ``--rel-error`` of its estimate (or
+``--max-samples`` is reached). Sources:
+
+- ``adopt``: ``random_genome`` eggs from ``/adopt-egg``.
+- ``premium``: ``premium_genome`` eggs from ``/adopt-egg-premium``.
+- ``breed``: children of two freshly adopted (or ``--parents premium``) pets.
+
+``--boost NAME=CHANCE`` draws a named roll (``forced_rare``, ``premium_rare``,
+``premium_aura``, ``premium_shiny``) at a higher chance and reweights each
+sample by its likelihood ratio, so rare tiers converge with far fewer draws.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+from pathlib import Path
+from statistics import NormalDist
+
+from app.genetics.breeding import MUTATION_TUNE_MULTIPLIER, breed
+from app.genetics.genome import random_genome
+from app.genetics.phenotype import genome_to_phenotype
+from app.genetics.rarity import TIER_ORDER, hatch_reward, rarity_profile
+from app.genetics.sampling import ImportanceWeight
+from app.routes.eggs import (
+    PREMIUM_AURA_ACTIVE_CHANCE,
+    PREMIUM_RARE_CHANCE,
+    PREMIUM_SHINY_CHANCE,
+    premium_genome,
+)
+
+SOURCES = ["adopt", "premium", "breed"]
+BOOSTS = ["forced_rare", "premium_rare", "premium_aura", "premium_shiny"]
+
+
+class TierEstimator:
+    """Running weighted tier frequencies; ``weight`` is 1 without importance sampling."""
+
+    def __init__(self, confidence: float) -> None:
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.samples = 0
+        self.weight_sum = 0.0
+        self.weight_squares = 0.0
+        self.hits = {tier: 0 for tier in TIER_ORDER}
+        self.sums = {tier: 0.0 for tier in TIER_ORDER}
+        self.squares = {tier: 0.0 for tier in TIER_ORDER}
+        self.reward_sum = 0.0
+
+    def add(self, tier: str, reward: int, weight: float) -> None:
+        self.samples += 1
+        self.weight_sum += weight
+        self.weight_squares += weight * weight
+        self.hits[tier] += 1
+        self.sums[tier] += weight
+        self.squares[tier] += weight * weight
+        self.reward_sum += weight * reward
+
+    def interval(self, tier: str) -> tuple[float, float]:
+        """Estimate and CI half-width for P(tier)."""
+        n = self.samples
+        mean = self.sums[tier] / n
+        if n < 2:
+            return mean, math.inf
+        variance = max(self.squares[tier] - n * mean * mean, 0.0) / (n - 1)
+        return mean, self.z * math.sqrt(variance / n)
+
+    def converged(self, tiers: list[str], rel_error: float, min_hits: int) -> bool:
+        for tier in tiers:
+            mean, half_width = self.interval(tier)
+            if self.hits[tier] < min_hits or half_width > rel_error * mean:
+                return False
+        return True
+
+    def report(self) -> dict:
+        tiers = {}
+        for tier in TIER_ORDER:
+            mean, half_width = self.interval(tier)
+            tiers[tier] = {
+                "probability": mean,
+                "ci_low": max(mean - half_width, 0.0),
+                "ci_high": mean + half_width,
+                "relative_error": half_width / mean if mean else None,
+                "hits": self.hits[tier],
+            }
+        return {
+            "samples": self.samples,
+            "effective_samples": (
+                self.weight_sum**2 / self.weight_squares if self.weight_squares else 0.0
+            ),
+            "tiers": tiers,
+            "mean_hatch_reward": self.reward_sum / self.samples if self.samples else 0.0,
+        }
+
+
+def sample_genome(source: str, parents: str, rng: random.Random, importance) -> dict:
+    if source == "adopt":
+        return random_genome(rng)
+    if source == "premium":
+        return premium_genome(rng, importance)
+
+    if parents == "premium":
+        parent_a, parent_b = premium_genome(rng, importance), premium_genome(rng, importance)
+    else:
+        parent_a, parent_b = random_genome(rng), random_genome(rng)
+    child, _ = breed(
+        parent_a,
+        parent_b,
+        genome_to_phenotype(parent_a),
+        genome_to_phenotype(parent_b),
+        rng,
+        importance,
+    )
+    return child
+
+
+def estimate(args: argparse.Namespace, boosts: dict[str, float]) -> tuple[TierEstimator, bool]:
+    rng = random.Random(args.seed)
+    estimator = TierEstimator(args.confidence)
+    targets = args.tier or TIER_ORDER
+    while estimator.samples < args.max_samples:
+        for _ in range(min(args.batch_size, args.max_samples - estimator.samples)):
+            importance = ImportanceWeight(boosts) if boosts else None
+            genome = sample_genome(args.source, args.parents, rng, importance)
+            score, tier, _ = rarity_profile(genome_to_phenotype(genome))
+            weight = importance.weight if importance else 1.0
+            estimator.add(tier, hatch_reward(score, tier), weight)
+        if estimator.converged(targets, args.rel_error, args.min_hits):
+            return estimator, True
+        progress = ", ".join(
+            f"{tier} {estimator.interval(tier)[0]:.3g}±{estimator.interval(tier)[1]:.2g}"
+            for tier in targets
+        )
+        print(f"{estimator.samples}: {progress}", file=sys.stderr)
+    return estimator, False
+
+
+def parse_boost(value: str) -> tuple[str, float]:
+    name, _, chance = value.partition("=")
+    if name not in BOOSTS:
+        raise argparse.ArgumentTypeError(f"unknown roll {name!r}; choose from {BOOSTS}")
+    try:
+        proposal = float(chance)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid chance {chance!r}") from None
+    if not 0 < proposal < 1:
+        raise argparse.ArgumentTypeError("boosted chance must be between 0 and 1")
+    return name, proposal
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Estimate tier odds until a target precision")
+    parser.add_argument("--source", choices=SOURCES, default="premium")
+    parser.add_argument(
+        "--parents",
+        choices=["adopt", "premium"],
+        default="adopt",
+        help="Parent egg type for --source breed.",
+    )
+    parser.add_argument(
+        "--tier",
+        choices=TIER_ORDER,
+        action="append",
+        help="Tier(s) that must reach --rel-error. Defaults to every tier.",
+    )
+    parser.add_argument("--rel-error", type=float, default=0.05)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument(
+        "--min-hits",
+        type=int,
+        default=30,
+        help="Samples a target tier needs before its interval is trusted.",
+    )
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--max-samples", type=int, default=10_000_000)
+    parser.add_argument(
+        "--boost",
+        type=parse_boost,
+        action="append",
+        default=[],
+        metavar="NAME=CHANCE",
+        help=f"Importance-sample a roll at CHANCE. Rolls: {', '.join(BOOSTS)}.",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", type=str, default=None)
+    args = parser.parse_args()
+
+    boosts = dict(args.boost)
+    estimator, converged = estimate(args, boosts)
+    result = {
+        "source": args.source,
+        "parents": args.parents if args.source == "breed" else None,
+        "seed": args.seed,
+        "confidence": args.confidence,
+        "rel_error": args.rel_error,
+        "targets": args.tier or TIER_ORDER,
+        "boosts": boosts,
+        "settings": {
+            "BREEDING_MUTATION_MULTIPLIER": MUTATION_TUNE_MULTIPLIER,
+            "ADOPT_PREMIUM_RARE_CHANCE": PREMIUM_RARE_CHANCE,
+            "ADOPT_PREMIUM_AURA_ACTIVE_CHANCE": PREMIUM_AURA_ACTIVE_CHANCE,
+            "ADOPT_PREMIUM_SHINY_CHANCE": PREMIUM_SHINY_CHANCE,
+        },
+        "converged": converged,
+        **estimator.report(),
+    }
+    text = json.dumps(result, indent=2)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Streaming report writers for simulate_breeding and a columnar reader.
+
+Formats:
+- ``json``: the legacy pretty-printed ``pets.json`` array, streamed row by row.
+- ``ndjson``: one compact JSON object per line, optionally gzip-compressed.
+- ``columnar``: a directory holding one raw array file per locus (allele code,
+  uint8) plus ``rarity_score`` (uint16) and ``rarity_tier`` (uint8 index), and
+  a ``manifest.json`` describing row count, dtypes and decode tables.
+
+Run ``python tools/sim_report.py <columns dir>`` to print tier counts from a
+memory-mapped columnar report.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sys
+from array import array
+from pathlib import Path
+
+SCORE_COLUMN = "rarity_score"
+TIER_COLUMN = "rarity_tier"
+MANIFEST = "manifest.json"
+
+
+class JsonArrayWriter:
+    """Writes the same bytes as ``json.dumps(rows, indent=2)`` without holding rows."""
+
+    def __init__(self, path: Path) -> None:
+        self._file = path.open("w", encoding="utf-8")
+        self._rows = 0
+
+    def write(self, record: dict) -> None:
+        body = json.dumps(record, indent=2).replace("\n", "\n  ")
+        self._file.write(("[\n  " if self._rows == 0 else ",\n  ") + body)
+        self._rows += 1
+
+    def close(self) -> None:
+        self._file.write("\n]" if self._rows else "[]")
+        self._file.close()
+
+
+class NdjsonWriter:
+    def __init__(self, path: Path, compress: bool = False) -> None:
+        if compress:
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            self._file = path.open("w", encoding="utf-8")
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")))
+        self._file.write("\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ColumnarWriter:
+    """Appends encoded rows to per-column files, flushing every ``chunk_rows``."""
+
+    def __init__(
+        self,
+        directory: Path,
+        loci: list[str],
+        alleles: dict[str, list[str]],
+        tiers: list[str],
+        chunk_rows: int = 65536,
+    ) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self._directory = directory
+        self._loci = loci
+        self._alleles = alleles
+        self._tiers = tiers
+        self._tier_index = {tier: index for index, tier in enumerate(tiers)}
+        self._chunk_rows = chunk_rows
+        self._rows = 0
+        self._buffered = 0
+        self._files = {
+            name: (directory / f"{name}.bin").open("wb")
+            for name in [*loci, SCORE_COLUMN, TIER_COLUMN]
+        }
+        self._phenotypes = [bytearray() for _ in loci]
+        self._scores = array("H")
+        self._tier_codes = bytearray()
+
+    def write_encoded(self, phenotype: bytes, score: int, tier: str) -> None:
+        for column, code in zip(self._phenotypes, phenotype):
+            column.append(code)
+        self._scores.append(score)
+        self._tier_codes.append(self._tier_index[tier])
+        self._buffered += 1
+        if self._buffered >= self._chunk_rows:
+            self._flush()
+
+    def write_columns(self, phenotypes, scores, tiers) -> None:
+        """Append numpy batches: ``(N, loci)`` codes, scores and tier indexes."""
+        self._flush()
+        for index, locus in enumerate(self._loci):
+            self._files[locus].write(phenotypes[:, index].astype("uint8").tobytes())
+        self._files[SCORE_COLUMN].write(scores.astype("<u2").tobytes())
+        self._files[TIER_COLUMN].write(tiers.astype("uint8").tobytes())
+        self._rows += len(phenotypes)
+
+    def _flush(self) -> None:
+        if not self._buffered:
+            return
+        for locus, column in zip(self._loci, self._phenotypes):
+            self._files[locus].write(column)
+            column.clear()
+        if sys.byteorder == "big":
+            self._scores.byteswap()
+        self._files[SCORE_COLUMN].write(self._scores.tobytes())
+        self._files[TIER_COLUMN].write(self._tier_codes)
+        del self._scores[:]
+        self._tier_codes.clear()
+        self._rows += self._buffered
+        self._buffered = 0
+
+    def close(self) -> None:
+        self._flush()
+        for file in self._files.values():
+            file.close()
+        columns = {locus: {"file": f"{locus}.bin", "dtype": "uint8"} for locus in self._loci}
+        columns[SCORE_COLUMN] = {"file": f"{SCORE_COLUMN}.bin", "dtype": "<u2"}
+        columns[TIER_COLUMN] = {"file": f"{TIER_COLUMN}.bin", "dtype": "uint8"}
+        manifest = {
+            "rows": self._rows,
+            "columns": columns,
+            "alleles": {locus: self._alleles[locus] for locus in self._loci},
+            "tiers": self._tiers,
+        }
+        (self._directory / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+def read_columnar(directory: str | Path) -> tuple[dict, dict]:
+    """Memory-map a columnar report; returns ``(manifest, {column: ndarray})``."""
+    import numpy as np
+
+    directory = Path(directory)
+    manifest = json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+    rows = manifest["rows"]
+    columns = {}
+    for name, spec in manifest["columns"].items():
+        if rows == 0:
+            columns[name] = np.empty(0, dtype=spec["dtype"])
+            continue
+        columns[name] = np.memmap(
+            directory / spec["file"], dtype=spec["dtype"], mode="r", shape=(rows,)
+        )
+    return manifest, columns
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize a columnar simulation report")
+    parser.add_argument("directory", nargs="+")
+    args = parser.parse_args()
+
+    import numpy as np
+
+    totals: dict[str, int] = {}
+    for directory in args.directory:
+        manifest, columns = read_columnar(directory)
+        counts = np.bincount(columns[TIER_COLUMN], minlength=len(manifest["tiers"]))
+        for tier, count in zip(manifest["tiers"], counts.tolist()):
+            totals[tier] = totals.get(tier, 0) + count
+    print(json.dumps(totals, indent=2))
+
+
+if __name__ == "__main__":
+    main()
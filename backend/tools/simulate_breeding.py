@@ -4,13 +4,180 @@ import argparse
 import csv
 import json
 import random
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
-from app.genetics.breeding import breed
-from app.genetics.genome import random_genome
-from app.genetics.phenotype import genome_to_phenotype
-from app.genetics.rarity import rarity_profile
+from app.genetics.breeding import breed_encoded
+from app.genetics.genome import (
+    ALLELE_TABLE,
+    GENOME_WIDTH,
+    LOCI,
+    decode_phenotype,
+    random_genome_encoded,
+)
+from app.genetics.phenotype import genome_to_phenotype_encoded
+from app.genetics.rarity import TIER_ORDER, hatch_reward, rarity_profile_encoded
+from sim_report import ColumnarWriter, JsonArrayWriter, NdjsonWriter
+
+Counts = dict[tuple[str, int], int]
+FORMATS = ["json", "ndjson", "columnar", "none"]
+MAX_PARENTS = 100_000
+
+
+def open_writer(fmt: str, out_dir: Path, shard: int | None, compress: bool):
+    suffix = "" if shard is None else f"-{shard:03d}"
+    if fmt == "json":
+        return JsonArrayWriter(out_dir / f"pets{suffix}.json")
+    if fmt == "ndjson":
+        name = f"pets{suffix}.ndjson" + (".gz" if compress else "")
+        return NdjsonWriter(out_dir / name, compress=compress)
+    if fmt == "columnar":
+        return ColumnarWriter(out_dir / f"columns{suffix}", LOCI, ALLELE_TABLE, TIER_ORDER)
+    return None
+
+
+def emit(writer, phenotype: bytes, score: int, tier: str, tags: list[str]) -> None:
+    if isinstance(writer, ColumnarWriter):
+        writer.write_encoded(phenotype, score, tier)
+        return
+    writer.write(
+        {
+            "phenotype": decode_phenotype(phenotype),
+            "rarity_score": score,
+            "rarity_tier": tier,
+            "rarity_tags": tags,
+        }
+    )
+
+
+def run_scalar(
+    seed: int | None, count: int, parent_count: int, max_parents: int, writer
+) -> tuple[Counts, int]:
+    rng = random.Random(seed)
+
+    parents = []
+    for _ in range(parent_count):
+        genome = random_genome_encoded(rng)
+        parents.append((genome, genome_to_phenotype_encoded(genome)))
+
+    # Genomes and phenotypes stay in the compact bytes form during the run;
+    # children are streamed to the writer and only tallies are kept. Once
+    # ``max_parents`` pets are held, each child replaces a random one
+    # (reservoir sampling), so the pool stays a uniform sample of every pet.
+    counts: Counts = {}
+    mutated_total = 0
+    for bred in range(parent_count, parent_count + count):
+        parent_a_genome, parent_a_phenotype = rng.choice(parents)
+        parent_b_genome, parent_b_phenotype = rng.choice(parents)
+        child_genome, mutated = breed_encoded(
+            parent_a_genome,
+            parent_b_genome,
+            parent_a_phenotype,
+            parent_b_phenotype,
+            rng,
+        )
+        mutated_total += mutated
+        child_phenotype = genome_to_phenotype_encoded(child_genome)
+        score, tier, tags = rarity_profile_encoded(child_phenotype)
+        counts[(tier, score)] = counts.get((tier, score), 0) + 1
+        if writer is not None:
+            emit(writer, child_phenotype, score, tier, tags)
+        if len(parents) < max_parents:
+            parents.append((child_genome, child_phenotype))
+        else:
+            slot = rng.randrange(bred + 1)
+            if slot < max_parents:
+                parents[slot] = (child_genome, child_phenotype)
+
+    return counts, mutated_total
+
+
+def run_vectorized(
+    seed: int | None, count: int, parent_count: int, max_parents: int, batch_size: int, writer
+) -> tuple[Counts, int]:
+    import numpy as np
+
+    from app.genetics.batch import breed_batch, phenotype_batch, random_genomes, rarity_batch
+
+    rng = np.random.default_rng(seed)
+    pool = np.empty((min(parent_count + count, max_parents), GENOME_WIDTH), dtype=np.uint8)
+    pool[:parent_count] = random_genomes(parent_count, rng)
+    size = parent_count
+    bred = parent_count
+
+    # Each batch draws its parents from the pool as it was when the batch
+    # started; past ``max_parents`` children replace random slots as in
+    # ``run_scalar``.
+    counts: Counts = {}
+    mutated_total = 0
+    remaining = count
+    while remaining > 0:
+        batch = min(batch_size, remaining)
+        parents_a = pool[rng.integers(0, size, size=batch)]
+        parents_b = pool[rng.integers(0, size, size=batch)]
+        children, mutated = breed_batch(parents_a, parents_b, rng)
+        mutated_total += int(mutated.sum())
+        phenotypes = phenotype_batch(children)
+        scores, tiers = rarity_batch(phenotypes)
+        if isinstance(writer, ColumnarWriter):
+            writer.write_columns(phenotypes, scores, tiers)
+        elif writer is not None:
+            for phenotype in phenotypes:
+                score, tier, tags = rarity_profile_encoded(phenotype.tobytes())
+                emit(writer, phenotype.tobytes(), score, tier, tags)
+        keys, totals = np.unique(np.stack([tiers, scores], axis=1), axis=0, return_counts=True)
+        for (tier, score), total in zip(keys.tolist(), totals.tolist()):
+            key = (TIER_ORDER[tier], score)
+            counts[key] = counts.get(key, 0) + total
+        fill = min(batch, len(pool) - size)
+        pool[size : size + fill] = children[:fill]
+        size += fill
+        if fill < batch:
+            slots = rng.integers(0, np.arange(bred + fill, bred + batch) + 1)
+            keep = slots < len(pool)
+            pool[slots[keep]] = children[fill:][keep]
+        bred += batch
+        remaining -= batch
+    return counts, mutated_total
+
+
+def run(args: argparse.Namespace, seed: int | None, count: int, shard: int | None):
+    writer = open_writer(args.format, Path(args.out), shard, args.gzip)
+    try:
+        if args.vectorized:
+            return run_vectorized(
+                seed, count, args.parents, args.max_parents, args.batch_size, writer
+            )
+        return run_scalar(seed, count, args.parents, args.max_parents, writer)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def shard_plan(seed: int, count: int, workers: int) -> list[tuple[int, int]]:
+    """Reproducible (seed, count) per shard derived from the run seed."""
+    seeder = random.Random(seed)
+    base, extra = divmod(count, workers)
+    return [(seeder.getrandbits(64), base + (shard < extra)) for shard in range(workers)]
+
+
+def summarize(counts: Counts, mutated: int) -> dict:
+    total = sum(counts.values())
+    tiers = {tier: 0 for tier in TIER_ORDER}
+    score_sum = 0
+    reward_sum = 0
+    for (tier, score), count in counts.items():
+        tiers[tier] += count
+        score_sum += score * count
+        reward_sum += hatch_reward(score, tier) * count
+    return {
+        "count": total,
+        "tiers": tiers,
+        "mean_score": score_sum / total if total else 0.0,
+        "mean_hatch_reward": reward_sum / total if total else 0.0,
+        "forced_rare_mutations": mutated,
+    }
 
 
 def main() -> None:
@@ -19,48 +186,65 @@ def main() -> None:
     parser.add_argument("--seed", type=int, default=None)
     parser.add_argument("--out", type=str, default=None)
     parser.add_argument("--parents", type=int, default=6)
+    parser.add_argument(
+        "--max-parents",
+        type=int,
+        default=MAX_PARENTS,
+        help="Cap on the breeding pool, which bounds memory for any --count. Past "
+        "it each child replaces a random parent, keeping a uniform sample of "
+        f"every pet bred (default {MAX_PARENTS}).",
+    )
+    parser.add_argument(
+        "--vectorized",
+        action="store_true",
+        help="Breed in numpy batches (requires numpy).",
+    )
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Split the run into this many independently seeded lineages, one per "
+        "process. Per-child reports get a -NNN shard suffix.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default=None,
+        help="Per-child report format. Defaults to json (pets.json) for plain runs "
+        "and none for --vectorized or --workers runs.",
+    )
+    parser.add_argument("--gzip", action="store_true", help="Compress ndjson output.")
     args = parser.parse_args()
+    if args.max_parents < args.parents:
+        parser.error("--max-parents must be at least --parents")
 
-    rng = random.Random(args.seed)
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     out_dir = Path(args.out or f"reports/run_{timestamp}")
     out_dir.mkdir(parents=True, exist_ok=True)
+    args.out = str(out_dir)
+    if args.format is None:
+        args.format = "none" if args.vectorized or args.workers > 1 else "json"
 
-    parents = []
-    for _ in range(args.parents):
-        genome = random_genome(rng)
-        phenotype = genome_to_phenotype(genome)
-        parents.append({"genome": genome, "phenotype": phenotype})
-
-    results = []
-    for _ in range(args.count):
-        parent_a = rng.choice(parents)
-        parent_b = rng.choice(parents)
-        child_genome, _ = breed(
-            parent_a["genome"],
-            parent_b["genome"],
-            parent_a["phenotype"],
-            parent_b["phenotype"],
-            rng,
-        )
-        child_phenotype = genome_to_phenotype(child_genome)
-        score, tier, tags = rarity_profile(child_phenotype)
-        results.append(
-            {
-                "phenotype": child_phenotype,
-                "rarity_score": score,
-                "rarity_tier": tier,
-                "rarity_tags": tags,
-            }
-        )
-        parents.append({"genome": child_genome, "phenotype": child_phenotype})
-
-    (out_dir / "pets.json").write_text(json.dumps(results, indent=2), encoding="utf-8")
-
-    counts: dict[tuple[str, int], int] = {}
-    for pet in results:
-        key = (pet["rarity_tier"], pet["rarity_score"])
-        counts[key] = counts.get(key, 0) + 1
+    if args.workers > 1:
+        if args.seed is None:
+            args.seed = random.SystemRandom().getrandbits(32)
+        plan = shard_plan(args.seed, args.count, args.workers)
+        counts: Counts = {}
+        mutated = 0
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [
+                pool.submit(run, args, seed, count, shard)
+                for shard, (seed, count) in enumerate(plan)
+            ]
+            # Merge in shard order; integer sums keep the result exact.
+            for future in futures:
+                shard_counts, shard_mutated = future.result()
+                mutated += shard_mutated
+                for key, count in shard_counts.items():
+                    counts[key] = counts.get(key, 0) + count
+    else:
+        counts, mutated = run(args, args.seed, args.count, None)
 
     with (out_dir / "rarity.csv").open("w", newline="") as f:
         writer = csv.writer(f)
@@ -68,6 +252,9 @@ def main() -> None:
         for (tier, score), count in sorted(counts.items()):
             writer.writerow([tier, score, count])
 
+    summary = {"seed": args.seed, "workers": args.workers, **summarize(counts, mutated)}
+    (out_dir / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
     print(f"Wrote reports to {out_dir}")
 
 
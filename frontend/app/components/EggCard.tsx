@@ -54,7 +54,7 @@ export default function EggCard({
           {labels.timeLeft}: {hatched ? "0m 0s" : ready ? "0m 0s" : formatCountdown(remaining)}
         </p>
         <p>
-          {labels.speciesSeed}: {egg.genome.Species?.[0]}
+          {labels.speciesSeed}: {egg.species_seed}
         </p>
       </div>
 
@@ -1,7 +1,7 @@
 export type Pet = {
   id: number;
   created_at: string;
-  genome: Record<string, string[]>;
+  genome?: Record<string, string[]>;
   phenotype: Record<string, string>;
   phenotype_public?: Record<string, string>;
   rarity_score: number;
@@ -12,18 +12,61 @@ export type Pet = {
   emotion?: string;
 };
 
+export type PetEmotion = {
+  id: number;
+  emotion: string;
+};
+
 export type Egg = {
   id: number;
   created_at: string;
   hatch_at: string;
-  genome: Record<string, string[]>;
+  genome?: Record<string, string[]>;
+  species_seed: string;
   status: string;
   hatched_pet_id: number | null;
 };
 
-export type State = {
+export type Page<T> = {
+  items: T[];
+  next_cursor: number | null;
+};
+
+export type PetFilters = {
+  tier?: string[];
+  species?: string;
+  element?: string;
+  aura?: string;
+  eyeColor?: string;
+  accessory?: string;
+  shinyGene?: string;
+  available?: boolean;
+  includeGenome?: boolean;
+};
+
+export type EggFilters = {
+  status?: string;
+  includeGenome?: boolean;
+};
+
+export type StateChanges = {
   pets: Pet[];
   eggs: Egg[];
+  listings: Listing[];
+  deleted: Record<"pets" | "eggs" | "listings", number[]>;
+  full_reload_required: boolean;
+};
+
+export type State = {
+  seq: number;
+  changes?: StateChanges;
+  emotion_epoch: number;
+  pet_count: number;
+  pet_count_by_tier: Record<string, number>;
+  incubating_egg_count: number;
+  ready_egg_count: number;
+  next_hatch_at: string | null;
+  auto_hatch: boolean;
   server_time: string;
   gold: number;
   emotion_refresh_cost: number;
@@ -54,6 +97,40 @@ export type Listing = {
   sold_at: string | null;
 };
 
+export type OrderBookListing = Listing & {
+  pet: {
+    id: number;
+    rarity_score: number;
+    rarity_tier: string;
+    rarity_tags: string[];
+    phenotype_public: Record<string, string>;
+  };
+};
+
+export type OrderBookPage = {
+  items: OrderBookListing[];
+  next_cursor: string | null;
+};
+
+export type OrderBookFilters = Omit<PetFilters, "available" | "includeGenome"> & {
+  sort?: "price" | "-price" | "newest" | "oldest";
+  minPrice?: number;
+  maxPrice?: number;
+};
+
+export type BreedPreview = {
+  parent_a_id: number;
+  parent_b_id: number;
+  mutation_chance: number;
+  forced_rare_chance: number;
+  species: Record<string, number>;
+  phenotype: Record<string, Record<string, number>>;
+  tiers: Record<string, number>;
+  scores: Record<string, number>;
+  rewards: Record<string, number>;
+  expected_reward: number;
+};
+
 const BASE_URL = process.env.NEXT_PUBLIC_API_BASE || "http://localhost:8000";
 
 async function request<T>(path: string, options?: RequestInit): Promise<T> {
@@ -70,8 +147,103 @@ async function request<T>(path: string, options?: RequestInit): Promise<T> {
   return res.json() as Promise<T>;
 }
 
-export function getState(): Promise<State> {
-  return request<State>("/state");
+export const EVENT_TYPES = [
+  "egg_created",
+  "egg_ready",
+  "egg_hatched",
+  "pet_listed",
+  "pet_sold",
+  "listing_cancelled",
+  "gold_changed",
+  "emotion_changed",
+  "emotion_epoch",
+  "reset",
+  "resync"
+] as const;
+
+export type EventType = (typeof EVENT_TYPES)[number];
+
+export function subscribeEvents(
+  onEvent: (type: EventType, data: Record<string, unknown>) => void
+): () => void {
+  const source = new EventSource(`${BASE_URL}/events`);
+  for (const type of EVENT_TYPES) {
+    source.addEventListener(type, (event) => {
+      onEvent(type, JSON.parse((event as MessageEvent).data));
+    });
+  }
+  return () => source.close();
+}
+
+export function getState(since: number | null = null): Promise<State> {
+  return request<State>(since === null ? "/state" : `/state?since=${since}`);
+}
+
+function pageQuery(
+  cursor: number | string | null,
+  limit: number,
+  params: [string, unknown][]
+) {
+  const query = new URLSearchParams({ limit: String(limit) });
+  if (cursor !== null) query.set("cursor", String(cursor));
+  for (const [key, value] of params) {
+    if (value === undefined) continue;
+    for (const item of Array.isArray(value) ? value : [value]) {
+      query.append(key, String(item));
+    }
+  }
+  return query.toString();
+}
+
+export function getPets(
+  cursor: number | null = null,
+  limit = 50,
+  filters: PetFilters = {}
+): Promise<Page<Pet>> {
+  const query = pageQuery(cursor, limit, [
+    ["tier", filters.tier],
+    ["species", filters.species],
+    ["element", filters.element],
+    ["aura", filters.aura],
+    ["eye_color", filters.eyeColor],
+    ["accessory", filters.accessory],
+    ["shiny_gene", filters.shinyGene],
+    ["available", filters.available],
+    ["include_genome", filters.includeGenome]
+  ]);
+  return request<Page<Pet>>(`/pets?${query}`);
+}
+
+export function getPetEmotions(
+  cursor: number | null = null,
+  limit = 500
+): Promise<Page<PetEmotion>> {
+  return request<Page<PetEmotion>>(`/pets/emotions?${pageQuery(cursor, limit, [])}`);
+}
+
+export function getEggs(
+  cursor: number | null = null,
+  limit = 50,
+  filters: EggFilters = {}
+): Promise<Page<Egg>> {
+  const query = pageQuery(cursor, limit, [
+    ["status", filters.status],
+    ["include_genome", filters.includeGenome]
+  ]);
+  return request<Page<Egg>>(`/eggs?${query}`);
+}
+
+export async function getAll<T>(
+  fetchPage: (cursor: number | null) => Promise<Page<T>>
+): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: number | null = null;
+  do {
+    const page: Page<T> = await fetchPage(cursor);
+    items.push(...page.items);
+    cursor = page.next_cursor;
+  } while (cursor !== null);
+  return items;
 }
 
 export function breed(parentAId: number, parentBId: number): Promise<Egg> {
@@ -81,6 +253,12 @@ export function breed(parentAId: number, parentBId: number): Promise<Egg> {
   });
 }
 
+export function previewBreed(parentAId: number, parentBId: number): Promise<BreedPreview> {
+  return request<BreedPreview>(
+    `/breed/preview?parent_a_id=${parentAId}&parent_b_id=${parentBId}`
+  );
+}
+
 export function hatch(eggId: number): Promise<Egg> {
   return request<Egg>("/hatch", {
     method: "POST",
@@ -116,6 +294,26 @@ export function getListings(): Promise<Listing[]> {
   return request<Listing[]>("/market/listings");
 }
 
+export function getOrderBook(
+  cursor: string | null = null,
+  limit = 50,
+  filters: OrderBookFilters = {}
+): Promise<OrderBookPage> {
+  const query = pageQuery(cursor, limit, [
+    ["sort", filters.sort],
+    ["tier", filters.tier],
+    ["species", filters.species],
+    ["element", filters.element],
+    ["aura", filters.aura],
+    ["eye_color", filters.eyeColor],
+    ["accessory", filters.accessory],
+    ["shiny_gene", filters.shinyGene],
+    ["min_price", filters.minPrice],
+    ["max_price", filters.maxPrice]
+  ]);
+  return request<OrderBookPage>(`/market/order-book?${query}`);
+}
+
 export function createListing(petId: number, price: number, sellerName?: string) {
   return request<Listing>("/market/list", {
     method: "POST",
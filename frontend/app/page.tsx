@@ -13,26 +13,37 @@ import {
   buyListing,
   cancelListing,
   createListing,
+  getAll,
+  getEggs,
   getListings,
+  getPetEmotions,
+  getPets,
   getState,
   hatch,
   hatchAll,
   adoptEgg,
   adoptPremiumEgg,
   sellPet,
+  subscribeEvents,
   revealHidden,
   instantHatch,
   refreshEmotion,
   reset,
   type Egg,
   type Listing,
+  type Page,
   type Pet
 } from "./lib/api";
 
+// Hatched eggs are history: loaded a page at a time as "show more" needs them.
+const HATCHED_PAGE_SIZE = 24;
+
 export default function Home() {
   const [lang, setLang] = useState<"en" | "ko">("en");
   const [pets, setPets] = useState<Pet[]>([]);
   const [eggs, setEggs] = useState<Egg[]>([]);
+  const [hatchedEggs, setHatchedEggs] = useState<Egg[]>([]);
+  const [hatchedCursor, setHatchedCursor] = useState<number | null>(null);
   const [selected, setSelected] = useState<number[]>([]);
   const [error, setError] = useState<string | null>(null);
   const [busy, setBusy] = useState(false);
@@ -41,6 +52,7 @@ export default function Home() {
   const [rareReveal, setRareReveal] = useState<Pet | null>(null);
   const [activePet, setActivePet] = useState<Pet | null>(null);
   const [gold, setGold] = useState(0);
+  const [autoHatch, setAutoHatch] = useState(false);
   const [lastHatchPet, setLastHatchPet] = useState<Pet | null>(null);
   const [visiblePets, setVisiblePets] = useState(8);
   const [visibleHatched, setVisibleHatched] = useState(6);
@@ -78,6 +90,13 @@ export default function Home() {
   const prevPetIds = useRef<Set<number>>(new Set());
   const hasInitializedPets = useRef(false);
   const prevEggIds = useRef<Set<number>>(new Set());
+  const seqRef = useRef<number | null>(null);
+  const emotionEpochRef = useRef<number | null>(null);
+  const petsRef = useRef<Pet[]>([]);
+  const eggsRef = useRef<Egg[]>([]);
+  const hatchedRef = useRef<Egg[]>([]);
+  // Last hatched egg id loaded, or null once every page is in.
+  const hatchedCursorRef = useRef<number | null>(null);
   const hasInitializedEggs = useRef(false);
   const marketEnabled = process.env.NEXT_PUBLIC_ENABLE_MARKET === "true";
   const adoptEggCostFallback = 12;
@@ -335,15 +354,74 @@ export default function Home() {
   const prevPremiumRemaining = useRef<number>(premiumRemainingSeconds);
 
   const refresh = async () => {
-    const state = await getState();
-    setPets(state.pets);
-    setEggs(state.eggs);
+    let state = await getState(seqRef.current);
+    let nextPets: Pet[];
+    let nextEggs: Egg[];
+    let nextHatched: Egg[];
+    let listingsChanged = true;
+    if (!state.changes || state.changes.full_reload_required) {
+      // Fetch the state first so rows written during the page walk are
+      // picked up again by the next delta.
+      if (state.changes) {
+        state = await getState();
+      }
+      let hatchedPage: Page<Egg>;
+      [nextPets, nextEggs, hatchedPage] = await Promise.all([
+        getAll((cursor) => getPets(cursor, 200, { includeGenome: false })),
+        getAll((cursor) =>
+          getEggs(cursor, 200, { status: "Incubating", includeGenome: false })
+        ),
+        getEggs(null, HATCHED_PAGE_SIZE, { status: "Hatched", includeGenome: false })
+      ]);
+      nextHatched = hatchedPage.items;
+      hatchedCursorRef.current = hatchedPage.next_cursor;
+    } else {
+      const { changes } = state;
+      const lastHatched = hatchedCursorRef.current;
+      const hatched = changes.eggs.filter((egg) => egg.status !== "Incubating");
+      nextPets = mergeById(petsRef.current, changes.pets, changes.deleted.pets);
+      nextEggs = mergeById(
+        eggsRef.current,
+        changes.eggs.filter((egg) => egg.status === "Incubating"),
+        [...changes.deleted.eggs, ...hatched.map((egg) => egg.id)]
+      );
+      // Eggs past the loaded pages arrive with a later "show more" page.
+      nextHatched = mergeById(
+        hatchedRef.current,
+        hatched.filter((egg) => lastHatched === null || egg.id <= lastHatched),
+        changes.deleted.eggs
+      );
+      listingsChanged = changes.listings.length > 0 || changes.deleted.listings.length > 0;
+      // Emotions are computed per window, so a new window changes every pet
+      // without a write; fetch just the emotions rather than every pet.
+      if (state.emotion_epoch !== emotionEpochRef.current) {
+        const emotions = await getAll((cursor) => getPetEmotions(cursor, 1000));
+        const byId = new Map(nextPets.map((pet) => [pet.id, pet]));
+        nextPets = mergeById(
+          nextPets,
+          emotions.flatMap(({ id, emotion }) => {
+            const pet = byId.get(id);
+            return pet ? [{ ...pet, emotion }] : [];
+          }),
+          []
+        );
+      }
+    }
+    seqRef.current = state.seq;
+    emotionEpochRef.current = state.emotion_epoch;
+    petsRef.current = nextPets;
+    eggsRef.current = nextEggs;
+    hatchedRef.current = nextHatched;
+    setPets(nextPets);
+    setEggs(nextEggs);
+    setHatchedEggs(nextHatched);
+    setHatchedCursor(hatchedCursorRef.current);
     if (!hasInitializedEggs.current) {
-      prevEggIds.current = new Set(state.eggs.map((egg) => egg.id));
+      prevEggIds.current = new Set(nextEggs.map((egg) => egg.id));
       hasInitializedEggs.current = true;
     } else {
-      const nextIds = new Set(state.eggs.map((egg) => egg.id));
-      const newEgg = state.eggs.find((egg) => !prevEggIds.current.has(egg.id));
+      const nextIds = new Set(nextEggs.map((egg) => egg.id));
+      const newEgg = nextEggs.find((egg) => !prevEggIds.current.has(egg.id));
       prevEggIds.current = nextIds;
       if (newEgg) {
         setHighlightEggId(newEgg.id);
@@ -352,6 +430,7 @@ export default function Home() {
     const serverTime = new Date(state.server_time).getTime();
     setTimeOffsetMs(serverTime - Date.now());
     setGold(state.gold ?? 0);
+    setAutoHatch(state.auto_hatch ?? false);
     setEmotionRefreshCost(state.emotion_refresh_cost ?? 10);
     setInstantHatchCost(state.instant_hatch_cost ?? 15);
     setRevealAuraCost(state.reveal_aura_cost ?? 8);
@@ -369,7 +448,7 @@ export default function Home() {
     setPremiumEggCost(state.adopt_premium_egg_cost ?? 30);
     setPremiumEggCooldownSeconds(state.adopt_premium_egg_cooldown_seconds ?? 600);
     setPremiumEggReadyAt(state.adopt_premium_egg_ready_at ?? null);
-    if (marketEnabled) {
+    if (marketEnabled && listingsChanged) {
       const market = await getListings();
       setListings(market);
     }
@@ -391,6 +470,22 @@ export default function Home() {
     refresh().catch((err) => setError(err.message));
   }, []);
 
+  useEffect(() => {
+    // Coalesce bursts (e.g. hatch-all) into one delta refresh.
+    let timer: ReturnType<typeof setTimeout> | null = null;
+    const unsubscribe = subscribeEvents(() => {
+      if (timer) return;
+      timer = setTimeout(() => {
+        timer = null;
+        refresh().catch((err) => setError(err.message));
+      }, 250);
+    });
+    return () => {
+      unsubscribe();
+      if (timer) clearTimeout(timer);
+    };
+  }, []);
+
   useEffect(() => {
     const timer = setInterval(() => setNow(Date.now() + timeOffsetMs), 1000);
     return () => clearInterval(timer);
@@ -490,17 +585,9 @@ export default function Home() {
     () => pets.filter((pet) => selected.includes(pet.id)),
     [pets, selected]
   );
-  const incubatingEggs = useMemo(
-    () => eggs.filter((egg) => egg.status === "Incubating"),
-    [eggs]
-  );
   const readyEggs = useMemo(
-    () => incubatingEggs.filter((egg) => new Date(egg.hatch_at).getTime() <= now),
-    [incubatingEggs, now]
-  );
-  const hatchedEggs = useMemo(
-    () => eggs.filter((egg) => egg.status !== "Incubating"),
-    [eggs]
+    () => eggs.filter((egg) => new Date(egg.hatch_at).getTime() <= now),
+    [eggs, now]
   );
   const petsToShow = useMemo(() => pets.slice(0, visiblePets), [pets, visiblePets]);
   const hatchedToShow = useMemo(
@@ -541,6 +628,25 @@ export default function Home() {
     }
   };
 
+  const handleShowMoreHatched = async () => {
+    const visible = visibleHatched + 6;
+    setVisibleHatched(visible);
+    const cursor = hatchedCursorRef.current;
+    if (cursor === null || hatchedRef.current.length >= visible) return;
+    try {
+      const page = await getEggs(cursor, HATCHED_PAGE_SIZE, {
+        status: "Hatched",
+        includeGenome: false
+      });
+      hatchedRef.current = mergeById(hatchedRef.current, page.items, []);
+      hatchedCursorRef.current = page.next_cursor;
+      setHatchedEggs(hatchedRef.current);
+      setHatchedCursor(page.next_cursor);
+    } catch (err: any) {
+      setError(err.message || "Failed to load eggs.");
+    }
+  };
+
   const handleHatch = async (eggId: number) => {
     setBusy(true);
     setError(null);
@@ -934,13 +1040,15 @@ export default function Home() {
               <div className="flex flex-wrap items-center justify-between gap-3">
                 <h2 className="text-2xl font-semibold">{text.myEggs}</h2>
                 <div className="flex flex-wrap items-center gap-2">
-                  <button
-                    className="rounded-full border border-ink/20 bg-white px-4 py-2 text-sm font-semibold text-ink transition hover:bg-ink/10 disabled:cursor-not-allowed disabled:opacity-60"
-                    onClick={handleHatchAll}
-                    disabled={busy || readyEggs.length === 0}
-                  >
-                    {text.ui.hatchAll} ({readyEggs.length})
-                  </button>
+                  {autoHatch ? null : (
+                    <button
+                      className="rounded-full border border-ink/20 bg-white px-4 py-2 text-sm font-semibold text-ink transition hover:bg-ink/10 disabled:cursor-not-allowed disabled:opacity-60"
+                      onClick={handleHatchAll}
+                      disabled={busy || readyEggs.length === 0}
+                    >
+                      {text.ui.hatchAll} ({readyEggs.length})
+                    </button>
+                  )}
                   <button
                     className="rounded-full border border-ink/20 bg-white px-4 py-2 text-sm font-semibold text-ink transition hover:bg-ink/10"
                     onClick={handleReset}
@@ -981,7 +1089,7 @@ export default function Home() {
                 </div>
               ) : null}
               <div className="mt-4 grid gap-4 md:grid-cols-2 lg:grid-cols-3">
-                {incubatingEggs.map((egg) => (
+                {eggs.map((egg) => (
                   <EggCard
                     key={egg.id}
                     egg={egg}
@@ -1015,10 +1123,10 @@ export default function Home() {
                   ))
                 )}
               </div>
-              {hatchedEggs.length > visibleHatched ? (
+              {hatchedEggs.length > visibleHatched || hatchedCursor !== null ? (
                 <button
                   className="mt-4 rounded-full border border-ink/20 bg-white px-4 py-2 text-sm font-semibold text-ink hover:bg-ink/10"
-                  onClick={() => setVisibleHatched((count) => count + 6)}
+                  onClick={handleShowMoreHatched}
                 >
                   {text.ui.showMore}
                 </button>
@@ -1152,6 +1260,17 @@ export default function Home() {
   );
 }
 
+function mergeById<T extends { id: number }>(items: T[], changed: T[], deleted: number[]) {
+  const byId = new Map(items.map((item) => [item.id, item]));
+  for (const id of deleted) {
+    byId.delete(id);
+  }
+  for (const item of changed) {
+    byId.set(item.id, item);
+  }
+  return Array.from(byId.values()).sort((a, b) => a.id - b.id);
+}
+
 function getAdoptRemainingSeconds(readyAt: string | null, nowMs: number) {
   if (!readyAt) return 0;
   const remainingMs = new Date(readyAt).getTime() - nowMs;